@@ -22,7 +22,6 @@ Il fonctionne en python3.12 et a besoin des librairies :
     -.FreeSimpleGUI ou à défaut PySimpleGUI
     - logging
     - subprocess 
-    - codecs
 """
 
 # Chargement des librairies
@@ -46,8 +45,7 @@ from pandas.plotting import register_matplotlib_converters
 import sys
 import subprocess
 from tkinter import *
-import codecs
-import csv
+from radiosondes import catalogue_radiosondes, lecture_cor, moyennes_grille, sondage_vide
 
 # Complément pour les librairies
 pd.set_option('mode.chained_assignment',None)
@@ -129,31 +127,18 @@ def T_meteofrance_cor(date):
     mois = date[3:5]
     annee = date[6:10]
     chemin=os.path.join("//mtoservice/Labos/LIDAR/COR/",annee) # CHEMIN D'ACCÈS AUX DONNÉES MÉTÉOFRANCE
-    dossier = sorted([f for f in os.listdir(chemin) if '.cor' in f])
-    radical_fichier_mf = 'DD' + annee + mois + jour
-    if [f for f in dossier if radical_fichier_mf in f] == []: # Si le dossier est vide, on affiche un message signalant qu'il n'y a pas de mesure pour cette date 
+    lancers = catalogue_radiosondes(chemin).lancers(annee + mois + jour) # lancers du jour en question, triés (voir radiosondes.CatalogueRadiosondes)
+    if lancers == []: # Si le dossier est vide, on affiche un message signalant qu'il n'y a pas de mesure pour cette date 
         print("Il n'y a pas de mesure météo france pour cette date")
         return 0
     # OUVERTURE ET LECTURE DU FICHIER MÉTÉOFRANCE 
     else:
         print(date)
-        nom_fichier_meteofrance = [f for f in dossier if radical_fichier_mf in f][0]
-        fichier_mf = codecs.open(chemin+'/'+nom_fichier_meteofrance, encoding = 'latin1')
-        lines = fichier_mf.readlines()
-        alt,P,T,U,FF,DD,As = [], [], [], [], [], [], [] # je recupère l'altitude, la pression, la température, l'humidité, vent ff et direction, vitesse ascendente
-        for i in range(1, len(lines)):
-            tmp = lines[i].replace('\n', '').replace('\r', '').replace(';', '\t').split('\t')
-            buffer_alt = 0 ## pour éviter de prendre en compte la redescente du ballon, qui est dans les .cor
-            if len(tmp) > 1 and float(tmp[1]) > buffer_alt:
-                alt.append(float(tmp[1])/1000)
-                P.append(float(tmp[12]))
-                T.append(float(tmp[10])+273.15)
-                U.append(float(tmp[11]))          # humidité relative en %
-                FF.append(float(tmp[7]))          # force du vent
-                DD.append(float(tmp[8]))          # direction du vent
-                As.append(float(tmp[6]))          # vitesse ascentionnelle en m/s ? 
-                buffer_alt = float(tmp[1])
-        return [alt,P,T,U,FF,DD,As]
+        nom_fichier_meteofrance = lancers[0]
+        data = lecture_cor(os.path.join(chemin, nom_fichier_meteofrance))
+        data = data[data['alt'] > 0] ## seuls les niveaux d'altitude strictement positive sont conservés
+        # altitude en km, pression en hPa, température en K, humidité relative en %, force et direction du vent, vitesse ascensionnelle en m/s
+        return [data['alt'].to_numpy()/1000, data['P'].to_numpy(), data['T'].to_numpy()+273.15, data['U'].to_numpy(), data['FF'].to_numpy(), data['DD'].to_numpy(), data['As'].to_numpy()]
 
 def lecture_rs(date):
   # Florent Tence : date sous forme DD-MM-AAAA
@@ -161,33 +146,17 @@ def lecture_rs(date):
   mois = date[3:5]
   annee = date[6:10]
   #print(emplacement_rs)
-  dossier = sorted([f for f in os.listdir(emplacement_rs) if '.cor' in f]) # list tous les .cor du fichier
-  radical_fichier_mf = 'DD' + annee + mois + jour # je recherche le fichier du jour en question 
-  #print(dossier)
-  #print(radical_fichier_mf)
-  alt,P,T,U,FF,DD,As = [], [], [], [], [], [], [] # je recupère l'altitude, la pression, la température, l'humidité, vent ff et direction, vitesse ascendente
-  if [f for f in dossier if radical_fichier_mf in f] == []: # Si le dossier est vide, on affiche un message signalant qu'il n'y a pas de mesure pour cette date
+  lancers = catalogue_radiosondes(emplacement_rs).lancers(annee + mois + jour) # lancers du jour en question, triés (voir radiosondes.CatalogueRadiosondes)
+  data = sondage_vide()
+  if lancers == []: # Si le dossier est vide, on affiche un message signalant qu'il n'y a pas de mesure pour cette date
     sg.popup_ok("Il n'y a pas de mesure météo france pour cette date", title="Erreur", keep_on_top=True)
   else:
     # Ouverture et lecture du fichier de RS
-    nom_fichier_meteofrance = [f for f in dossier if radical_fichier_mf in f][-1] # on prend le dernier lancer de la journée
+    nom_fichier_meteofrance = lancers[-1] # on prend le dernier lancer de la journée
     print(nom_fichier_meteofrance)
-    fichier_mf = codecs.open(emplacement_rs+'/'+nom_fichier_meteofrance,encoding = 'latin1')
-    print(fichier_mf)
-    lines = fichier_mf.readlines()
-     
-    for i in range(1, len(lines)):
-      tmp = lines[i].replace('\n', '').replace('\r','').replace(';', '\t').split('\t')
-      if len(tmp) > 1:
-        alt.append(float(tmp[1])/1000)
-        P.append(float(tmp[12]))          # Pression atmosphérique hPa
-        #T.append(float(tmp[10])+273.15)   # Température en K 
-        T.append(float(tmp[10]))   # Température en °C 
-        U.append(float(tmp[11]))          # humidité relative en %
-        FF.append(float(tmp[7]))          # force du vent
-        DD.append(float(tmp[8]))          # direction du vent
-        As.append(float(tmp[6]))          # vitesse ascentionnelle en m/s ? 
-  return [alt,P,T,U,FF,DD,As] # il me retourne une liste de valeurs
+    data = lecture_cor(os.path.join(emplacement_rs, nom_fichier_meteofrance))
+  # altitude en km, pression en hPa, température en °C, humidité relative en %, force et direction du vent, vitesse ascensionnelle en m/s
+  return [data['alt'].to_numpy()/1000, data['P'].to_numpy(), data['T'].to_numpy(), data['U'].to_numpy(), data['FF'].to_numpy(), data['DD'].to_numpy(), data['As'].to_numpy()]
 
 def is_before_full(date1, date2): ## dates au format jour/mois/annee
     if int(date1[6:10]) > int(date2[6:10]):
@@ -301,26 +270,22 @@ if (__name__ == "__main__"):
           mf_data[0].append(date)
           if data_mf == 0:
               print(date)
-              mf_data[1].append([50*[np.nan], 50*[np.nan], 50*[np.nan]])
+              mf_data[1].append(7*[np.zeros(0)]) ## jour sans radiosondage : ligne de NaN sur la grille commune
           else:
               mf_data[1].append(data_mf)
-  z_commun = list(np.arange(0,35,0.3))   ## on créé une échelle commune de 0 à 35 avec une résolution de 300 pour tout ramener sur une même échelle
-  mf_data_zcom = [mf_data[0],[]]
-  j_per_annee, mf_data_zcom_per_annee = [[] for y in annees], [[] for y in annees]
-  for l in range(len(mf_data[0])):
-    j_per_annee[annees.index(mf_data[0][l][6:10])].append(mf_data[0])
-    z_temp = [[z] for z in z_commun]  ## on créé une liste de liste selon z_commun, on y classera nos valeurs d'altitudes peu à peu avant de moyenner
-    for j in range(len(mf_data[1][l][0])):   ## mf_data[1][X][0] désigne toujours l'altitude 
-        z_commun.append(mf_data[1][l][0][j])
-        z_commun = sorted(z_commun)
-        ind = z_commun.index(mf_data[1][l][0][j])  ## on trouve l'indice correspondant à chaque valeur d'altitude, puis on met la valeur de température correspondante dans z_temp
-        z_commun.remove(mf_data[1][l][0][j])
-        z_temp[ind-1].append(mf_data[1][l][2][j])  ## indice 2 pour la température
-    mf_data_zcom[1].append(len(z_commun)*[np.nan]) ## on créé une liste vierge composée de NaN, puis on remplace par les valeurs stockées dans z_temp, quand il y en a
-    for alt in range(len(z_temp)):
-        if not(z_temp[alt][1:] == []):
-          mf_data_zcom[1][l][alt] = np.mean(z_temp[alt][1:])
-    mf_data_zcom_per_annee[annees.index(mf_data[0][l][6:10])].append(mf_data_zcom[1][l])
+  z_commun = np.arange(0,35,0.3)   ## on créé une échelle commune de 0 à 35 avec une résolution de 300 pour tout ramener sur une même échelle
+  # Mise sur l'échelle commune de tous les jours en une fois : moyennes par jour et par niveau de la température, de
+  # l'humidité, de la force du vent et de la vitesse ascensionnelle (tableaux jours x niveaux, voir radiosondes.moyennes_grille)
+  # Les niveaux d'altitude inférieure ou égale à z_commun[0] (0 km, altitudes nulles ou négatives erronées) sont ignorés :
+  # l'ancienne boucle les ajoutait au dernier niveau de la grille (34,8 km)
+  ## mf_data[1][X] contient l'altitude (0), la pression, la température (2), l'humidité (3), le vent ff (4) et direction, la vitesse ascendante (6)
+  jour_niveaux = np.concatenate([np.full(len(data[0]), l) for l, data in enumerate(mf_data[1])])
+  alt_niveaux = np.concatenate([data[0] for data in mf_data[1]])
+  grilles = moyennes_grille(jour_niveaux, alt_niveaux, {nom:np.concatenate([data[i] for data in mf_data[1]]) for nom, i in [('T', 2), ('U', 3), ('FF', 4), ('As', 6)]}, z_commun, len(mf_data[0]))
+  mf_data_zcom = [mf_data[0], grilles['T']]
+  annee_jours = np.array([date[6:10] for date in mf_data[0]])
+  j_per_annee = [[date for date in mf_data[0] if date[6:10] == y] for y in annees]
+  mf_data_zcom_per_annee = [mf_data_zcom[1][annee_jours == y] for y in annees]
   print(len(mf_data_zcom_per_annee))
   # calcul de l'anomalie
   mf_data_climato = np.nanmean(mf_data_zcom_per_annee[:-1], axis=0)
@@ -328,15 +293,11 @@ if (__name__ == "__main__"):
   #mf_data_climato_2024 = np.array(mf_data_zcom_per_annee[-1])[:140] - mf_data_climato_jusque_20mai
   mf_data_climato_2024 = np.array(mf_data_zcom_per_annee[-1]) - mf_data_climato_jusque_20mai
   print(mf_data_climato_2024)
-  # On ecrit le fichier csv
-  print(mf_data_zcom_per_annee)
-  
-  df = pd.DataFrame(mf_data_zcom_per_annee, columns=['FName', 'LName', 'Age'])
-  
-  
-  with open("DATA_series.csv", 'w') as f:
-    write=csv.writer(f)
-  #mf_data_zcom_per_annee.to_csv("DATA_series.csv", sep=";") 
+  # On ecrit le fichier csv : une ligne par jour et par niveau de l'échelle commune
+  df = pd.DataFrame({'date':np.repeat(mf_data[0], len(z_commun)), 'altitude_km':np.tile(z_commun, len(mf_data[0]))})
+  for nom in grilles:
+    df[nom] = grilles[nom].ravel()
+  df.to_csv("DATA_series.csv", sep=";", index=False)
   
   
  #############  FIN DU PROGRAMME #############
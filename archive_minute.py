@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Octobre 2026
+@author : Benjamin Ménétrier
+
+Archive consolidée des données "minute" du Cobalt : tous les fichiers mensuels DON_Minute_UTC_YYYYMM.txt des répertoires
+annuels sont regroupés dans un unique fichier .npy, projeté en mémoire, sur une grille fixe d'une minute.
+Chaque minute occupe un enregistrement de taille fixe, codé selon CODAGE_MINUTE (lecture_cobalt.py) : la date d'un
+enregistrement se déduit de sa position et de la date de la première minute de l'archive, enregistrée dans un fichier
+json à côté de l'archive. Une période quelconque est extraite par une vue numpy, sans lecture du reste de l'archive.
+Le fichier json conserve aussi l'état des fichiers mensuels archivés : une période dont un fichier a été modifié depuis
+la consolidation est relue dans les fichiers mensuels, jusqu'à la consolidation suivante.
+
+Utilisation :
+    python archive_minute.py <répertoire "Minute"> <archive.npy>
+    exemple : python archive_minute.py N:/partageMto_DON_SA/Minute archives/minute.npy
+    L'archive est ensuite renseignée dans visu_ddu.py ou visu_minute_ddu.py (emplacement "Archive minute").
+
+Il fonctionne en python3.12 et a besoin des librairies :
+    - numpy
+    - pandas
+"""
+
+# Chargement des librairies
+import datetime
+import json
+import logging
+import os
+import re
+import sys
+import numpy as np
+import pandas as pd
+from lecture_cobalt import CODAGE_MINUTE, ENTIER_ABSENT, SCHEMA_MINUTE, MagasinMinute, codage_colonne, lecture_fichier, repertoire_annee
+
+# Nom des fichiers mensuels archivés (le fichier du mois en cours n'est pas archivé)
+MOTIF_FICHIER = re.compile(r'^DON_Minute_UTC_(\d{4})(\d{2})\.txt$')
+
+############# DEFINITION DES FONCTIONS #############
+
+def minutes_epoch(date):
+  # Nombre de minutes depuis le 01/01/1970 d'une date
+  return int(np.datetime64(pd.Timestamp(date).to_datetime64(), 'm').astype(np.int64))
+
+def type_archive(codage=CODAGE_MINUTE):
+  # Type numpy d'un enregistrement de l'archive : une colonne par variable codée
+  return np.dtype([(nom, codage[nom][0]) for nom in codage])
+
+def liste_fichiers_minute(racine):
+  # Liste triée des fichiers mensuels (annee, mois, chemin) des répertoires annuels de racine
+  # racine peut aussi être un répertoire annuel (".../Minute/2024") : son répertoire parent est alors utilisé
+  if repertoire_annee(racine, 0) != racine:
+    racine = os.path.dirname(os.path.normpath(racine))
+  fichiers = []
+  for annee in sorted(os.listdir(racine)):
+    repertoire = os.path.join(racine, annee)
+    if not (len(annee) == 4 and annee.isdigit() and os.path.isdir(repertoire)):
+      continue
+    for fichier in sorted(os.listdir(repertoire)):
+      res = MOTIF_FICHIER.match(fichier)
+      if res is not None:
+        fichiers.append((int(res.group(1)), int(res.group(2)), os.path.join(repertoire, fichier)))
+  return sorted(fichiers)
+
+def etat_fichier(chemin):
+  # Date de modification (ns) et taille d'un fichier, None s'il n'existe plus
+  try:
+    res = os.stat(chemin)
+  except FileNotFoundError:
+    return None
+  return [res.st_mtime_ns, res.st_size]
+
+def consolidation(racine, chemin_archive, codage=CODAGE_MINUTE):
+  # Construction de l'archive chemin_archive (et de son fichier json) à partir des fichiers mensuels de racine
+  # L'archive couvre la grille des minutes du premier jour du premier mois au dernier jour du dernier mois ; les minutes
+  # absentes des fichiers sont codées comme valeurs manquantes
+  # Les fichiers mensuels sont lus directement, sans passer par le cache feather de lecture_cobalt.py
+  fichiers = liste_fichiers_minute(racine)
+  if len(fichiers) == 0:
+    raise FileNotFoundError("Aucun fichier DON_Minute_UTC_YYYYMM.txt dans " + racine)
+  annee, mois, _ = fichiers[0]
+  t0 = minutes_epoch(datetime.datetime(annee, mois, 1))
+  annee, mois, _ = fichiers[-1]
+  t1 = minutes_epoch(datetime.datetime(annee + mois//12, mois%12 + 1, 1))
+  logging.info("Archive de " + str(len(fichiers)) + " fichiers, " + str(t1-t0) + " minutes")
+
+  # Archive écrite dans un fichier temporaire, remplacé à la fin de la consolidation
+  repertoire = os.path.dirname(os.path.abspath(chemin_archive))
+  os.makedirs(repertoire, exist_ok=True)
+  chemin_tmp = chemin_archive + '.tmp.npy'
+  archive = np.lib.format.open_memmap(chemin_tmp, mode='w+', dtype=type_archive(codage), shape=(t1-t0,))
+  for nom in codage:
+    archive[nom] = ENTIER_ABSENT if codage[nom][0] == np.int16 else np.nan
+
+  # Ecriture des fichiers mensuels à leur place dans la grille, avec l'état de chaque fichier au moment de sa lecture
+  sources = []
+  for annee, mois, chemin in fichiers:
+    logging.info("Archivage de " + chemin)
+    sources.append([annee, mois, chemin] + etat_fichier(chemin))
+    data = lecture_fichier(chemin, SCHEMA_MINUTE)
+    data = data[data['DATE'].notnull()]
+    index = data['DATE'].to_numpy().astype('datetime64[m]').astype(np.int64) - t0
+    valide = (index >= 0) & (index < t1-t0)
+    index = index[valide]
+    for nom in codage:
+      if nom in data.columns:
+        archive[nom][index] = codage_colonne(data[nom].to_numpy()[valide], *codage[nom], nom=nom)
+  archive.flush()
+  del archive
+
+  # Métadonnées : date de la première minute, taille, codage, état des fichiers mensuels et de l'archive elle-même
+  # L'état de l'archive (conservé par os.replace) lie le fichier json à ce fichier .npy : si la consolidation est
+  # interrompue entre les deux remplacements, ouverture_archive détecte qu'ils ne vont pas ensemble
+  metadonnees = {'t0':str(np.datetime64(t0, 'm')),
+                 'nb_minutes':t1-t0,
+                 'codage':{nom:[np.dtype(codage[nom][0]).name, codage[nom][1], codage[nom][2]] for nom in codage},
+                 'fichiers':sources,
+                 'archive':etat_fichier(chemin_tmp)}
+  with open(chemin_archive + '.tmp.json', 'w') as f:
+    json.dump(metadonnees, f)
+  os.replace(chemin_archive + '.tmp.json', chemin_archive + '.json')
+  os.replace(chemin_tmp, chemin_archive)
+
+def ouverture_archive(chemin_archive):
+  # Projection en mémoire de l'archive (lecture seule), renvoie le tableau, la date de sa première minute (en minutes
+  # depuis le 01/01/1970), son codage et la liste des fichiers mensuels archivés (annee, mois, chemin, date de
+  # modification, taille), ou None si l'archive ou son fichier json n'existent pas ou ne correspondent pas
+  if not (os.path.isfile(chemin_archive) and os.path.isfile(chemin_archive + '.json')):
+    return None
+  with open(chemin_archive + '.json') as f:
+    metadonnees = json.load(f)
+  if metadonnees.get('archive') != etat_fichier(chemin_archive):
+    logging.warning("Le fichier json de l'archive " + chemin_archive + " ne correspond pas à l'archive")
+    return None
+  archive = np.load(chemin_archive, mmap_mode='r')
+  t0 = minutes_epoch(metadonnees['t0'])
+  codage = {nom:(np.dtype(type).type, facteur, decalage) for nom, (type, facteur, decalage) in metadonnees['codage'].items()}
+  return archive, t0, codage, metadonnees['fichiers']
+
+def extraction_archive(chemin_archive, date_debut, date_fin):
+  # Données de l'archive entre date_debut et date_fin (incluses), sous forme de MagasinMinute dont les colonnes sont des
+  # vues sur l'archive projetée en mémoire
+  # Renvoie None si l'archive n'existe pas, ne couvre pas toute la période ou si l'un des fichiers mensuels de la période a
+  # été modifié ou supprimé depuis la consolidation ; les minutes manquantes en début et en fin de période sont retirées,
+  # comme pour la lecture des fichiers mensuels
+  res = ouverture_archive(chemin_archive)
+  if res is None:
+    return None
+  archive, t0, codage, sources = res
+  debut = minutes_epoch(date_debut) - t0
+  fin = minutes_epoch(date_fin) - t0
+  if debut < 0 or fin >= archive.shape[0]:
+    return None
+  date_debut, date_fin = pd.Timestamp(date_debut), pd.Timestamp(date_fin)
+  for annee, mois, chemin, mtime, taille in sources:
+    if (date_debut.year, date_debut.month) <= (annee, mois) <= (date_fin.year, date_fin.month) and etat_fichier(chemin) != [mtime, taille]:
+      logging.warning("Le fichier " + chemin + " a changé depuis la consolidation de l'archive " + chemin_archive)
+      return None
+  vue = archive[debut:fin+1]
+
+  # Minutes où au moins une variable est renseignée
+  renseigne = np.zeros(vue.shape[0], dtype=bool)
+  for nom in codage:
+    if codage[nom][0] == np.int16:
+      renseigne |= vue[nom] != ENTIER_ABSENT
+    else:
+      renseigne |= ~np.isnan(vue[nom])
+  index = np.flatnonzero(renseigne)
+  if index.shape[0] == 0:
+    vue = vue[:0]
+  else:
+    debut, vue = debut + index[0], vue[index[0]:index[-1]+1]
+
+  minutes = np.arange(t0+debut, t0+debut+vue.shape[0], dtype=np.int32)
+  return MagasinMinute.depuis_colonnes(minutes, {nom:vue[nom] for nom in codage}, codage)
+
+#############  PROGRAMME PRINCIPAL #############
+
+if (__name__ == "__main__"):
+  logging.basicConfig(level=logging.INFO)
+  if len(sys.argv) != 3:
+    print("Utilisation : python archive_minute.py <répertoire \"Minute\"> <archive.npy>")
+    sys.exit(1)
+  consolidation(sys.argv[1], sys.argv[2])
@@ -0,0 +1,232 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Octobre 2026
+@author : Benjamin Ménétrier
+
+Ce script génère, sans interface graphique, les figures png des données "minute" (fonctions de visu_minute_ddu.py) et
+"horaire" (fonctions de visu_horaire_ddu.py) du Cobalt sur une période donnée, par exemple pour produire chaque nuit
+les graphiques du bulletin quotidien de DDU par une tâche planifiée (cron).
+Les figures sont tracées avec le moteur Agg de matplotlib : aucune fenêtre Tk n'est créée.
+
+Utilisation :
+    python batch_ddu.py [options]
+    exemple : python batch_ddu.py --debut "01-12-2024 00:00" --fin "02-12-2024 00:00" --minute vent temperature --horaire pression
+    Sans date de début ni de fin, la période est la veille, de 00:00 à 00:00 (heure du fuseau choisi).
+    Avec --processus N, les figures sont tracées et exportées en parallèle par N processus.
+    python batch_ddu.py -h donne la liste des options.
+    Le code de retour est 1 si des données ou des figures manquent.
+
+Il fonctionne en python3.12 et a besoin des librairies :
+    - argparse
+    - concurrent.futures
+    - datetime
+    - importlib
+    - logging
+    - matplotlib
+    - numpy
+    - pandas
+"""
+
+# Chargement des librairies
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import datetime
+import importlib
+import logging
+import os
+import sys
+import matplotlib as mpl
+mpl.use('Agg')
+import matplotlib.pyplot as plt
+import visu_horaire_ddu
+import visu_minute_ddu
+from archive_minute import extraction_archive
+from lecture_cobalt import SCHEMA_HORAIRE, SCHEMA_MINUTE, MagasinMinute, chargement_mois, taches_periode
+from outils_figures import enregistrement_png
+
+# Décalage horaire des fuseaux
+DECALAGE = {'UTC':0, 'DDU':10}
+
+# Figures disponibles : nom -> (fonction, unité utilisée : 'vent', 'pression', 'temperature' ou None)
+FIGURES_MINUTE = {
+  'vent':(visu_minute_ddu.figure_vent, 'vent'),
+  'pression':(visu_minute_ddu.figure_pression, 'pression'),
+  'temperature':(visu_minute_ddu.figure_temperature, 'temperature'),
+  'humidite':(visu_minute_ddu.figure_humidite, None),
+  'rayonnement':(visu_minute_ddu.figure_rayonnement, None),
+  }
+FIGURES_HORAIRE = {
+  'vent':(visu_horaire_ddu.figure_vent_horaire, 'vent'),
+  'pression':(visu_horaire_ddu.figure_pression_horaire, 'pression'),
+  'temperature':(visu_horaire_ddu.figure_temperature_horaire, 'temperature'),
+  }
+
+# Unités acceptées (les températures peuvent être données sans le symbole degré)
+UNITES = {
+  'vent':{'m/s':'m/s', 'km/h':'km/h', 'kt':'kt'},
+  'pression':{'hPa':'hPa', 'mmHg':'mmHg'},
+  'temperature':{'°C':'°C', 'C':'°C', '°F':'°F', 'F':'°F', 'K':'K'},
+  }
+
+############# DEFINITION DES FONCTIONS #############
+
+def lecture_date(texte):
+  # Lecture d'une date au format "JJ-MM-AAAA HH:MM" (argument de la ligne de commande)
+  try:
+    return datetime.datetime.strptime(texte, "%d-%m-%Y %H:%M")
+  except ValueError:
+    raise argparse.ArgumentTypeError("date invalide : " + texte + " (format attendu : \"JJ-MM-AAAA HH:MM\")")
+
+def arguments():
+  # Arguments de la ligne de commande
+  veille = datetime.datetime.combine(datetime.date.today(), datetime.time()) - datetime.timedelta(days=1)
+  parser = argparse.ArgumentParser(description="Génération des figures \"minute\" et \"horaire\" du Cobalt, sans interface graphique")
+  parser.add_argument('--debut', type=lecture_date, default=veille, help="date locale de début, \"JJ-MM-AAAA HH:MM\" (défaut : la veille à 00:00)")
+  parser.add_argument('--fin', type=lecture_date, default=veille+datetime.timedelta(days=1), help="date locale de fin, \"JJ-MM-AAAA HH:MM\" (défaut : le jour même à 00:00)")
+  parser.add_argument('--fuseau', choices=list(DECALAGE), default='DDU', help="fuseau horaire des dates et des figures (défaut : DDU)")
+  parser.add_argument('--minute', nargs='*', choices=list(FIGURES_MINUTE), default=list(FIGURES_MINUTE), help="figures \"minute\" (défaut : toutes)")
+  parser.add_argument('--horaire', nargs='*', choices=list(FIGURES_HORAIRE), default=[], help="figures \"horaire\" (défaut : aucune)")
+  parser.add_argument('--unite-vent', choices=list(UNITES['vent']), default='kt')
+  parser.add_argument('--unite-pression', choices=list(UNITES['pression']), default='hPa')
+  parser.add_argument('--unite-temperature', choices=list(UNITES['temperature']), default='°C')
+  parser.add_argument('--emplacement-minute', default="N:/partageMto_DON_SA/Minute/", help="répertoire des fichiers \"minute\" (ou de l'une de leurs années)")
+  parser.add_argument('--archive-minute', default='', help="archive consolidée des données \"minute\" (archive_minute.py), facultative")
+  parser.add_argument('--emplacement-horaire', default="N:/partageMto_DON_SA/Horaire/", help="répertoire des fichiers \"horaire\" (ou de l'une de leurs années)")
+  parser.add_argument('--emplacement-figure', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'figures'), help="répertoire des figures")
+  parser.add_argument('--processus', type=int, default=1, help="nombre de processus traçant les figures en parallèle (défaut : 1)")
+  parser.add_argument('--log', default=None, help="fichier de log (défaut : sortie d'erreur)")
+  return parser.parse_args()
+
+def chargement(emplacement, prefixe, schema, date_debut, date_fin):
+  # Lecture des fichiers mensuels de la période UTC date_debut - date_fin, sans interface graphique
+  # Les fichiers absents sont signalés dans le log et ignorés ; renvoie None s'il n'y a aucune donnée
+  taches = []
+  for tache in taches_periode(emplacement, prefixe, date_debut, date_fin):
+    if os.path.isfile(tache[0]):
+      taches.append(tache)
+    else:
+      logging.error("Le fichier " + tache[0] + " n'existe pas")
+  if len(taches) == 0:
+    return None
+  data = chargement_mois(taches, schema)
+  if data is None or data.empty:
+    return None
+  return data
+
+def parametres_module(module, date_locale_debut, date_locale_fin, fuseau, emplacement_figure, suffixe=''):
+  # Renseignement des variables globales lues par les fonctions de figure d'un module (dates, fuseau, emplacement des
+  # figures et logo), comme le fait l'interface graphique
+  # Les noms des figures "horaire" de pression et de température utilisent les dates sans suffixe, que l'interface
+  # graphique définit aussi : elles sont renseignées dans les deux cas
+  for nom, date in (('debut', date_locale_debut), ('fin', date_locale_fin)):
+    for terminaison in set(('', suffixe)):
+      setattr(module, 'annee_' + nom + terminaison, "{:04d}".format(date.year))
+      setattr(module, 'mois_' + nom + terminaison, "{:02d}".format(date.month))
+      setattr(module, 'jour_' + nom + terminaison, "{:02d}".format(date.day))
+      setattr(module, 'heure_' + nom + terminaison, "{:02d}".format(date.hour))
+      setattr(module, 'minute_' + nom + terminaison, "{:02d}".format(date.minute))
+  module.fuseau = fuseau
+  module.decalage = DECALAGE
+  module.emplacement_figure = emplacement_figure
+  module.logo = plt.imread(os.path.join(os.path.dirname(os.path.abspath(__file__)), "logo_MF.png"))
+
+def export_figure(fonction, data, unite):
+  # Tracé et export d'une figure, renvoie le chemin du fichier png
+  if unite is None:
+    fig, ax, chemin_figure = fonction(data)
+  else:
+    fig, ax, chemin_figure = fonction(data, unite)
+  enregistrement_png(fig, chemin_figure)
+  return chemin_figure
+
+def initialisation_processus(nom_module, parametres, data):
+  # Initialisation d'un processus de tracé : variables globales du module des figures et données, reçues une seule fois
+  # par processus
+  global donnees_processus
+  parametres_module(importlib.import_module(nom_module), *parametres)
+  donnees_processus = data
+
+def export_figure_processus(fonction, unite):
+  # Tracé et export d'une figure dans un processus de tracé, à partir de ses données
+  return export_figure(fonction, donnees_processus, unite)
+
+def generation_figures(data, figures, noms, unites, module, parametres, nb_processus=1):
+  # Tracé et export des figures demandées, renvoie le nombre de figures en échec
+  # Les données (MagasinMinute pour les figures "minute") sont partagées par toutes les figures, qui ne décodent que leurs
+  # colonnes ; avec nb_processus > 1, les figures sont réparties entre des processus qui reçoivent chacun une fois les
+  # données compactes et les paramètres du module
+  parametres_module(module, *parametres)
+  os.makedirs(module.emplacement_figure, exist_ok=True)
+  echecs = 0
+  if nb_processus <= 1:
+    for nom in noms:
+      fonction, unite = figures[nom]
+      try:
+        chemin_figure = export_figure(fonction, data, None if unite is None else unites[unite])
+        logging.info("Figure " + chemin_figure + " exportée")
+      except Exception:
+        logging.exception("Echec de la figure " + nom)
+        echecs += 1
+    return echecs
+
+  with ProcessPoolExecutor(min(nb_processus, len(noms)), initializer=initialisation_processus, initargs=(module.__name__, parametres, data)) as pool:
+    futures = {}
+    for nom in noms:
+      fonction, unite = figures[nom]
+      futures[nom] = pool.submit(export_figure_processus, fonction, None if unite is None else unites[unite])
+    for nom in noms:
+      try:
+        chemin_figure = futures[nom].result()
+        logging.info("Figure " + chemin_figure + " exportée")
+      except Exception:
+        logging.exception("Echec de la figure " + nom)
+        echecs += 1
+  return echecs
+
+#############  PROGRAMME PRINCIPAL #############
+
+if (__name__ == "__main__"):
+  args = arguments()
+  if args.log is None:
+    logging.basicConfig(level=logging.INFO)
+  else:
+    logging.basicConfig(level=logging.INFO, filename=args.log, filemode="w")
+  if args.debut >= args.fin:
+    logging.critical("La date de début est postérieure ou égale à la date de fin")
+    sys.exit(1)
+  unites = {'vent':UNITES['vent'][args.unite_vent],
+            'pression':UNITES['pression'][args.unite_pression],
+            'temperature':UNITES['temperature'][args.unite_temperature]}
+
+  # Dates au format UTC
+  date_debut = args.debut - datetime.timedelta(hours=DECALAGE[args.fuseau])
+  date_fin = args.fin - datetime.timedelta(hours=DECALAGE[args.fuseau])
+  echecs = 0
+
+  # Figures "minute"
+  if len(args.minute) > 0:
+    data = None
+    if args.archive_minute != '':
+      data = extraction_archive(args.archive_minute, date_debut, date_fin)
+    if data is None:
+      data = chargement(args.emplacement_minute, "DON_Minute_UTC_", SCHEMA_MINUTE, date_debut, date_fin)
+      if data is not None:
+        data = MagasinMinute(data)
+    if data is None or data.empty:
+      logging.critical("Pas de donnée \"minute\" pour la période demandée")
+      echecs += len(args.minute)
+    else:
+      parametres = (args.debut, args.fin, args.fuseau, args.emplacement_figure)
+      echecs += generation_figures(data, FIGURES_MINUTE, args.minute, unites, visu_minute_ddu, parametres, args.processus)
+
+  # Figures "horaire"
+  if len(args.horaire) > 0:
+    data = chargement(args.emplacement_horaire, "DON_Horaire_UTC_", SCHEMA_HORAIRE, date_debut, date_fin)
+    if data is None:
+      logging.critical("Pas de donnée \"horaire\" pour la période demandée")
+      echecs += len(args.horaire)
+    else:
+      parametres = (args.debut, args.fin, args.fuseau, args.emplacement_figure, '_horaire')
+      echecs += generation_figures(data, FIGURES_HORAIRE, args.horaire, unites, visu_horaire_ddu, parametres, args.processus)
+
+  sys.exit(1 if echecs > 0 else 0)
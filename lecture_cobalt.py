@@ -0,0 +1,634 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Octobre 2026
+@author : Benjamin Ménétrier
+
+Fonctions communes de lecture des fichiers "minute" (DON_Minute_UTC_*) et "horaire" (DON_Horaire_UTC_*) du Cobalt,
+utilisées par visu_ddu.py, visu_minute_ddu.py et visu_horaire_ddu.py.
+
+Utilisation :
+    python lecture_cobalt.py : bancs d'essai de la lecture des dates et de la mémoire occupée par MagasinMinute, sur une
+    année synthétique de fichiers "minute"
+
+Il fonctionne en python3.12 et a besoin des librairies :
+    - numpy
+    - pandas
+    - pyarrow (facultatif : moteur de lecture des fichiers csv et cache local au format feather ; à défaut, le moteur C
+      de pandas est utilisé et il n'y a pas de cache)
+"""
+
+# Chargement des librairies
+import calendar
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import datetime
+import hashlib
+import importlib.util
+import io
+import json
+import logging
+import os
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+
+# Moteur de lecture des fichiers csv : pyarrow, ou le moteur C de pandas à défaut
+# Le cache au format feather n'est disponible qu'avec pyarrow
+CACHE_FEATHER = importlib.util.find_spec('pyarrow') is not None
+MOTEUR_CSV = 'pyarrow' if CACHE_FEATHER else 'c'
+
+# Nombre minimal de fichiers mensuels pour une lecture parallèle par défaut : en dessous, le démarrage des processus
+# (spawn sous Windows) coûte plus que la lecture séquentielle
+NB_MOIS_PROCESSUS = 4
+
+# Pool de processus de lecture de la session (nombre de processus, pool), voir pool_processus
+POOL_PROCESSUS = None
+
+# Répertoire local du cache
+REPERTOIRE_CACHE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache')
+
+# Fichiers du mois en cours, qui grossissent tout au long du mois
+FICHIERS_MOIS_EN_COURS = ['DON_Minute_UTC_moisencours.csv', 'DON_Horaire_UTC_moisencours.csv']
+
+# Nombre d'octets du début de fichier utilisés pour détecter le remplacement du fichier du mois en cours
+TAILLE_SIGNATURE = 4096
+
+# Format et colonne des dates des fichiers du Cobalt
+FORMAT_DATE = '%d%m%Y%H%M'
+COLONNE_DATE = 'ddmmyyyyhhmm'
+
+# Schémas des fichiers : colonne du fichier -> (colonne de la dataframe, type)
+# Seules les colonnes utilisées par les figures et l'export csv sont lues, dans l'ordre des colonnes de la dataframe
+SCHEMA_MINUTE = {
+  'T':('T', 'float32'),             # température
+  'DI':('DI', 'float32'),           # durée d'insolation
+  'RG':('RG', 'float32'),           # rayonnement global
+  'FM1':('FXI', 'float32'),         # vitesse maximale sur 10min
+  'FF':('FF', 'float32'),           # vitesse moyenne sur 10min
+  'DD':('DD', 'float32'),           # direction moyenne sur 10min
+  'U':('U', 'float32'),             # humidité relative
+  'PSTA':('P', 'float64'),          # pression au niveau de la station
+  'VVSYNTH':('VIS', 'float32'),     # visibilité
+  }
+SCHEMA_HORAIRE = {
+  'TSYN':('T', 'float32'),          # température
+  'TDSYN':('TD', 'float32'),        # température de rosée
+  'DINSH':('DI', 'float32'),        # durée d'insolation
+  'RGH':('RG', 'float32'),          # rayonnement global
+  'FXI':('FXI', 'float32'),         # vitesse maximale sur 10min
+  'FXY':('FF', 'float32'),          # vitesse moyenne sur 10min
+  'DXY':('DD', 'float32'),          # direction moyenne sur 10min
+  'USYN':('U', 'float32'),          # humidité relative
+  'PSTASYN':('P', 'float64'),       # pression au niveau de la station
+  }
+
+# Codage des colonnes "minute" dans le magasin compact : colonne -> (type, facteur d'échelle, décalage)
+# Les colonnes int16 sont stockées sous la forme round((valeur-décalage)*facteur), les valeurs manquantes sous la forme
+# ENTIER_ABSENT ; les colonnes float32 sont stockées telles quelles (facteur et décalage inutilisés)
+# Les valeurs hors de la plage d'une colonne int16 (valeurs d'erreur des capteurs, comme P = 0 hPa ou T = -999 °C) sont
+# stockées comme valeurs manquantes, et leur nombre est signalé dans le log, plutôt que ramenées à la borne la plus
+# proche, où elles passeraient pour des mesures plausibles
+ENTIER_ABSENT = np.iinfo(np.int16).min
+CODAGE_MINUTE = {
+  'T':(np.int16, 100, 0),           # -327,67 à 327,67 °C, au centième
+  'DI':(np.int16, 100, 0),          # 0 à 327,67, au centième
+  'RG':(np.float32, 1, 0),
+  'FXI':(np.int16, 100, 0),         # 0 à 327,67 m/s, au centième
+  'FF':(np.int16, 100, 0),          # 0 à 327,67 m/s, au centième
+  'DD':(np.int16, 10, 0),           # 0 à 360 °, au dixième
+  'U':(np.int16, 100, 0),           # 0 à 100 %, au centième
+  'P':(np.int16, 100, 1000),        # 672,33 à 1327,67 hPa, au centième
+  'VIS':(np.float32, 1, 0),
+  }
+
+############# DEFINITION DES FONCTIONS #############
+
+def lecture_dates(colonne):
+  # Conversion de la colonne ddmmyyyyhhmm en dates, en une seule passe vectorisée
+  # La colonne peut être lue comme des entiers ou des chaînes : en passant par des entiers, le zéro manquant devant
+  # les jours 1 à 9 n'a plus d'importance, et jour, mois, année, heure et minute sont extraits par divisions entières
+  # Les dates invalides sont remplacées par NaT
+  valeurs = pd.to_numeric(colonne, errors='coerce')
+  valide = valeurs.notnull().to_numpy()
+  entiers = np.where(valide, valeurs.to_numpy(dtype=np.float64, na_value=0), 0).astype(np.int64)
+  dates = pd.to_datetime(pd.DataFrame({
+    'year':(entiers//10**4)%10**4,
+    'month':(entiers//10**8)%10**2,
+    'day':entiers//10**10,
+    'hour':(entiers//10**2)%10**2,
+    'minute':entiers%10**2,
+    }), errors='coerce')
+  dates[~valide] = pd.NaT
+  dates.index = colonne.index
+  return dates
+
+def lecture_fichier(chemin, schema):
+  # Lecture d'un fichier du Cobalt avec le moteur MOTEUR_CSV, restreinte à la date et aux colonnes du schéma
+  # chemin peut aussi être un fichier binaire déjà ouvert (io.BytesIO par exemple)
+  # Renvoie une dataframe avec une colonne DATE au format datetime, puis les colonnes du schéma renommées et typées
+  colonnes = [COLONNE_DATE] + list(schema.keys())
+  types = {colonne:type for colonne, (_, type) in schema.items()}
+  types[COLONNE_DATE] = str
+  try:
+    data = pd.read_csv(chemin, sep=';', decimal=',', engine=MOTEUR_CSV, usecols=colonnes, dtype=types)
+  except ValueError:
+    # Valeurs non numériques dans le fichier : lecture en chaînes de caractères puis conversion forcée
+    if hasattr(chemin, 'seek'):
+      chemin.seek(0)
+    data = pd.read_csv(chemin, sep=';', engine='c', usecols=colonnes, dtype=str)
+    for colonne, (_, type) in schema.items():
+      data[colonne] = pd.to_numeric(data[colonne].str.replace(',', '.'), errors='coerce').astype(type)
+
+  # Formatage des dates, renommage et ordre des colonnes
+  data[COLONNE_DATE] = lecture_dates(data[COLONNE_DATE])
+  noms = {colonne:nom for colonne, (nom, _) in schema.items()}
+  noms[COLONNE_DATE] = 'DATE'
+  return data[colonnes].rename(columns=noms)
+
+def chemins_cache(chemin, repertoire_cache):
+  # Chemins du fichier feather et de ses métadonnées dans le cache, pour le fichier du Cobalt chemin
+  # Le nom contient un hachage du chemin complet, pour distinguer des fichiers de même nom dans des répertoires différents
+  radical = os.path.splitext(os.path.basename(chemin))[0]
+  hachage = hashlib.md5(os.path.abspath(chemin).encode('utf-8')).hexdigest()[:12]
+  chemin_cache = os.path.join(repertoire_cache, radical + '_' + hachage)
+  return chemin_cache + '.feather', chemin_cache + '.json'
+
+def lecture_fichier_cache(chemin, schema, repertoire_cache=REPERTOIRE_CACHE):
+  # Lecture d'un fichier du Cobalt à travers un cache local au format feather, qui contient la dataframe de lecture_fichier
+  # (dates et valeurs numériques déjà converties)
+  # Le cache est indexé par le chemin, la date de modification et la taille du fichier : s'il est valide il est relu,
+  # sinon le fichier est lu avec lecture_fichier et le cache est mis à jour
+  if not CACHE_FEATHER:
+    return lecture_fichier(chemin, schema)
+
+  # Métadonnées attendues
+  etat = os.stat(chemin)
+  metadonnees = {'chemin':os.path.abspath(chemin),
+                 'mtime':etat.st_mtime,
+                 'taille':etat.st_size,
+                 'colonnes':[COLONNE_DATE] + list(schema.keys())}
+  chemin_feather, chemin_json = chemins_cache(chemin, repertoire_cache)
+
+  # Relecture du cache s'il est valide
+  if os.path.isfile(chemin_feather) and os.path.isfile(chemin_json):
+    try:
+      with open(chemin_json, 'r') as f:
+        metadonnees_cache = json.load(f)
+      if metadonnees_cache == metadonnees:
+        return pd.read_feather(chemin_feather)
+    except (OSError, ValueError) as erreur:
+      logging.warning("Cache illisible pour " + chemin + " : " + str(erreur))
+
+  # Lecture du fichier et mise à jour du cache
+  data = lecture_fichier(chemin, schema)
+  ecriture_cache(data, metadonnees, chemin_feather, chemin_json)
+  return data
+
+def ecriture_cache(data, metadonnees, chemin_feather, chemin_json):
+  # Ecriture atomique de la dataframe et de ses métadonnées dans le cache (fichiers temporaires renommés)
+  # Une erreur d'écriture n'est pas bloquante : le cache est simplement ignoré
+  try:
+    os.makedirs(os.path.dirname(chemin_feather), exist_ok=True)
+    data.reset_index(drop=True).to_feather(chemin_feather + '.tmp')
+    os.replace(chemin_feather + '.tmp', chemin_feather)
+    with open(chemin_json + '.tmp', 'w') as f:
+      json.dump(metadonnees, f)
+    os.replace(chemin_json + '.tmp', chemin_json)
+  except OSError as erreur:
+    logging.warning("Impossible d'écrire le cache " + chemin_feather + " : " + str(erreur))
+
+def lecture_fichier_incrementale(chemin, schema, repertoire_cache=REPERTOIRE_CACHE):
+  # Lecture incrémentale d'un fichier du mois en cours, qui grossit par ajout de lignes à la fin
+  # Le cache feather contient les lignes déjà lues, et ses métadonnées la position (en octets) de la fin de la dernière
+  # ligne complète lue, la dernière date lue et une signature du début du fichier : seules les lignes ajoutées depuis
+  # sont lues et ajoutées au cache
+  # Si le fichier a été tronqué ou remplacé (changement de mois), il est relu entièrement
+  if not CACHE_FEATHER:
+    return lecture_fichier(chemin, schema)
+
+  colonnes = [COLONNE_DATE] + list(schema.keys())
+  etat = os.stat(chemin)
+  chemin_feather, chemin_json = chemins_cache(chemin, repertoire_cache)
+
+  # Lecture des métadonnées du cache
+  metadonnees = None
+  if os.path.isfile(chemin_feather) and os.path.isfile(chemin_json):
+    try:
+      with open(chemin_json, 'r') as f:
+        metadonnees = json.load(f)
+    except (OSError, ValueError) as erreur:
+      logging.warning("Cache illisible pour " + chemin + " : " + str(erreur))
+  if metadonnees is not None:
+    if metadonnees.get('chemin') != os.path.abspath(chemin) or metadonnees.get('colonnes') != colonnes or 'position' not in metadonnees:
+      metadonnees = None
+
+  with open(chemin, 'rb') as fichier:
+    # Vérification de la signature du début du fichier
+    entete = fichier.readline()
+    fichier.seek(0)
+    if metadonnees is not None:
+      if etat.st_size < metadonnees['position']:
+        logging.info("Fichier " + chemin + " tronqué : relecture complète")
+        metadonnees = None
+      elif hashlib.md5(fichier.read(min(TAILLE_SIGNATURE, metadonnees['position']))).hexdigest() != metadonnees['signature']:
+        logging.info("Fichier " + chemin + " remplacé : relecture complète")
+        metadonnees = None
+
+    # Cache à jour
+    if metadonnees is not None and metadonnees['mtime'] == etat.st_mtime and metadonnees['taille'] == etat.st_size:
+      return pd.read_feather(chemin_feather)
+
+    # Lecture des octets à partir de la dernière position lue, limitée aux lignes complètes
+    if metadonnees is None:
+      position = 0
+    else:
+      position = metadonnees['position']
+    fichier.seek(position)
+    octets = fichier.read()
+    fin = octets.rfind(b'\n')+1
+    octets = octets[:fin]
+
+    # Signature du début du fichier
+    fichier.seek(0)
+    signature_octets = fichier.read(min(TAILLE_SIGNATURE, position+fin))
+
+  if metadonnees is None:
+    # Lecture complète
+    data = lecture_fichier(io.BytesIO(octets), schema)
+    logging.info("Lecture complète de " + chemin + " : " + str(data.shape[0]) + " lignes")
+  else:
+    # Lecture des lignes ajoutées, précédées de la ligne d'en-tête, et ajout aux lignes du cache
+    data = pd.read_feather(chemin_feather)
+    if len(octets) > 0:
+      ajout = lecture_fichier(io.BytesIO(entete + octets), schema)
+      if metadonnees['derniere_date'] is not None:
+        ajout = ajout[ajout['DATE'] > pd.Timestamp(metadonnees['derniere_date'])]
+      logging.info("Lecture incrémentale de " + chemin + " : " + str(len(octets)) + " octets, " + str(ajout.shape[0]) + " lignes")
+      data = pd.concat([data, ajout], ignore_index=True)
+
+  # Mise à jour du cache
+  dates = data['DATE'].dropna()
+  metadonnees = {'chemin':os.path.abspath(chemin),
+                 'mtime':etat.st_mtime,
+                 'taille':etat.st_size,
+                 'colonnes':colonnes,
+                 'position':position+fin,
+                 'signature':hashlib.md5(signature_octets).hexdigest(),
+                 'derniere_date':dates.max().isoformat() if dates.shape[0] > 0 else None}
+  ecriture_cache(data, metadonnees, chemin_feather, chemin_json)
+  return data
+
+def iteration_mois(date_debut, date_fin):
+  # Générateur des mois (annee, mois) compris entre les dates date_debut et date_fin (incluses)
+  annee, mois = date_debut.year, date_debut.month
+  while (annee, mois) <= (date_fin.year, date_fin.month):
+    yield annee, mois
+    annee, mois = (annee + 1, 1) if mois == 12 else (annee, mois + 1)
+
+def repertoire_annee(emplacement, annee):
+  # Répertoire des fichiers d'une année : si emplacement se termine par un répertoire annuel (".../Minute/2024"), il est
+  # remplacé par celui de l'année demandée ; si emplacement est le répertoire de toutes les années (".../Minute") et
+  # contient celui de l'année demandée, ce dernier est renvoyé ; sinon emplacement est renvoyé tel quel
+  parent, nom = os.path.split(os.path.normpath(emplacement))
+  if len(nom) == 4 and nom.isdigit():
+    return os.path.join(parent, "{:04d}".format(annee))
+  if os.path.isdir(os.path.join(emplacement, "{:04d}".format(annee))):
+    return os.path.join(emplacement, "{:04d}".format(annee))
+  return emplacement
+
+def taches_periode(emplacement, prefixe, date_debut, date_fin, aujourdhui=None):
+  # Liste des fichiers mensuels (chemin, date_debut, date_fin) à lire pour la période UTC date_debut - date_fin, pour
+  # chargement_mois : prefixe vaut "DON_Minute_UTC_" ou "DON_Horaire_UTC_", le fichier du mois en cours est le fichier
+  # <prefixe>moisencours.csv et les fichiers sont cherchés dans le répertoire de leur année (voir repertoire_annee)
+  if aujourdhui is None:
+    aujourdhui = datetime.datetime.today()
+  date_debut, date_fin = pd.Timestamp(date_debut), pd.Timestamp(date_fin)
+  taches = []
+  for annee, mois in iteration_mois(date_debut, date_fin):
+    # Choix du fichier
+    if (annee, mois) == (aujourdhui.year, aujourdhui.month):
+      fichier = prefixe + "moisencours.csv"
+    else:
+      fichier = prefixe + "{:04d}{:02d}".format(annee, mois) + ".txt"
+    chemin = os.path.join(repertoire_annee(emplacement, annee), fichier)
+
+    # Période du mois, restreinte à la période demandée pour le premier et le dernier fichier
+    res = calendar.monthrange(annee, mois)
+    debut = max(pd.Timestamp(annee, mois, 1), date_debut)
+    fin = min(pd.Timestamp(annee, mois, res[1], 23, 59), date_fin)
+    taches.append((chemin, debut, fin))
+  return taches
+
+def lecture_mois(chemin, schema, repertoire_cache=REPERTOIRE_CACHE):
+  # Lecture d'un fichier mensuel du Cobalt : lecture incrémentale pour le fichier du mois en cours, cache sinon
+  if os.path.basename(chemin) in FICHIERS_MOIS_EN_COURS:
+    return lecture_fichier_incrementale(chemin, schema, repertoire_cache)
+  else:
+    return lecture_fichier_cache(chemin, schema, repertoire_cache)
+
+def extraction_periode(data, date_debut, date_fin):
+  # Restriction d'une dataframe lue par lecture_fichier aux lignes comprises entre date_debut et date_fin (incluses)
+  # Les dates invalides sont supprimées et les dates sont triées si besoin, puis les bornes sont cherchées par dichotomie
+  # (searchsorted) : les minutes manquantes sont tolérées, les lignes disponibles les plus proches à l'intérieur de la période
+  # sont renvoyées, et la dataframe est vide si aucune date du fichier n'est dans la période
+  data = data[data['DATE'].notnull()]
+  if not data['DATE'].is_monotonic_increasing:
+    data = data.sort_values('DATE', kind='stable')
+  dates = data['DATE'].to_numpy()
+  index_debut = np.searchsorted(dates, pd.Timestamp(date_debut).to_datetime64(), side='left')
+  index_fin = np.searchsorted(dates, pd.Timestamp(date_fin).to_datetime64(), side='right')
+  data = data.iloc[index_debut:index_fin]
+
+  # Index des dates
+  data.index = pd.DatetimeIndex(data['DATE'], name='date')
+  return data
+
+def extraction_mois(chemin, date_debut, date_fin, schema, repertoire_cache=REPERTOIRE_CACHE):
+  # Lecture d'un fichier mensuel et restriction des données entre date_debut et date_fin
+  # Fonction exécutée par les processus de chargement_mois : elle ne doit pas faire appel à l'interface graphique
+  data = extraction_periode(lecture_mois(chemin, schema, repertoire_cache), date_debut, date_fin)
+  if data.empty:
+    logging.warning("Pas de donnée dans " + chemin + " entre " + str(date_debut) + " et " + str(date_fin))
+  return data
+
+def pool_processus(nb_processus):
+  # Pool de processus de lecture, créé au premier chargement parallèle puis réutilisé par les chargements suivants de la
+  # session : il n'est recréé que si le nombre de processus demandé change ou si un processus s'est arrêté brutalement
+  global POOL_PROCESSUS
+  if POOL_PROCESSUS is not None and POOL_PROCESSUS[0] != nb_processus:
+    fermeture_pool_processus()
+  if POOL_PROCESSUS is None:
+    POOL_PROCESSUS = (nb_processus, ProcessPoolExecutor(max_workers=nb_processus))
+  return POOL_PROCESSUS[1]
+
+def fermeture_pool_processus():
+  # Arrêt du pool de processus de lecture, les lectures en attente sont annulées
+  global POOL_PROCESSUS
+  if POOL_PROCESSUS is not None:
+    POOL_PROCESSUS[1].shutdown(wait=False, cancel_futures=True)
+    POOL_PROCESSUS = None
+
+def chargement_mois(taches, schema, progression=None, nb_processus=None, repertoire_cache=REPERTOIRE_CACHE):
+  # Lecture des fichiers mensuels d'une période : taches est la liste ordonnée des (chemin, date_debut, date_fin) à lire
+  # Les fichiers sont lus en parallèle par le pool de nb_processus processus de la session (par défaut, un par coeur, et
+  # seulement à partir de NB_MOIS_PROCESSUS fichiers), ou séquentiellement avec préchargement du mois suivant si
+  # nb_processus vaut 1 ; les dataframes sont récupérées dans l'ordre des mois et concaténées en une seule fois
+  # progression(i, n) est appelée avant la lecture puis après chaque mois : si elle renvoie False, les lectures en attente
+  # sont annulées et None est renvoyé
+  n = len(taches)
+  if progression is not None and not progression(0, n):
+    return None
+  if nb_processus is None:
+    nb_processus = (os.cpu_count() or 1) if n >= NB_MOIS_PROCESSUS else 1
+
+  if nb_processus <= 1:
+    # Lecture séquentielle avec préchargement : le mois suivant est lu par un second thread (accès réseau et lecture
+    # pyarrow hors GIL) pendant que le mois courant est analysé
+    pool = ThreadPoolExecutor(max_workers=2)
+    en_cours = 2
+  else:
+    # Lecture parallèle par le pool de processus de la session
+    pool = pool_processus(nb_processus)
+    en_cours = n
+
+  # Au plus en_cours lectures lancées à la fois, résultats récupérés dans l'ordre des mois
+  morceaux = []
+  futurs = {}
+  try:
+    for i in range(min(en_cours, n)):
+      futurs[i] = pool.submit(extraction_mois, *taches[i], schema=schema, repertoire_cache=repertoire_cache)
+    for i in range(n):
+      morceaux.append(futurs.pop(i).result())
+      if i + en_cours < n:
+        futurs[i+en_cours] = pool.submit(extraction_mois, *taches[i+en_cours], schema=schema, repertoire_cache=repertoire_cache)
+      logging.info("Nombre de ligne pour " + taches[i][0] + " : " + str(morceaux[-1].shape[0]))
+      if progression is not None and not progression(i+1, n):
+        return None
+  except BrokenProcessPool:
+    fermeture_pool_processus()
+    raise
+  finally:
+    # Lectures en attente annulées ; le pool de processus est conservé pour les chargements suivants
+    for futur in futurs.values():
+      futur.cancel()
+    if nb_processus <= 1:
+      pool.shutdown(wait=False, cancel_futures=True)
+
+  # Concaténation unique
+  if len(morceaux) == 0:
+    return None
+  return pd.concat(morceaux)
+
+def codage_colonne(valeurs, type, facteur, decalage, nom=''):
+  # Codage d'une colonne selon CODAGE_MINUTE (voir MagasinMinute) ; les valeurs hors de la plage du codage sont codées
+  # comme manquantes et signalées dans le log, nom étant le nom de la colonne
+  valeurs = np.asarray(valeurs, dtype=np.float64)
+  if type != np.int16:
+    return valeurs.astype(type)
+  limite = np.iinfo(np.int16).max
+  code = np.rint((valeurs-decalage)*facteur)
+  hors_plage = np.abs(code) > limite
+  nb_hors_plage = np.count_nonzero(hors_plage)
+  if nb_hors_plage > 0:
+    logging.warning(str(nb_hors_plage) + " valeurs de la colonne " + nom + " hors de la plage du codage ({:g} à {:g}), codées comme manquantes".format(decalage-limite/facteur, decalage+limite/facteur))
+  code[hors_plage | np.isnan(code)] = ENTIER_ABSENT
+  return code.astype(np.int16)
+
+class MagasinMinute:
+  # Stockage compact des données "minute" d'une période : axe des temps en minutes depuis le 01/01/1970 (int32, suffisant
+  # jusqu'en 6053), colonnes codées selon CODAGE_MINUTE, sans colonne DATE ni index de dates en double
+  # Les colonnes sont lues comme celles de la dataframe construite par chargement_mois : magasin['T'] renvoie une série
+  # décodée (float32) indexée par les dates, magasin['DATE'] la série des dates, et magasin[['T', 'U']] une dataframe
+  def __init__(self, data, codage=CODAGE_MINUTE):
+    self.codage = {nom:codage[nom] for nom in codage if nom in data.columns}
+    self.minutes = data['DATE'].to_numpy().astype('datetime64[m]').astype(np.int64).astype(np.int32)
+    self.colonnes = {nom:codage_colonne(data[nom].to_numpy(), *self.codage[nom], nom=nom) for nom in self.codage}
+    self.statistiques = {}
+    self.axes_locaux = {}
+
+  @classmethod
+  def depuis_colonnes(cls, minutes, colonnes, codage=CODAGE_MINUTE):
+    # Construction à partir d'un axe des temps et de colonnes déjà codées, sans copie (par exemple des vues sur l'archive
+    # projetée en mémoire par archive_minute.py)
+    magasin = cls.__new__(cls)
+    magasin.codage = {nom:codage[nom] for nom in codage if nom in colonnes}
+    magasin.minutes = minutes
+    magasin.colonnes = {nom:colonnes[nom] for nom in magasin.codage}
+    magasin.statistiques = {}
+    magasin.axes_locaux = {}
+    return magasin
+
+  def __len__(self):
+    return self.minutes.shape[0]
+
+  def __contains__(self, nom):
+    return nom == 'DATE' or nom in self.colonnes
+
+  @property
+  def shape(self):
+    return (len(self), len(self.colonnes)+1)
+
+  @property
+  def empty(self):
+    return len(self) == 0
+
+  @property
+  def nbytes(self):
+    # Mémoire occupée par l'axe des temps et les colonnes
+    return self.minutes.nbytes + sum([c.nbytes for c in self.colonnes.values()])
+
+  def dates(self):
+    # Index des dates, construit à la demande à partir de l'axe des temps
+    return pd.DatetimeIndex(self.minutes.astype(np.int64).astype('datetime64[m]').astype('datetime64[ns]'), name='date')
+
+  def dates_locales(self, heures):
+    # Axe des temps décalé de heures (fuseau horaire), en tableau numpy datetime64[ns] en lecture seule
+    # Calculé au premier appel pour chaque décalage puis conservé avec le magasin : changer de fuseau ou retracer une
+    # figure ne le recalcule pas, et un nouveau chargement crée un nouveau magasin
+    if heures not in self.axes_locaux:
+      dates = (self.minutes.astype(np.int64) + 60*heures).astype('datetime64[m]').astype('datetime64[ns]')
+      dates.flags.writeable = False
+      self.axes_locaux[heures] = dates
+    return self.axes_locaux[heures]
+
+  def valeurs(self, nom):
+    # Tableau numpy décodé (float32) d'une colonne, les valeurs manquantes valant NaN
+    type, facteur, decalage = self.codage[nom]
+    code = self.colonnes[nom]
+    if type != np.int16:
+      return code
+    valeurs = (code.astype(np.float32)+np.float32(decalage*facteur))/np.float32(facteur)
+    valeurs[code == ENTIER_ABSENT] = np.nan
+    return valeurs
+
+  def __getitem__(self, nom):
+    index = self.dates()
+    if isinstance(nom, list):
+      return pd.DataFrame({n:self.valeurs(n) for n in nom}, index=index)
+    if nom == 'DATE':
+      return pd.Series(index.to_numpy(), index=index, name='DATE')
+    return pd.Series(self.valeurs(nom), index=index, name=nom)
+
+  def extremes(self, nom):
+    # (minimum, maximum) d'une colonne, les valeurs manquantes étant ignorées (NaN si elles manquent toutes), ou
+    # première et dernière dates (pd.Timestamp) pour 'DATE'
+    # Calculés par des réductions numpy sur les valeurs codées au premier appel, puis conservés : les données d'un
+    # magasin ne changent pas après le chargement
+    if nom not in self.statistiques:
+      if nom == 'DATE' and len(self) == 0:
+        extremes = (pd.NaT, pd.NaT)
+      elif nom == 'DATE':
+        extremes = (pd.Timestamp(np.datetime64(int(self.minutes[0]), 'm')), pd.Timestamp(np.datetime64(int(self.minutes[-1]), 'm')))
+      else:
+        type, facteur, decalage = self.codage[nom]
+        code = self.colonnes[nom]
+        code = code[code != ENTIER_ABSENT] if type == np.int16 else code[~np.isnan(code)]
+        if code.shape[0] == 0:
+          extremes = (np.nan, np.nan)
+        elif type == np.int16:
+          extremes = tuple([(float(c)+decalage*facteur)/facteur for c in (code.min(), code.max())])
+        else:
+          extremes = (float(code.min()), float(code.max()))
+      self.statistiques[nom] = extremes
+    return self.statistiques[nom]
+
+def fichier_minute_synthetique(chemin, annee, mois):
+  # Ecriture d'un fichier "minute" synthétique d'un mois, au format des fichiers DON_Minute_UTC_YYYYMM.txt
+  nb_jours = calendar.monthrange(annee, mois)[1]
+  dates = pd.date_range(datetime.datetime(annee, mois, 1), periods=nb_jours*24*60, freq='min')
+  n = len(dates)
+  generateur = np.random.default_rng(annee*100+mois)
+  data = pd.DataFrame({
+    'POSTE':np.full(n, 99999),
+    'ddmmyyyyhhmm':dates.strftime(FORMAT_DATE).astype(np.int64), # le zéro devant les jours 1 à 9 disparait, comme dans les fichiers réels
+    'PSTA':985+10*generateur.standard_normal(n),
+    'T':-10+5*generateur.standard_normal(n),
+    'U':generateur.uniform(30, 100, n),
+    'DD':generateur.uniform(0, 360, n),
+    'FF':generateur.uniform(0, 30, n),
+    'FM1':generateur.uniform(0, 45, n),
+    'DI':generateur.integers(0, 2, n),
+    'RG':generateur.uniform(0, 3000, n),
+    'VVSYNTH':generateur.uniform(0, 50000, n),
+    'TD':-15+5*generateur.standard_normal(n),
+    'INS':generateur.integers(0, 2, n),
+    'GLO':generateur.uniform(0, 3000, n),
+    })
+  data.round(1).to_csv(chemin, sep=';', decimal=',', index=False)
+
+def banc_essai_dates(annee=2023):
+  # Comparaison de la correction des dates par boucle python (ancienne version) et par lecture_dates, sur une année de fichiers "minute"
+  def correction_dates_boucle(data_minute):
+    # Ancienne version de recuperation_donnees_mois
+    TMP = []
+    for x in range (0,len(data_minute['ddmmyyyyhhmm'])):
+      if len(str(data_minute['ddmmyyyyhhmm'][x])) == 11:
+        TMP.append('0'+str(data_minute['ddmmyyyyhhmm'][x]))
+      else:
+        TMP.append(str(data_minute['ddmmyyyyhhmm'][x]))
+    data_minute['ddmmyyyyhhmm'] = TMP
+    return pd.to_datetime(data_minute['ddmmyyyyhhmm'],format=FORMAT_DATE,errors='coerce')
+
+  with tempfile.TemporaryDirectory() as repertoire:
+    # Création des fichiers synthétiques
+    chemins = []
+    for mois in range(1, 13):
+      chemin = os.path.join(repertoire, "DON_Minute_UTC_" + str(annee) + "{:02d}".format(mois) + ".txt")
+      fichier_minute_synthetique(chemin, annee, mois)
+      chemins.append(chemin)
+
+    # Lecture des fichiers une seule fois, pour ne mesurer que le traitement des dates
+    data = [pd.read_csv(chemin, sep=';', decimal=",") for chemin in chemins]
+    nb_lignes = sum([d.shape[0] for d in data])
+
+    # Ancienne version
+    debut = time.perf_counter()
+    dates_boucle = [correction_dates_boucle(d.copy()) for d in data]
+    duree_boucle = time.perf_counter()-debut
+
+    # Version vectorisée
+    debut = time.perf_counter()
+    dates_vecteur = [lecture_dates(d['ddmmyyyyhhmm']) for d in data]
+    duree_vecteur = time.perf_counter()-debut
+
+  # Vérification de l'identité des résultats
+  for d1, d2 in zip(dates_boucle, dates_vecteur):
+    if not d1.equals(d2):
+      raise RuntimeError("Les dates obtenues par les deux méthodes diffèrent")
+
+  print("Nombre de lignes : " + str(nb_lignes))
+  print("Boucle python : {:.3f} s".format(duree_boucle))
+  print("Vectorisé :     {:.3f} s".format(duree_vecteur))
+  print("Accélération :  {:.1f}x".format(duree_boucle/duree_vecteur))
+
+def banc_essai_memoire(annee=2023):
+  # Comparaison de la mémoire occupée par une année de données "minute" : dataframe float64 avec colonne DATE et index
+  # de dates (ancienne version), dataframe de chargement_mois, et MagasinMinute
+  with tempfile.TemporaryDirectory() as repertoire:
+    taches = []
+    for mois in range(1, 13):
+      chemin = os.path.join(repertoire, "DON_Minute_UTC_" + str(annee) + "{:02d}".format(mois) + ".txt")
+      fichier_minute_synthetique(chemin, annee, mois)
+      res = calendar.monthrange(annee, mois)
+      taches.append((chemin, datetime.datetime(annee, mois, 1), datetime.datetime(annee, mois, res[1], 23, 59)))
+    data = chargement_mois(taches, SCHEMA_MINUTE, repertoire_cache=os.path.join(repertoire, 'cache'))
+  magasin = MagasinMinute(data)
+
+  # Vérification du décodage, à la précision des fichiers (dixième)
+  for nom in magasin.colonnes:
+    if not np.allclose(magasin[nom].to_numpy(), data[nom].to_numpy(), atol=0.01, equal_nan=True):
+      raise RuntimeError("Décodage incorrect de la colonne " + nom)
+
+  memoire_float64 = data.astype({nom:'float64' for nom in magasin.colonnes}).memory_usage(index=True, deep=True).sum()
+  memoire_dataframe = data.memory_usage(index=True, deep=True).sum()
+  print("Nombre de lignes : " + str(len(magasin)))
+  print("Dataframe float64 : {:.1f} Mo".format(memoire_float64/1e6))
+  print("Dataframe typée :   {:.1f} Mo".format(memoire_dataframe/1e6))
+  print("MagasinMinute :     {:.1f} Mo ({:.1f}x moins que float64)".format(magasin.nbytes/1e6, memoire_float64/magasin.nbytes))
+
+#############  PROGRAMME PRINCIPAL #############
+
+if (__name__ == "__main__"):
+  banc_essai_dates()
+  banc_essai_memoire()
@@ -0,0 +1,415 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Octobre 2026
+@author : Benjamin Ménétrier
+
+Fonctions communes de préparation des séries tracées par les figures de visu_ddu.py, visu_minute_ddu.py et
+visu_horaire_ddu.py, figures persistantes réutilisées d'un tracé à l'autre et file d'attente des exports png.
+
+Utilisation :
+    python outils_figures.py : bancs d'essai du tracé d'une année de données "minute", avec et sans décimation, et de
+    son export png, avec et sans bbox_inches="tight"
+
+Il fonctionne en python3.12 et a besoin des librairies :
+    - logging
+    - matplotlib
+    - numpy
+    - pandas
+    - PIL (Pillow, installé avec matplotlib)
+    - queue
+    - threading
+"""
+
+# Chargement des librairies
+import logging
+import os
+import queue
+import threading
+import time
+import types
+import weakref
+import matplotlib.dates as mdates
+from matplotlib.figure import Figure
+from matplotlib.offsetbox import AnnotationBbox, OffsetImage
+import numpy as np
+import pandas as pd
+from PIL import Image
+
+# Conversions d'unités des axes : unité -> (conversion depuis l'unité des séries tracées, conversion inverse)
+# Les séries restent tracées en m/s, hPa et °C ; l'unité demandée n'est qu'une graduation de l'axe des ordonnées
+CONVERSIONS = {
+  'm/s':(lambda v: v, lambda v: v),
+  'km/h':(lambda v: v*3.6, lambda v: v/3.6),
+  'kt':(lambda v: v*3.6/1.8, lambda v: v*1.8/3.6),
+  'hPa':(lambda v: v, lambda v: v),
+  'mmHg':(lambda v: v*0.75, lambda v: v/0.75),
+  '°C':(lambda v: v, lambda v: v),
+  '°F':(lambda v: v*1.8+32, lambda v: (v-32)/1.8),
+  'K':(lambda v: v+273.15, lambda v: v-273.15),
+  }
+
+# Niveaux de détail des courbes (voir NiveauxDetail) : taille des paquets agrégés, en points de la série (pour des
+# données minute : 10 minutes, une heure, un jour), la série complète formant le niveau le plus fin
+PAS_NIVEAUX = (10, 60, 1440)
+
+# Logos redimensionnés, par logo, taille en pixels et transparence (voir logo_echelle)
+LOGOS = {}
+
+############# DEFINITION DES FONCTIONS #############
+
+def largeur_pixels(fig):
+  # Largeur de la figure en pixels, qui majore le nombre de colonnes de pixels d'un axe
+  return int(np.ceil(fig.get_figwidth()*fig.dpi))
+
+def decimation_min_max(x, y, nb_colonnes):
+  # Décimation d'une série (x croissant) pour le tracé : les points sont regroupés en nb_colonnes paquets consécutifs
+  # de même taille (une colonne de pixels pour des données régulières) et seuls le minimum et le maximum de chaque
+  # paquet sont conservés, dans l'ordre chronologique
+  # L'enveloppe tracée est identique à celle de la série complète : les extrêmes (rafales, dépassements de seuil) sont
+  # exacts ; un paquet sans aucune valeur donne une valeur manquante, qui interrompt la courbe comme dans la série
+  # Renvoie les tableaux numpy (x, y), inchangés si la série compte moins de 2*nb_colonnes points
+  x = np.asarray(x)
+  y = np.asarray(y, dtype=np.float64)
+  n = y.shape[0]
+  if n <= 2*nb_colonnes:
+    return x, y
+
+  # Paquets de taille k, le dernier étant complété par des valeurs manquantes
+  k = int(np.ceil(n/nb_colonnes))
+  nb_paquets = int(np.ceil(n/k))
+  paquets = np.full(nb_paquets*k, np.nan)
+  paquets[:n] = y
+  paquets = paquets.reshape(nb_paquets, k)
+
+  # Position du minimum et du maximum de chaque paquet, les valeurs manquantes étant ignorées
+  manquant = np.isnan(paquets)
+  index_min = np.where(manquant, np.inf, paquets).argmin(axis=1)
+  index_max = np.where(manquant, -np.inf, paquets).argmax(axis=1)
+  vide = manquant.all(axis=1)
+
+  # Points conservés, dans l'ordre chronologique à l'intérieur de chaque paquet, plus le premier et le dernier point de
+  # la série pour conserver l'étendue de l'axe des abscisses
+  debut = np.arange(nb_paquets)*k
+  premier = debut + np.minimum(index_min, index_max)
+  second = debut + np.maximum(index_min, index_max)
+  index = np.concatenate(([0], np.column_stack((premier, second)).ravel(), [n-1]))
+  y_decime = y[index]
+  y_decime[1:-1][np.repeat(vide, 2)] = np.nan
+  return x[index], y_decime
+
+def extremes_valeurs(valeurs):
+  # (minimum, maximum) d'une série ou d'un tableau, par des réductions numpy, les valeurs manquantes étant ignorées
+  # (NaN ou NaT si elles manquent toutes) ; les dates sont renvoyées en pd.Timestamp
+  valeurs = np.asarray(valeurs)
+  if valeurs.dtype.kind == 'M':
+    valeurs = valeurs[~np.isnat(valeurs)]
+    if valeurs.shape[0] == 0:
+      return pd.NaT, pd.NaT
+    return pd.Timestamp(valeurs.min()), pd.Timestamp(valeurs.max())
+  valeurs = valeurs[~np.isnan(valeurs)]
+  if valeurs.shape[0] == 0:
+    return np.nan, np.nan
+  return float(valeurs.min()), float(valeurs.max())
+
+def extremes(data, nom):
+  # (minimum, maximum) de la colonne nom des données, ou première et dernière dates pour 'DATE' : statistiques d'un
+  # MagasinMinute, calculées une seule fois par chargement, ou réductions numpy sur une dataframe
+  if hasattr(data, 'extremes'):
+    return data.extremes(nom)
+  return extremes_valeurs(data[nom])
+
+def dates_locales(data, heures):
+  # Axe des temps des données dans le fuseau décalé de heures : axe conservé par un MagasinMinute pour chaque fuseau,
+  # ou calculé à chaque appel pour une dataframe
+  if hasattr(data, 'dates_locales'):
+    return data.dates_locales(heures)
+  return data['DATE'].to_numpy() + np.timedelta64(heures, 'h')
+
+class NiveauxDetail:
+  # Agrégats multi-résolution d'une série (x croissant) pour le tracé interactif : la série complète et, pour chaque pas
+  # de PAS_NIVEAUX, l'enveloppe (minimum, maximum) de paquets consécutifs de pas points, calculées une seule fois par
+  # chargement
+  # fenetre choisit le niveau adapté à l'intervalle visible : la vue complète d'une année de minutes ne parcourt que
+  # l'enveloppe horaire, et les minutes ne sont reprises qu'après un zoom sur quelques jours
+  def __init__(self, x, y, pas=PAS_NIVEAUX):
+    x = np.asarray(x)
+    y = np.asarray(y, dtype=np.float64)
+    t = mdates.date2num(x) if x.dtype.kind == 'M' else x.astype(np.float64)
+    n = y.shape[0]
+    self.niveaux = [(x, t, y)]
+    for k in pas:
+      if n < 2*k:
+        break
+      # Paquets de taille k, le dernier étant complété par des valeurs manquantes ; fmin et fmax ignorent les valeurs
+      # manquantes (un paquet vide donne une valeur manquante, qui interrompt la courbe)
+      nb_paquets = int(np.ceil(n/k))
+      paquets = np.full(nb_paquets*k, np.nan)
+      paquets[:n] = y
+      paquets = paquets.reshape(nb_paquets, k)
+      debut = np.repeat(np.arange(nb_paquets)*k, 2)
+      enveloppe = np.column_stack((np.fmin.reduce(paquets, axis=1), np.fmax.reduce(paquets, axis=1))).ravel()
+      self.niveaux.append((x[debut], t[debut], enveloppe))
+
+  def fenetre(self, tmin, tmax, nb_colonnes):
+    # Série à tracer entre tmin et tmax (dates matplotlib) : niveau le plus grossier comptant encore au moins 2 points
+    # par colonne de pixels dans la fenêtre (le plus fin à défaut), décimé par decimation_min_max
+    # Un point de part et d'autre de la fenêtre est conservé pour que la courbe atteigne les bords de l'axe
+    for x, t, y in reversed(self.niveaux):
+      debut = max(int(np.searchsorted(t, tmin, 'left')) - 1, 0)
+      fin = min(int(np.searchsorted(t, tmax, 'right')) + 1, t.shape[0])
+      if fin - debut >= 2*nb_colonnes:
+        break
+    return decimation_min_max(x[debut:fin], y[debut:fin], nb_colonnes)
+
+class FigurePersistante:
+  # Figure d'une variable, créée une seule fois puis mise à jour à chaque tracé : les courbes, lignes horizontales et
+  # textes sont créés au premier appel puis modifiés en place (set_data, set_ydata, set_text), et le logo n'est ajouté
+  # qu'une fois
+  # La figure est une matplotlib.figure.Figure, non enregistrée auprès de pyplot : elle est libérée avec la dernière
+  # référence, sans plt.close
+  def __init__(self, figsize=(16, 9)):
+    self.fig = Figure(figsize=figsize)
+    self.ax = self.fig.subplots(1, 1)
+    self.ax2 = None
+    self.artistes = {}
+    self.logo = None
+    self.axe_secondaire = None
+    self.donnees = None
+    self.statistiques = {}
+    self.details = {}
+    self.rappel_zoom = None
+
+  def nouvelles_donnees(self, data, *parametres):
+    # Indique si data (ou les paramètres du tracé, comme le fuseau) diffèrent de ceux du tracé précédent, et les
+    # enregistre : les courbes ne sont alors à recalculer que pour de nouvelles données
+    # data est référencé faiblement, pour ne pas retenir en mémoire les données d'un tracé précédent
+    if self.donnees is not None and self.donnees[0]() is data and self.donnees[1] == parametres:
+      return False
+    self.donnees = (weakref.ref(data), parametres)
+    self.statistiques = {}
+    return True
+
+  def axe_jumeau(self):
+    # Axe des ordonnées secondaire (twinx), créé au premier appel
+    if self.ax2 is None:
+      self.ax2 = self.ax.twinx()
+    return self.ax2
+
+  def ligne(self, ax, cle, x, y, **style):
+    # Courbe cle : création, ou mise à jour des données et recalcul des limites de l'axe
+    if cle not in self.artistes:
+      self.artistes[cle], = ax.plot(x, y, **style)
+    else:
+      self.artistes[cle].set_data(x, y)
+      ax.relim()
+      ax.autoscale_view()
+    return self.artistes[cle]
+
+  def ligne_detaillee(self, ax, cle, x, y, **style):
+    # Courbe cle tracée par niveaux de détail (NiveauxDetail) : la vue complète est tracée à la création ou au
+    # changement de données, puis chaque zoom ou déplacement de l'axe des abscisses (barre d'outils) remplace la courbe
+    # par le niveau adapté à la fenêtre visible, sans recalcul des limites
+    self.details[cle] = NiveauxDetail(x, y)
+    ligne = self.ligne(ax, cle, *self.details[cle].fenetre(-np.inf, np.inf, largeur_pixels(self.fig)), **style)
+    if self.rappel_zoom is None:
+      # Les axes jumeaux partagent l'axe des abscisses : un seul rappel, sur l'axe principal, suffit
+      self.rappel_zoom = self.ax.callbacks.connect('xlim_changed', self.zoom)
+    return ligne
+
+  def zoom(self, ax):
+    # Rappel de changement des limites des abscisses : courbes détaillées recalculées pour la fenêtre visible
+    tmin, tmax = ax.get_xlim()
+    nb_colonnes = largeur_pixels(self.fig)
+    for cle, niveaux in self.details.items():
+      if cle in self.artistes:
+        self.artistes[cle].set_data(*niveaux.fenetre(tmin, tmax, nb_colonnes))
+
+  def ligne_horizontale(self, ax, cle, y, **style):
+    # Ligne horizontale cle (seuil, zéro) : création ou déplacement
+    if cle not in self.artistes:
+      self.artistes[cle] = ax.axhline(y, **style)
+    else:
+      self.artistes[cle].set_ydata([y, y])
+    return self.artistes[cle]
+
+  def texte(self, ax, cle, s, **style):
+    # Texte cle (titre, sous-titre) : création ou modification
+    if cle not in self.artistes:
+      self.artistes[cle] = ax.text(s=s, **style)
+    else:
+      self.artistes[cle].set_text(s)
+    return self.artistes[cle]
+
+  def axe_unite(self, ax, directe, inverse, label):
+    # Graduation de l'axe des ordonnées de ax dans une autre unité que celle des courbes : un axe secondaire à gauche
+    # (secondary_yaxis), créé au premier appel, porte les graduations converties par directe et le label, celles de ax
+    # étant masquées ; changer d'unité ne modifie que les fonctions de conversion de cet axe
+    if self.axe_secondaire is None:
+      self.axe_secondaire = ax.secondary_yaxis('left', functions=(directe, inverse))
+      ax.tick_params(axis='y', left=False, labelleft=False)
+    else:
+      self.axe_secondaire.set_functions((directe, inverse))
+    self.axe_secondaire.set_ylabel(label)
+    return self.axe_secondaire
+
+  def ajout_logo(self, logo, l=4, alpha=0.5):
+    # Logo en haut à droite, ajouté une seule fois, centré dans un cadre de 0.984*l x 0.157*l pouces accolé au coin de
+    # l'axe
+    # L'image est redimensionnée à sa taille en pixels sur la figure par logo_echelle et affichée pixel pour pixel
+    # (OffsetImage), sans rééchantillonnage de l'image complète à chaque tracé
+    if self.logo is None:
+      largeur, hauteur = 0.984*l, 0.157*l
+      if largeur/hauteur > logo.shape[1]/logo.shape[0]:
+        largeur_logo, hauteur_logo = hauteur*logo.shape[1]/logo.shape[0], hauteur
+      else:
+        largeur_logo, hauteur_logo = largeur, largeur*logo.shape[0]/logo.shape[1]
+      dpi = self.fig.dpi
+      image = logo_echelle(logo, max(1, round(largeur_logo*dpi)), max(1, round(hauteur_logo*dpi)), alpha)
+      self.logo = AnnotationBbox(OffsetImage(image, zoom=72/dpi, interpolation='nearest'), (1, 1), xycoords=self.ax,
+                                 xybox=(-largeur*72/2, -hauteur*72/2), boxcoords='offset points', frameon=False, pad=0,
+                                 zorder=10)
+      self.fig.add_artist(self.logo)
+
+def logo_echelle(logo, largeur, hauteur, alpha=0.5):
+  # Logo (tableau RGBA de plt.imread) redimensionné à largeur x hauteur pixels avec le filtre de Lanczos de PIL, sa
+  # transparence appliquée au canal alpha, en tableau RGBA uint8
+  # Calculé une fois par logo, taille et transparence, puis conservé dans LOGOS pour toutes les figures
+  cle = (id(logo), largeur, hauteur, alpha)
+  if cle not in LOGOS:
+    image = np.asarray(logo)
+    if image.dtype != np.uint8:
+      image = np.rint(np.clip(image, 0, 1)*255).astype(np.uint8)
+    image = np.array(Image.fromarray(image).convert('RGBA').resize((largeur, hauteur), Image.LANCZOS))
+    image[..., 3] = np.rint(image[..., 3]*alpha).astype(np.uint8)
+    LOGOS[cle] = (logo, image)
+  return LOGOS[cle][1]
+
+def figure_persistante(figures, cle, figsize=(16, 9)):
+  # Figure persistante cle du dictionnaire figures, créée au premier appel
+  if cle not in figures:
+    figures[cle] = FigurePersistante(figsize)
+  return figures[cle]
+
+def enregistrement_png(fig, chemin):
+  # Export png d'une figure avec le moteur Agg, en un seul tracé : la mise en page de la figure est fixe, sans le second
+  # tracé de bbox_inches="tight"
+  # Le fichier est écrit sous un nom temporaire puis renommé : un png incomplet n'est jamais visible sous son nom
+  chemin_tmp = chemin + '.tmp'
+  fig.savefig(chemin_tmp, format='png')
+  os.replace(chemin_tmp, chemin)
+
+def limites_axes(fig):
+  # Limites (xlim, ylim) des axes d'une figure, dans l'ordre de fig.axes, par exemple celles de la figure affichée
+  # après un zoom ou un déplacement avec la barre d'outils
+  return [(ax.get_xlim(), ax.get_ylim()) for ax in fig.axes]
+
+def application_limites(fig, limites):
+  # Application à une figure des limites relevées par limites_axes sur une figure tracée par la même fonction ;
+  # le changement de xlim met à jour les courbes détaillées (FigurePersistante.ligne_detaillee)
+  if len(limites) != len(fig.axes):
+    logging.warning("Limites des axes non appliquées : la figure n'a pas les mêmes axes")
+    return
+  for ax, (xlim, ylim) in zip(fig.axes, limites):
+    ax.set_xlim(xlim)
+    ax.set_ylim(ylim)
+
+def instantane(fonction):
+  # Copie d'une fonction de figure liée à une copie des variables globales de son module (fuseau, decalage, dates des
+  # noms de fichiers, emplacement_figure, logo...) : la copie trace toujours avec les valeurs du moment de l'appel à
+  # instantane, même si l'interface les modifie ensuite
+  copie = types.FunctionType(fonction.__code__, dict(fonction.__globals__), fonction.__name__, fonction.__defaults__, fonction.__closure__)
+  copie.__kwdefaults__ = fonction.__kwdefaults__
+  return copie
+
+class FileExport:
+  # File d'attente des exports png, traités dans l'ordre par un thread de travail : chaque export trace la figure
+  # (fonction de figure renvoyant fig, ax, chemin) puis l'enregistre avec enregistrement_png, sans bloquer la boucle
+  # des événements de l'interface
+  # Chaque export est tracé dans une figure temporaire propre au thread (une même figure ne doit pas être tracée depuis
+  # deux threads), libérée après l'enregistrement : les figures affichées ne sont pas dupliquées en mémoire
+  # Les variables globales lues par la fonction de figure sont figées par instantane au moment de la demande : le
+  # thread ne lit pas l'état de l'interface, modifié entre-temps par la boucle des événements
+  # rappel(nom, chemin, erreur) est appelé dans le thread après chaque export, erreur valant None en cas de succès
+  def __init__(self, rappel=None):
+    self.file = queue.Queue()
+    self.rappel = rappel
+    self.thread = threading.Thread(target=self.traitement, daemon=True)
+    self.thread.start()
+
+  def ajout(self, nom, fonction, *args, limites=None, **kwargs):
+    # Ajout de l'export de la figure nom, tracée par fonction(*args, **kwargs)
+    # limites (voir limites_axes) est relevé sur la figure affichée au moment de la demande : la figure exportée garde
+    # alors le zoom affiché ; sans limites, elle couvre toute la période
+    # Appelée depuis la boucle des événements, qui fige ici les paramètres globaux de la figure (voir instantane)
+    self.file.put((nom, instantane(fonction), args, kwargs, limites))
+
+  def traitement(self):
+    # Boucle du thread de travail
+    while True:
+      nom, fonction, args, kwargs, limites = self.file.get()
+      chemin, erreur = None, None
+      try:
+        fig, ax, chemin = fonction(*args, figures={}, **kwargs)
+        if limites is not None:
+          application_limites(fig, limites)
+        enregistrement_png(fig, chemin)
+        logging.info("Figure " + chemin + " exportée")
+      except Exception as e:
+        logging.exception("Echec de l'export de la figure " + nom)
+        erreur = str(e)
+      if self.rappel is not None:
+        self.rappel(nom, chemin, erreur)
+      self.file.task_done()
+
+  def attente(self):
+    # Attente de la fin des exports en cours
+    self.file.join()
+
+def banc_essai_export(nb_points=525600):
+  # Comparaison du temps d'export png d'une figure d'une année de minutes décimée, avec et sans bbox_inches="tight"
+  generateur = np.random.default_rng(0)
+  x = np.datetime64('2023-01-01T00:00') + np.arange(nb_points).astype('timedelta64[m]')
+  y = np.cumsum(generateur.standard_normal(nb_points))
+  figure = FigurePersistante()
+  figure.ligne(figure.ax, 'y', *decimation_min_max(x, y, largeur_pixels(figure.fig)), linewidth=1)
+  figure.texte(figure.ax, 'titre', "Banc d'essai", x=0.5, y=1.1, fontsize=16, weight='bold', ha='center', va='bottom', transform=figure.ax.transAxes)
+  chemin = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'banc_essai_export.png')
+  for tight in (True, False):
+    debut = time.perf_counter()
+    for i in range(5):
+      if tight:
+        figure.fig.savefig(chemin, bbox_inches="tight")
+      else:
+        enregistrement_png(figure.fig, chemin)
+    print("bbox_inches=\"tight\" : " + str(tight) + ", {:.3f} s par figure".format((time.perf_counter()-debut)/5))
+  os.remove(chemin)
+
+def banc_essai_decimation(nb_points=525600):
+  # Comparaison du temps de tracé (moteur Agg) d'une série d'une année de minutes, avec et sans décimation
+  import matplotlib as mpl
+  mpl.use('Agg')
+  import matplotlib.pyplot as plt
+  generateur = np.random.default_rng(0)
+  x = np.datetime64('2023-01-01T00:00') + np.arange(nb_points).astype('timedelta64[m]')
+  y = np.cumsum(generateur.standard_normal(nb_points))
+  y[200000:201000] = np.nan
+  for decimation in (False, True):
+    debut = time.perf_counter()
+    fig, ax = plt.subplots(1, 1, figsize=(16, 9))
+    if decimation:
+      xd, yd = decimation_min_max(x, y, largeur_pixels(fig))
+      ax.plot(xd, yd, linewidth=1)
+    else:
+      ax.plot(x, y, linewidth=1)
+    fig.canvas.draw()
+    plt.close(fig)
+    print("Décimation : " + str(decimation) + ", {:.3f} s".format(time.perf_counter()-debut))
+  if np.nanmax(yd) != np.nanmax(y) or np.nanmin(yd) != np.nanmin(y):
+    raise RuntimeError("Les extrêmes de la série décimée diffèrent de ceux de la série complète")
+  print("Points tracés : " + str(nb_points) + " -> " + str(yd.shape[0]))
+
+#############  PROGRAMME PRINCIPAL #############
+
+if (__name__ == "__main__"):
+  banc_essai_decimation()
+  banc_essai_export()
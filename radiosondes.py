@@ -0,0 +1,385 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Octobre 2026
+@author : Benjamin Ménétrier
+
+Fonctions communes de lecture des fichiers .cor des radiosondages (DDAAAAMMJJHH*.cor), utilisées par visu_hors_mto.py,
+MakeCSV_SeriesRS.py et suivi_radiosondes.py.
+Un fichier .cor est lu en un seul appel : la première ligne (en-tête) est ignorée, les séparateurs tabulation et
+point-virgule sont unifiés, et seules les colonnes utiles sont converties, en colonnes numpy typées.
+Les radiosondages lus sont conservés dans un cache LRU, déjà séparés en montée et descente, pour toutes les figures.
+Les séries de radiosondages sont ramenées sur une grille d'altitude commune en une seule passe (moyennes_grille).
+Les lancers d'une date sont recherchés dans un catalogue persistant de chaque répertoire d'archives (date -> fichiers),
+enregistré dans le cache local et mis à jour seulement quand le répertoire change.
+
+Utilisation :
+    python radiosondes.py : bancs d'essai de la lecture d'un fichier .cor synthétique, comparée à l'ancienne boucle
+    ligne par ligne, de la recherche des lancers d'une année dans le catalogue, comparée à os.listdir, et de la mise
+    sur grille d'altitude de radiosondages, comparée à l'ancienne boucle de MakeCSV_SeriesRS.py
+
+Il fonctionne en python3.12 et a besoin des librairies :
+    - numpy
+    - pandas
+"""
+
+# Chargement des librairies
+import codecs
+from collections import OrderedDict
+import hashlib
+import io
+import json
+import logging
+import os
+import re
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+
+# Colonnes des fichiers .cor : nom -> indice de la colonne (les séparateurs tabulation et point-virgule étant confondus),
+# dans l'ordre du fichier : lecture_cor nomme les colonnes lues dans cet ordre
+COLONNES_COR = {
+  'alt':1,   # altitude (m)
+  'lat':2,   # delta de latitude
+  'lon':3,   # delta de longitude
+  'As':6,    # vitesse ascensionnelle (m/s)
+  'FF':7,    # force du vent (m/s)
+  'DD':8,    # direction du vent (°)
+  'T':10,    # température (°C)
+  'U':11,    # humidité relative (%)
+  'P':12,    # pression atmosphérique (hPa)
+  }
+
+# Répertoire local des catalogues, partagé avec le cache des fichiers du Cobalt
+REPERTOIRE_CACHE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache')
+
+# Date d'un fichier de radiosondage (DDAAAAMMJJHH_n.cor)
+MOTIF_DATE = re.compile(r'DD(\d{8})')
+
+# Délai minimal (s) entre deux vérifications de la date de modification d'un répertoire catalogué
+DELAI_RAFRAICHISSEMENT = 60
+
+# Catalogues ouverts, par répertoire (voir catalogue_radiosondes)
+CATALOGUES = {}
+
+# Radiosondages lus, du moins au plus récemment utilisé, par (chemin, taille, date de modification) (voir sondage)
+SONDAGES = OrderedDict()
+TAILLE_CACHE_SONDAGES = 16
+
+############# DEFINITION DES FONCTIONS #############
+
+def sondage_vide():
+  # Dataframe sans ligne, avec les colonnes de lecture_cor, pour une date sans radiosondage
+  return pd.DataFrame({nom:np.zeros(0, dtype=np.float64) for nom in COLONNES_COR})
+
+def lecture_cor(chemin):
+  # Lecture d'un fichier .cor en un seul appel au moteur C de pandas : le fichier est lu d'un bloc (une seule lecture
+  # sur le partage réseau), ses points-virgules remplacés par des tabulations, puis les colonnes de COLONNES_COR sont
+  # converties en float64
+  # Les lignes sans séparateur (lignes vides ou de texte) n'ont pas d'altitude et sont écartées, comme dans les
+  # anciennes boucles de lecture
+  # Renvoie une dataframe dont les colonnes sont les clés de COLONNES_COR, l'altitude restant en mètres
+  with open(chemin, 'rb') as f:
+    contenu = f.read().replace(b';', b'\t')
+  data = pd.read_csv(io.BytesIO(contenu), sep='\t', header=None, skiprows=1, usecols=list(COLONNES_COR.values()),
+                     dtype=np.float64, encoding='latin1', engine='c')
+  data.columns = list(COLONNES_COR)
+  if data['alt'].isna().any():
+    data = data[data['alt'].notna()].reset_index(drop=True)
+  return data
+
+class CatalogueRadiosondes:
+  # Catalogue des fichiers .cor d'un répertoire : liste triée des noms, et index date (AAAAMMJJ) -> noms des lancers du
+  # jour, triés
+  # Le catalogue est enregistré en json dans le cache local avec la date de modification du répertoire : il n'est
+  # reconstruit (un seul parcours os.scandir) que si le répertoire a changé depuis, et cette date n'est vérifiée qu'une
+  # fois par DELAI_RAFRAICHISSEMENT secondes ; une date est ensuite recherchée par un accès au dictionnaire
+  def __init__(self, repertoire, repertoire_cache=REPERTOIRE_CACHE):
+    self.repertoire = os.path.abspath(repertoire)
+    hachage = hashlib.md5(self.repertoire.encode('utf-8')).hexdigest()[:12]
+    self.chemin_json = os.path.join(repertoire_cache, 'catalogue_rs_' + hachage + '.json')
+    self.mtime = None
+    self.fichiers = []
+    self.index = {}
+    self.verification = None
+    try:
+      with open(self.chemin_json, 'r') as f:
+        metadonnees = json.load(f)
+      if metadonnees['repertoire'] == self.repertoire:
+        self.mtime = metadonnees['mtime']
+        self.fichiers = sorted(metadonnees['fichiers'])
+        self.indexation()
+    except FileNotFoundError:
+      pass
+    except (OSError, ValueError, KeyError) as erreur:
+      logging.warning("Catalogue illisible pour " + self.repertoire + " : " + str(erreur))
+
+  def indexation(self):
+    # Index date -> noms des fichiers triés, dans l'ordre de sorted(os.listdir(...))
+    self.index = {}
+    for nom in self.fichiers:
+      res = MOTIF_DATE.search(nom)
+      if res is not None:
+        self.index.setdefault(res.group(1), []).append(nom)
+
+  def rafraichissement(self, force=False):
+    # Mise à jour du catalogue si le répertoire a été modifié (fichier ajouté, supprimé ou renommé)
+    maintenant = time.monotonic()
+    if not force and self.verification is not None and maintenant-self.verification < DELAI_RAFRAICHISSEMENT:
+      return
+    self.verification = maintenant
+    mtime = os.stat(self.repertoire).st_mtime
+    if not force and mtime == self.mtime:
+      return
+    logging.info("Mise à jour du catalogue des radiosondages de " + self.repertoire)
+    with os.scandir(self.repertoire) as entrees:
+      fichiers = sorted([entree.name for entree in entrees if '.cor' in entree.name])
+    self.mtime = mtime
+    self.fichiers = fichiers
+    self.indexation()
+    self.ecriture()
+
+  def ecriture(self):
+    # Ecriture atomique du catalogue ; une erreur d'écriture n'est pas bloquante
+    try:
+      os.makedirs(os.path.dirname(self.chemin_json), exist_ok=True)
+      with open(self.chemin_json + '.tmp', 'w') as f:
+        json.dump({'repertoire':self.repertoire, 'mtime':self.mtime, 'fichiers':self.fichiers}, f)
+      os.replace(self.chemin_json + '.tmp', self.chemin_json)
+    except OSError as erreur:
+      logging.warning("Impossible d'écrire le catalogue " + self.chemin_json + " : " + str(erreur))
+
+  def lancers(self, date):
+    # Noms triés des fichiers .cor de la date AAAAMMJJ (liste vide s'il n'y en a pas)
+    self.rafraichissement()
+    return list(self.index.get(date, []))
+
+def catalogue_radiosondes(repertoire, repertoire_cache=REPERTOIRE_CACHE):
+  # Catalogue du répertoire, ouvert une seule fois par processus
+  cle = (os.path.abspath(repertoire), repertoire_cache)
+  if cle not in CATALOGUES:
+    CATALOGUES[cle] = CatalogueRadiosondes(repertoire, repertoire_cache)
+  return CATALOGUES[cle]
+
+class Sondage:
+  # Radiosondage lu par lecture_cor (data), séparé une seule fois en montée (niveaux précédant le premier maximum
+  # d'altitude) et descente (niveaux suivants) : montee et descente sont des dictionnaires nom -> tableau numpy en
+  # lecture seule, partagés par toutes les figures ; le niveau du maximum n'appartient à aucune des deux
+  def __init__(self, data):
+    self.data = data
+    self.imax = int(np.argmax(data['alt'].to_numpy())) if data.shape[0] > 0 else 0
+    self.montee, self.descente = {}, {}
+    for nom in data.columns:
+      self.montee[nom], self.descente[nom] = self.separation(data[nom].to_numpy())
+
+  def separation(self, valeurs):
+    # (montée, descente) d'un tableau d'une valeur par niveau, comme une colonne calculée sur tout le radiosondage
+    montee, descente = valeurs[:self.imax], valeurs[self.imax+1:]
+    montee.flags.writeable = False
+    descente.flags.writeable = False
+    return montee, descente
+
+def sondage(repertoire, nom):
+  # Radiosondage du fichier nom du répertoire, lu au premier appel puis conservé dans SONDAGES (au plus
+  # TAILLE_CACHE_SONDAGES radiosondages, le moins récemment utilisé étant retiré)
+  # La clé comprend la taille et la date de modification du fichier, relues à chaque appel (un seul os.stat, sans
+  # lecture du fichier) : un fichier réécrit sur place, qui ne modifie pas la date du répertoire, est aussi relu
+  chemin = os.path.join(repertoire, nom)
+  etat = os.stat(chemin)
+  cle = (os.path.abspath(chemin), etat.st_size, etat.st_mtime_ns)
+  if cle in SONDAGES:
+    SONDAGES.move_to_end(cle)
+  else:
+    SONDAGES[cle] = Sondage(lecture_cor(chemin))
+    while len(SONDAGES) > TAILLE_CACHE_SONDAGES:
+      SONDAGES.popitem(last=False)
+  return SONDAGES[cle]
+
+def moyennes_grille(jour, alt, valeurs, z, nb_jours):
+  # Moyennes par jour et par niveau d'une grille d'altitude z (croissante) des niveaux de radiosondages concaténés :
+  # jour (indice du jour de chaque niveau, de 0 à nb_jours-1), alt et chaque tableau de valeurs (nom -> tableau) ont
+  # une valeur par niveau
+  # Le niveau i de la grille reçoit les altitudes z[i] < alt <= z[i+1], le dernier niveau recevant aussi les altitudes
+  # au-delà de la grille ; les altitudes manquantes ou inférieures ou égales à z[0] sont ignorées (l'ancienne boucle de
+  # MakeCSV_SeriesRS.py ajoutait ces dernières au dernier niveau, par l'indice -1 de la liste des niveaux)
+  # Tous les jours sont traités ensemble : un np.digitize, puis un np.bincount par variable sur les cellules
+  # (jour, niveau)
+  # Renvoie un dictionnaire nom -> tableau (nb_jours, len(z)) des moyennes, NaN pour une cellule sans niveau
+  jour = np.asarray(jour, dtype=np.int64)
+  alt = np.asarray(alt, dtype=np.float64)
+  nb_niveaux = len(z)
+  valide = alt > z[0]
+  niveau = np.minimum(np.digitize(alt[valide], z, right=True) - 1, nb_niveaux-1)
+  cellule = jour[valide]*nb_niveaux + niveau
+  compte = np.bincount(cellule, minlength=nb_jours*nb_niveaux)
+  moyennes = {}
+  for nom, v in valeurs.items():
+    somme = np.bincount(cellule, weights=np.asarray(v, dtype=np.float64)[valide], minlength=nb_jours*nb_niveaux)
+    with np.errstate(divide='ignore', invalid='ignore'):
+      moyennes[nom] = (somme/compte).reshape(nb_jours, nb_niveaux)
+  return moyennes
+
+def fichier_cor_synthetique(chemin, nb_lignes=6000):
+  # Ecriture d'un fichier .cor synthétique : montée jusqu'à 30 km puis redescente, colonnes séparées par des tabulations
+  # et des points-virgules
+  generateur = np.random.default_rng(nb_lignes)
+  montee = nb_lignes*5//6
+  alt = np.concatenate((np.linspace(40, 30000, montee), np.linspace(30000, 2000, nb_lignes-montee)))
+  colonnes = np.column_stack((
+    np.arange(nb_lignes),                                  # temps
+    alt,
+    generateur.uniform(-0.01, 0.01, nb_lignes),            # delta de latitude
+    generateur.uniform(-0.01, 0.01, nb_lignes),            # delta de longitude
+    np.zeros(nb_lignes),
+    np.zeros(nb_lignes),
+    np.where(np.arange(nb_lignes) < montee, 5, -20) + generateur.standard_normal(nb_lignes),
+    generateur.uniform(0, 40, nb_lignes),
+    generateur.uniform(0, 360, nb_lignes),
+    np.zeros(nb_lignes),
+    15-6.5*np.minimum(alt, 11000)/1000 + generateur.standard_normal(nb_lignes),
+    generateur.uniform(1, 100, nb_lignes),
+    1013.25*np.exp(-alt/7000),
+    ))
+  with open(chemin, 'w', encoding='latin1') as f:
+    f.write("Temps\tAltitude;Lat;Lon;X;Y;Vitesse;FF;DD;Z;T;U;P\n")
+    for ligne in colonnes:
+      f.write("{:.0f}\t{:.1f};{:.5f};{:.5f};{:.1f};{:.1f};{:.2f};{:.1f};{:.0f};{:.1f};{:.2f};{:.1f};{:.2f}\n".format(*ligne))
+    f.write("\n")
+
+def banc_essai_lecture(nb_lignes=6000, nb_fichiers=50):
+  # Comparaison de la lecture de fichiers .cor par boucle python (ancienne version de lecture_rs) et par lecture_cor
+  def lecture_boucle(chemin):
+    # Ancienne version de lecture_rs
+    alt,P,T,U,FF,DD,As = [], [], [], [], [], [], []
+    fichier_mf = codecs.open(chemin, encoding = 'latin1')
+    lines = fichier_mf.readlines()
+    for i in range(1, len(lines)):
+      tmp = lines[i].replace('\n', '').replace('\r','').replace(';', '\t').split('\t')
+      if len(tmp) > 1:
+        alt.append(float(tmp[1])/1000)
+        P.append(float(tmp[12]))
+        T.append(float(tmp[10]))
+        U.append(float(tmp[11]))
+        FF.append(float(tmp[7]))
+        DD.append(float(tmp[8]))
+        As.append(float(tmp[6]))
+    fichier_mf.close()
+    return [alt,P,T,U,FF,DD,As]
+
+  with tempfile.TemporaryDirectory() as repertoire:
+    chemin = os.path.join(repertoire, "DD2024010100_1.cor")
+    fichier_cor_synthetique(chemin, nb_lignes)
+
+    # Ancienne version
+    debut = time.perf_counter()
+    for i in range(nb_fichiers):
+      data_boucle = lecture_boucle(chemin)
+    duree_boucle = (time.perf_counter()-debut)/nb_fichiers
+
+    # Lecture en un seul appel
+    debut = time.perf_counter()
+    for i in range(nb_fichiers):
+      data = lecture_cor(chemin)
+    duree_vecteur = (time.perf_counter()-debut)/nb_fichiers
+
+  # Vérification de l'identité des résultats
+  for valeurs, nom in zip(data_boucle, ['alt', 'P', 'T', 'U', 'FF', 'DD', 'As']):
+    colonne = data[nom].to_numpy()/1000 if nom == 'alt' else data[nom].to_numpy()
+    if not np.array_equal(np.array(valeurs), colonne):
+      raise RuntimeError("Les valeurs de " + nom + " obtenues par les deux méthodes diffèrent")
+
+  print("Nombre de lignes : " + str(nb_lignes))
+  print("Boucle python : {:.2f} ms par fichier".format(duree_boucle*1e3))
+  print("Lecture_cor :   {:.2f} ms par fichier".format(duree_vecteur*1e3))
+  print("Accélération :  {:.1f}x".format(duree_boucle/duree_vecteur))
+
+def banc_essai_catalogue(annee=2024, nb_lancers=2):
+  # Comparaison de la recherche des lancers de chaque jour d'une année : os.listdir et parcours des listes à chaque
+  # appel (ancienne version de lecture_rs), et catalogue
+  # Sur un répertoire local, os.listdir est bien plus rapide que sur le partage réseau : l'écart mesuré est un minimum
+  dates = [date.strftime("%Y%m%d") for date in pd.date_range(str(annee) + '-01-01', str(annee) + '-12-31')]
+  with tempfile.TemporaryDirectory() as repertoire:
+    emplacement_rs = os.path.join(repertoire, str(annee))
+    os.makedirs(emplacement_rs)
+    for date in dates:
+      for i in range(nb_lancers):
+        open(os.path.join(emplacement_rs, 'DD' + date + '00_' + str(i+1) + '.cor'), 'w').close()
+
+    # Ancienne version
+    debut = time.perf_counter()
+    noms_listdir = []
+    for date in dates:
+      dossier = sorted([f for f in os.listdir(emplacement_rs) if '.cor' in f])
+      radical_fichier_mf = 'DD' + date
+      if [f for f in dossier if radical_fichier_mf in f] != []:
+        noms_listdir.append([f for f in dossier if radical_fichier_mf in f][-1])
+    duree_listdir = time.perf_counter()-debut
+
+    # Catalogue : construction puis recherches, et réouverture depuis le cache
+    repertoire_cache = os.path.join(repertoire, 'cache')
+    debut = time.perf_counter()
+    catalogue = catalogue_radiosondes(emplacement_rs, repertoire_cache)
+    noms_catalogue = [catalogue.lancers(date)[-1] for date in dates if catalogue.lancers(date) != []]
+    duree_catalogue = time.perf_counter()-debut
+    debut = time.perf_counter()
+    catalogue = CatalogueRadiosondes(emplacement_rs, repertoire_cache)
+    catalogue.lancers(dates[0])
+    duree_reouverture = time.perf_counter()-debut
+    del CATALOGUES[(os.path.abspath(emplacement_rs), repertoire_cache)]
+
+  if noms_listdir != noms_catalogue:
+    raise RuntimeError("Les lancers obtenus par les deux méthodes diffèrent")
+  print("Nombre de fichiers : " + str(len(dates)*nb_lancers) + ", " + str(len(dates)) + " jours")
+  print("os.listdir :           {:.3f} s".format(duree_listdir))
+  print("Catalogue :            {:.3f} s".format(duree_catalogue))
+  print("Réouverture du cache : {:.3f} s".format(duree_reouverture))
+
+def banc_essai_grille(nb_jours=30, nb_niveaux=6000):
+  # Comparaison de la mise sur grille d'altitude de la température de nb_jours radiosondages : boucle de
+  # MakeCSV_SeriesRS.py (ancienne version, insertion et tri de chaque altitude dans la grille) et moyennes_grille
+  generateur = np.random.default_rng(nb_jours)
+  sondages = []
+  for l in range(nb_jours):
+    alt = np.round(np.sort(generateur.uniform(0.01, 36, nb_niveaux)), 3)
+    sondages.append((alt, -50+generateur.standard_normal(nb_niveaux)))
+
+  # Ancienne version
+  debut = time.perf_counter()
+  z_commun = list(np.arange(0,35,0.3))
+  grille_boucle = []
+  for l in range(nb_jours):
+    z_temp = [[z] for z in z_commun]
+    for j in range(len(sondages[l][0])):
+        z_commun.append(sondages[l][0][j])
+        z_commun = sorted(z_commun)
+        ind = z_commun.index(sondages[l][0][j])
+        z_commun.remove(sondages[l][0][j])
+        z_temp[ind-1].append(sondages[l][1][j])
+    grille_boucle.append(len(z_commun)*[np.nan])
+    for alt in range(len(z_temp)):
+        if not(z_temp[alt][1:] == []):
+          grille_boucle[l][alt] = np.mean(z_temp[alt][1:])
+  duree_boucle = time.perf_counter()-debut
+
+  # Tous les jours en une fois
+  debut = time.perf_counter()
+  jour = np.repeat(np.arange(nb_jours), nb_niveaux)
+  alt = np.concatenate([s[0] for s in sondages])
+  T = np.concatenate([s[1] for s in sondages])
+  grille = moyennes_grille(jour, alt, {'T':T}, np.arange(0,35,0.3), nb_jours)['T']
+  duree_vecteur = time.perf_counter()-debut
+
+  # Vérification, à l'arrondi des sommes près
+  if not np.allclose(grille, np.array(grille_boucle), rtol=1e-12, atol=0, equal_nan=True):
+    raise RuntimeError("Les grilles obtenues par les deux méthodes diffèrent")
+  print("Nombre de radiosondages : " + str(nb_jours) + ", " + str(nb_niveaux) + " niveaux")
+  print("Boucle python :   {:.3f} s".format(duree_boucle))
+  print("moyennes_grille : {:.4f} s".format(duree_vecteur))
+  print("Accélération :    {:.0f}x".format(duree_boucle/duree_vecteur))
+
+#############  PROGRAMME PRINCIPAL #############
+
+if (__name__ == "__main__"):
+  banc_essai_lecture()
+  banc_essai_catalogue()
+  banc_essai_grille()
@@ -12,7 +12,7 @@ import datetime
 from openpyxl import load_workbook
 import sys
 import os
-import codecs 
+from radiosondes import catalogue_radiosondes, lecture_cor
 import numpy as np
 import math
 from math import sin, cos, sqrt, atan2, radians
@@ -26,42 +26,36 @@ def lecture_rs_cor(date,AltTropo):
   mois = date[3:5]
   annee = date[6:10]
 
-  dossier = sorted([f for f in os.listdir(emplacement_rs) if '.cor' in f]) # list tous les .cor du fichier
-  radical_fichier_mf = 'DD' + annee + mois + jour # je recherche le fichier du jour en question 
-  P_tot,alt_tot,T_tot,FF_tot,DD_tot,Lat_tot,Lon_tot = [], [], [], [], [], [], [] # je recupère l'altitude, la pression, la température, l'humidité, vent ff et direction, vitesse ascendente
-  if [f for f in dossier if radical_fichier_mf in f] == []: # Si le dossier est vide, on affiche un message signalant qu'il n'y a pas de mesure pour cette date
+  lancers = catalogue_radiosondes(emplacement_rs).lancers(annee + mois + jour) # lancers du jour en question, triés (voir radiosondes.CatalogueRadiosondes)
+  if lancers == []: # Si le dossier est vide, on affiche un message signalant qu'il n'y a pas de mesure pour cette date
     print("Il n'y a pas de mesure météo france pour cette date")
   else:
     # Ouverture et lecture du fichier de RS
-    nom_fichier_meteofrance = [f for f in dossier if radical_fichier_mf in f][-1] # on prend le dernier lancer de la journée
-    fichier_mf = codecs.open(emplacement_rs+'/'+nom_fichier_meteofrance,encoding = 'latin1')
-    lines = fichier_mf.readlines()
-
-    for i in range(1, len(lines)):
-      tmp = lines[i].replace('\n', '').replace('\r','').replace(';', '\t').split('\t')
-      if len(tmp) > 1:
-        P_tot.append(float(tmp[12]))          # Pression atmosphérique hPa
-        alt_tot.append(float(tmp[1]))
-        Lat_tot.append(float(tmp[2]))   # Delta de latitude 
-        Lon_tot.append(float(tmp[3]))   # Delta de longitude        
-        T_tot.append(float(tmp[10]))   # Température en °C 
-        FF_tot.append(float(tmp[7]))   # force du vent
-        DD_tot.append(float(tmp[8]))   # direction du vent
+    nom_fichier_meteofrance = lancers[-1] # on prend le dernier lancer de la journée
+    data = lecture_cor(os.path.join(emplacement_rs, nom_fichier_meteofrance))
+    P_tot = data['P'].to_numpy()       # Pression atmosphérique hPa
+    alt_tot = data['alt'].to_numpy()
+    Lat_tot = data['lat'].to_numpy()   # Delta de latitude
+    Lon_tot = data['lon'].to_numpy()   # Delta de longitude
+    T_tot = data['T'].to_numpy()       # Température en °C
+    FF_tot = data['FF'].to_numpy()     # force du vent
+    DD_tot = data['DD'].to_numpy()     # direction du vent
 
     lat1=radians(-66.65)
     lon1=radians(140.00)
-    if not not(alt_tot) :
-      imax=alt_tot.index(max(alt_tot))
-      Tmin=min(T_tot[0:imax])
-      itropo=alt_tot[0:imax].index(min(alt_tot[0:imax], key=lambda x:abs(x-AltTropo)))
-      PAltMax=round(P_tot[imax],1)
-      TTropo=T_tot[itropo]
-      FFVMax=round(max(FF_tot)/0.51444)
-      ivmax=FF_tot.index(max(FF_tot))
+    # Valeurs converties en float et int python, pour leur format dans le tableur (voir insertion)
+    if len(alt_tot) > 0 :
+      imax=int(np.argmax(alt_tot))
+      Tmin=float(T_tot[0:imax].min())
+      itropo=int(np.argmin(np.abs(alt_tot[0:imax]-AltTropo)))
+      PAltMax=round(float(P_tot[imax]),1)
+      TTropo=float(T_tot[itropo])
+      FFVMax=round(float(FF_tot.max())/0.51444)
+      ivmax=int(np.argmax(FF_tot))
       DDVMax=int(DD_tot[ivmax])
-      AltVMax=round(alt_tot[ivmax])
-      lat2=Lat_tot[imax]
-      lon2=Lon_tot[imax]
+      AltVMax=round(float(alt_tot[ivmax]))
+      lat2=float(Lat_tot[imax])
+      lon2=float(Lon_tot[imax])
       # Approximate radius of earth in km
       R = 6373.0
       dlon = lon2 - lon1
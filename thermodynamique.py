@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Octobre 2026
+@author : Benjamin Ménétrier
+
+Fonctions thermodynamiques des radiosondages, vectorisées sur des tableaux numpy : pression de vapeur et humidité
+relative par rapport à la glace, utilisées par visu_hors_mto.py (figure de température et d'humidité).
+Un radiosondage complet (montée et descente) est traité en un seul appel, sans boucle python sur les niveaux.
+
+Utilisation :
+    python thermodynamique.py : vérification de l'identité avec l'ancien calcul niveau par niveau et banc d'essai, sur
+    des radiosondages synthétiques
+
+Il fonctionne en python3.12 et a besoin des librairies :
+    - numpy
+"""
+
+# Chargement des librairies
+import time
+import numpy as np
+
+# Constantes
+To = 273.15  # température de condensation
+Lv = 2257    # chaleur latente de vaporisation (kJ/kg)
+Ls = 2800    # chaleur latente de sublimation (kJ/kg)
+R  = 8.314   # constante des gaz parfaits
+Me = 0.018   # masse molaire de l'eau (kg/mol)
+Ma = 0.029   # masse molaire de l'air sec (kg/mol)
+
+############# DEFINITION DES FONCTIONS #############
+
+def pression_vapeur(T):
+  # Pression de vapeur e pour la température T (tableau numpy ou scalaire)
+  T = np.asarray(T, dtype=np.float64)
+  with np.errstate(over='ignore', divide='ignore', invalid='ignore'):
+    return 0.61*np.exp(21.87*(T-To)/(T-To+265.5))
+
+def humidite_glace(P, T, U):
+  # Humidité relative par rapport à la glace, pour la pression P, la température T et l'humidité relative par rapport à
+  # l'eau liquide U (tableaux numpy de même taille, ou scalaires), mêmes formules que l'ancien calcul niveau par niveau
+  # Les niveaux où les formules divergent donnent inf ou NaN, sans avertissement
+  P = np.asarray(P, dtype=np.float64)
+  T = np.asarray(T, dtype=np.float64)
+  U = np.asarray(U, dtype=np.float64)
+  e = pression_vapeur(T)
+  with np.errstate(over='ignore', divide='ignore', invalid='ignore'):
+    return U*np.exp((Lv-Ls)/R*(1/To-1/T)*(e*Me*Me+(P-e)*Ma*Ma)/((P-e)*Ma+e*Me))
+
+def humidite_glace_boucle(P, T, U):
+  # Ancien calcul de extract_data_rs_T, niveau par niveau, conservé pour la vérification et le banc d'essai
+  e = [0.61*np.exp(21.87*(x-To)/(x-To+265.5)) for x in T]
+  return [U[i]*np.exp((Lv-Ls)/R*(1/To-1/T[i])*(e[i]*Me*Me+(P[i]-e[i])*Ma*Ma)/((P[i]-e[i])*Ma+e[i]*Me)) for i in range(len(P))]
+
+def radiosondage_synthetique(nb_niveaux, generateur):
+  # Pression (hPa), température et humidité relative (%) d'un radiosondage synthétique
+  alt = np.linspace(40, 30000, nb_niveaux)
+  P = 1013.25*np.exp(-alt/7000)
+  T = np.round(15-6.5*np.minimum(alt, 11000)/1000 + generateur.standard_normal(nb_niveaux), 2) + To
+  U = np.round(generateur.uniform(1, 100, nb_niveaux), 1)
+  return P, T, U
+
+def verification(nb_sondages=20, nb_niveaux=6000):
+  # Comparaison de humidite_glace à l'ancien calcul, valeur par valeur à l'identique (NaN compris), sur des radiosondages
+  # synthétiques (températures en K et en °C, comme dans extract_data_rs_T) et des cas particuliers (niveau unique,
+  # radiosondage vide)
+  generateur = np.random.default_rng(0)
+  cas = []
+  for i in range(nb_sondages):
+    P, T, U = radiosondage_synthetique(nb_niveaux, generateur)
+    cas.append((P, T, U))
+    cas.append((P, T-To, U))
+  cas.append((np.array([850.]), np.array([260.]), np.array([80.])))
+  cas.append((np.zeros(0), np.zeros(0), np.zeros(0)))
+  with np.errstate(over='ignore', divide='ignore', invalid='ignore'):
+    for P, T, U in cas:
+      reference = np.array(humidite_glace_boucle(P, T, U), dtype=np.float64)
+      if not np.array_equal(humidite_glace(P, T, U), reference, equal_nan=True):
+        raise RuntimeError("humidite_glace diffère de l'ancien calcul")
+  print("Vérification : " + str(len(cas)) + " radiosondages identiques à l'ancien calcul")
+
+def banc_essai(nb_sondages=20, nb_niveaux=6000):
+  # Comparaison des durées de l'ancien calcul et de humidite_glace, montée et descente traitées ensemble
+  generateur = np.random.default_rng(1)
+  sondages = [radiosondage_synthetique(nb_niveaux, generateur) for i in range(nb_sondages)]
+
+  # Ancienne version
+  debut = time.perf_counter()
+  for P, T, U in sondages:
+    humidite_glace_boucle(P, T, U)
+  duree_boucle = (time.perf_counter()-debut)/nb_sondages
+
+  # Version vectorisée
+  debut = time.perf_counter()
+  for P, T, U in sondages:
+    humidite_glace(P, T, U)
+  duree_vecteur = (time.perf_counter()-debut)/nb_sondages
+
+  print("Nombre de niveaux : " + str(nb_niveaux))
+  print("Boucle python : {:.2f} ms par radiosondage".format(duree_boucle*1e3))
+  print("Vectorisé :     {:.3f} ms par radiosondage".format(duree_vecteur*1e3))
+  print("Accélération :  {:.0f}x".format(duree_boucle/duree_vecteur))
+
+#############  PROGRAMME PRINCIPAL #############
+
+if (__name__ == "__main__"):
+  verification()
+  banc_essai()
@@ -18,6 +18,7 @@ Il fonctionne en python3.12 et a besoin des librairies :
     - locale
     - matplotlib
     - sys
+    - threading
     - tkinter
     -.FreeSimpleGUI ou à défaut PySimpleGUI
     - logging
@@ -30,10 +31,8 @@ Modifications :
 """
 
 # Chargement des librairies
-import calendar
 import datetime
 import importlib
-import numpy as np
 import pandas as pd
 import locale
 import matplotlib as mpl
@@ -43,12 +42,15 @@ import matplotlib.dates as mdates
 import matplotlib.ticker as mticker
 import matplotlib.patches as mpatches
 import matplotlib.lines as mlines
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-from mpl_toolkits.axes_grid1.inset_locator import inset_axes
+from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
 import os
 from pandas.plotting import register_matplotlib_converters
 import sys
+import threading
 from tkinter import *
+from archive_minute import extraction_archive
+from lecture_cobalt import SCHEMA_MINUTE, MagasinMinute, chargement_mois, fermeture_pool_processus, taches_periode
+from outils_figures import CONVERSIONS, FileExport, dates_locales, extremes, extremes_valeurs, figure_persistante, instantane, limites_axes
 
 # Chargement de FreeSimpleGui, ou de PySimpleGui à défaut
 try:
@@ -62,7 +64,10 @@ pd.set_option('mode.chained_assignment',None)
 register_matplotlib_converters()
 #
 #logging.basicConfig( filename="py_log.log",filemode="w")
-logging.basicConfig(level=logging.DEBUG, filename="py_log.log",filemode="w")
+# Figures persistantes, une par variable, et widgets Tk associés, canevas et barre d'outils
+# (voir outils_figures.FigurePersistante)
+figures = {}
+widgets_figures = {}
 ############# DEFINITION DES FONCTIONS #############
 
 ### Environnement de travail :
@@ -86,167 +91,78 @@ def existence_repertoire(repertoire) :
     logging.error("Le réperoire " + repertoire + " n'existe pas, création du répertoire")
     os.mkdir(repertoire)
 
-def recuperation_donnees_mois(chemin_minute, date_debut_fichier, date_fin_fichier):
-  # Récupération des données pour un seul mois, entre les dates date_debut_fichier et date_fin_fichier
-  # Renvoie la dataframe et un booléen indiquant si tout s'est bien passé
-
-  # Test de l'existence du fichier
-  if not existence_fichier(chemin_minute, False):
-    return None, False
-
-  # Lecture du fichier
-  data_minute = pd.read_csv(chemin_minute, sep=';', decimal=",", engine='python')
-
-  # Correction du zero manquant devant certaines dates
-  TMP = []
-  for x in range (0,len(data_minute['ddmmyyyyhhmm'])):
-    if len(str(data_minute['ddmmyyyyhhmm'][x])) == 11:
-      TMP.append('0'+str(data_minute['ddmmyyyyhhmm'][x]))
-    else:
-      TMP.append(str(data_minute['ddmmyyyyhhmm'][x]))
-  data_minute['ddmmyyyyhhmm'] = TMP
-
-  # Index de début, index de fin
-  index_debut = (data_minute.ddmmyyyyhhmm == date_debut_fichier).idxmax()
-  index_fin = (data_minute.ddmmyyyyhhmm == date_fin_fichier).idxmax()
-  if data_minute['ddmmyyyyhhmm'][index_debut] != date_debut_fichier:
-    # Pas de date pertinente dans ce fichier (index_debut)
-    logging.critical("Pas de date pertinente dans ce fichier (index_debut)")
-    sg.popup_ok("Pas de date pertinente dans ce fichier (index_debut)", title="Erreur", keep_on_top=True)
-    return None, False
-  if data_minute['ddmmyyyyhhmm'][index_fin] != date_fin_fichier:
-    # Pas de date pertinente dans ce fichier (index_fin)
-    logging.critical("Pas de date pertinente dans ce fichier (index_fin)")
-    sg.popup_ok("Pas de date pertinente dans ce fichier (index_debut)", title="Erreur", keep_on_top=True)
-    return None, False
-
-
-
-  # Restrictions des données entre index_debut et index_fin
-  data_minute = data_minute.iloc[index_debut:index_fin+1,:]
-
-  # Formatage des dates et heures
-  data_minute['ddmmyyyyhhmm'] = pd.to_datetime(data_minute['ddmmyyyyhhmm'][:],format='%d%m%Y%H%M',errors='coerce')
-  data_minute['date'] = data_minute['ddmmyyyyhhmm']
-
-  # Formatage des données numériques
-  for param in data_minute.columns[2:14]:
-    data_minute[param] = pd.to_numeric(data_minute[param])
-
-
-  # Création d'un index, tri des données
-  data_minute.set_index(['date'], inplace=True)
-  data_minute.sort_index(ascending=True, inplace=True)
-
- 
-  # Enregistrement de la dataframe
-  index = np.where(data_minute['ddmmyyyyhhmm'].notnull())[0]
-  data_minute_final = pd.DataFrame({
-    'DATE':data_minute['ddmmyyyyhhmm'].iloc[index], # date
-    'T':data_minute['T'].iloc[index],               # température
-    'DI':data_minute['DI'].iloc[index],             # durée d'insolation
-    'RG':data_minute['RG'].iloc[index],             # rayonnement global
-    'FXI':data_minute['FM1'].iloc[index],           # vitesse maximale sur 10min
-    'FF':data_minute['FF'].iloc[index],             # vitesse moyenne sur 10min
-    'DD':data_minute['DD'].iloc[index],             # direction moyenne sur 10min
-    'U':data_minute['U'].iloc[index],               # humidité relative
-    'P':data_minute['PSTA'].iloc[index],            # pression au niveau de la station
-    'VIS':data_minute['VVSYNTH'].iloc[index]        # pression au niveau de la station
-    }, columns=['DATE','T','DI','RG','FXI','FF','DD','U','P','VIS'])
-
-  # Renvoie la dataframe
-  return data_minute_final, True
-
-def recuperation_donnees():
+def recuperation_donnees(window, annulation):
+  # Lance la récupération des données de la période choisie : les vérifications (dates, existence des fichiers) sont
+  # faites dans la boucle des événements, la lecture des fichiers dans un thread (lecture_donnees), qui envoie à la
+  # fenêtre les événements '-progression_donnees-' et '-donnees_recuperees-'
+  # Renvoie False si la récupération n'est pas lancée
   # Date locale de début, date locale de fin
   date_locale_debut = datetime.datetime(int(annee_debut),int(mois_debut),int(jour_debut),int(heure_debut),int(minute_debut))
   date_locale_fin = datetime.datetime(int(annee_fin),int(mois_fin),int(jour_fin),int(heure_fin),int(minute_fin))
   if date_locale_debut >= date_locale_fin:
     sg.popup_ok("La date de début est postérieure ou égale à la date de fin !", title="Erreur", keep_on_top=True)
-    return None, False
+    return False
   if date_locale_fin >= datetime.datetime.today():
     sg.popup_ok("La date de fin est dans le futur !", title="Erreur", keep_on_top=True)
-    return None, False
+    return False
   if date_locale_debut >= datetime.datetime.today():
     sg.popup_ok("La date de début est dans le futur !", title="Erreur", keep_on_top=True)
-    return None, False
+    return False
 
   # Dates au format UTC
   date_debut = date_locale_debut - datetime.timedelta(hours=decalage[fuseau])
   date_fin = date_locale_fin - datetime.timedelta(hours=decalage[fuseau])
 
-  # Formatage des dates
-  ddmmyyhhmm_debut = date_debut.strftime("%d%m%Y%H%M")
-  ddmmyyhhmm_fin = date_fin.strftime("%d%m%Y%H%M")
-  yymm_debut = date_debut.strftime("%Y%m")
-  yymm_fin = date_fin.strftime("%Y%m")
-
-  # Date du jour
-  aujourdhui = datetime.datetime.today()
-
-  # Boucle sur les mois demandés
-  for yymm in range(int(yymm_debut), int(yymm_fin)+1):
-    # Choix du fichier
-    if str(yymm)==aujourdhui.strftime("%Y%m"):
-      fichier_minute = "DON_Minute_UTC_moisencours.csv"
-    else :
-      fichier_minute = "DON_Minute_UTC_" + str(yymm) + ".txt"
-
-    # Chemin complet
-    chemin_minute = os.path.join(emplacement_minute, fichier_minute)
-
-    # Date de début et date de fin du mois de ce fichier
-    date_debut_fichier = "01" + str(yymm)[4:6] + str(yymm)[0:4] + "0000"
-    res = calendar.monthrange(int(str(yymm)[0:4]), int(str(yymm)[4:6]))
-    date_fin_fichier = str(res[1]) + str(yymm)[4:6] + str(yymm)[0:4] + "2359"
-
-    # Cas spécial pour le premier ou le dernier fichier
-    if str(yymm) == yymm_debut:
-      # Premier fichier
-      date_debut_fichier = ddmmyyhhmm_debut
-    if str(yymm) == yymm_fin:
-      # Dernier fichier
-      date_fin_fichier = ddmmyyhhmm_fin
-
+  # Lecture dans l'archive consolidée (archive_minute.py) si elle est renseignée et couvre la période demandée
+  if archive_minute != '':
+    data = extraction_archive(archive_minute, date_debut, date_fin)
+    if data is not None:
+      logging.info("Lecture des données dans l'archive : " + archive_minute)
+      logging.info("Taille totale des données: " + str(len(data)))
+      window.write_event_value('-donnees_recuperees-', data)
+      return True
+    logging.warning("L'archive " + archive_minute + " ne couvre pas la période demandée, lecture des fichiers mensuels")
+
+  # Fichiers mensuels à lire, avec la période à extraire de chacun
+  taches = taches_periode(emplacement_minute, "DON_Minute_UTC_", date_debut, date_fin)
+  for chemin_minute, date_debut_fichier, date_fin_fichier in taches:
     logging.info("Lecture et nettoyage des données de : " + chemin_minute)
-    logging.info("Date de début : " + date_debut_fichier)
-    logging.info("Date de fin :   " + date_fin_fichier)
-
-    # Barre de progression
-    if not sg.one_line_progress_meter('Récupération des données',
-                                      int(yymm)-int(yymm_debut)+1,
-                                      int(yymm_fin)-int(yymm_debut)+1,
-                                      key='-barre-',
-                                      orientation='h',
-                                      no_titlebar=True,
-                                      grab_anywhere=True,
-                                      no_button=True):
-      logging.info('Hit the break')
-      break
-
-    if str(yymm) == yymm_debut:
-      # Premier fichier
-      data, success = recuperation_donnees_mois(chemin_minute, date_debut_fichier, date_fin_fichier)
-      if not success:
-        sg.one_line_progress_meter_cancel(key='-barre-')
-        return None, False
-      logging.info("Nombre de ligne pour ce fichier : " + str(data.shape[0]))
-    else:
-      # Fichiers suivants
-      dataTmp, success = recuperation_donnees_mois(chemin_minute, date_debut_fichier, date_fin_fichier)
-      if not success:
-        sg.one_line_progress_meter_cancel(key='-barre-')
-        return None, False
-      logging.info("Nombre de ligne pour ce fichier : " + str(dataTmp.shape[0]))
+    logging.info("Date de début : " + str(date_debut_fichier))
+    logging.info("Date de fin :   " + str(date_fin_fichier))
 
-      # Concaténation avec la dataframe
-      data = pd.concat([data, dataTmp], ignore_index=True)
-
-  # Taille totale de la dataframe
-  logging.info("Taille totale de la dataframe: " + str(data.shape[0]))
+    # Test de l'existence du fichier
+    if not existence_fichier(chemin_minute, False):
+      return False
 
-  # Renvoie la dataframe
-  return data, True
+  # Lecture des fichiers dans un thread de travail
+  annulation.clear()
+  threading.Thread(target=lecture_donnees, args=(window, taches, annulation), daemon=True).start()
+  return True
+
+def lecture_donnees(window, taches, annulation):
+  # Lecture des fichiers mensuels, exécutée dans un thread de travail : la progression est envoyée à la fenêtre après
+  # la lecture de chaque mois, la lecture s'arrête au mois suivant dès que annulation est positionné, et les données
+  # (None en cas d'annulation ou d'erreur) sont envoyées avec l'événement '-donnees_recuperees-'
+  # Aucune fenêtre n'est ouverte ici : les messages d'erreur sont affichés par la boucle des événements
+  def progression(i, n):
+    window.write_event_value('-progression_donnees-', (i, n))
+    return not annulation.is_set()
+
+  # Lecture des fichiers en parallèle et concaténation en une seule fois
+  try:
+    data = chargement_mois(taches, SCHEMA_MINUTE, progression)
+  except Exception:
+    logging.exception("Erreur lors de la lecture des données")
+    data = None
+  if data is None:
+    logging.info('Hit the break')
+  else:
+    # Taille totale de la dataframe
+    logging.info("Taille totale de la dataframe: " + str(data.shape[0]))
+    if not data.empty:
+      # Données dans un stockage compact
+      data = MagasinMinute(data)
+  window.write_event_value('-donnees_recuperees-', data)
 
 def write_data(data, P=False, T=False, Tres=False, FMOY=False, DMOY=False, FINS=False, DINS=False, HU=False, DI=False, RG=False, VIS=False) :
   # Ecriture d'un fichier csv
@@ -288,7 +204,7 @@ def write_data(data, P=False, T=False, Tres=False, FMOY=False, DMOY=False, FINS=
   # Message de confirmation
   sg.popup_ok("Fichier " + chemin_csv + " exporté", title="Confirmation", keep_on_top=True)
 
-def figure_vent(data,unite):
+def figure_vent(data, unite, figures=figures):
   # Trace le vent moyen
   logging.info("Le fichier png est enregistré sous : " + emplacement_figure)
   existence_repertoire(emplacement_figure)
@@ -300,74 +216,76 @@ def figure_vent(data,unite):
   chemin_figure = os.path.join(emplacement_figure, fichier_figure)
   logging.info("Nom du fichier png: " + chemin_figure)
 
-  # Date
-  data_date = data['DATE'] + datetime.timedelta(hours=decalage[fuseau])
-
   # Paramètres du graphe
   ratio = 0.2
 
-  # Conversion à la demande
+  # Unité demandée : bornes et seuil de l'axe des ordonnées, conversion depuis les m/s des séries
   if unite == 'km/h' :
-    data_FF = data['FF']*3.6
-    data_FXI = data['FXI']*3.6
     ymin = 0
     ymax = 250
     seuil = 90
   elif unite =='kt' :
-    data_FF = data['FF']*3.6/1.8
-    data_FXI = data['FXI']*3.6/1.8
     ymin = 0
     ymax = 140
     seuil = 50
   elif unite == 'm/s':
-    data_FF = data['FF']
-    data_FXI = data['FXI']
     ymin = 0
     ymax = 70
     seuil = 25
   else:
     logging.info("Unité de vent inconnue !")
     exit(1)
-
-
-  # Calculs des bornes de l'axe des ordonnées
-  if max(data_FXI)+abs(ratio*max(data_FXI)) > ymax:
+  directe, inverse = CONVERSIONS[unite]
+
+  # Tracé du graphe dans la figure persistante de la variable, les séries étant tracées par niveaux de détail (enveloppe
+  # min/max par colonne de pixels de la fenêtre visible, recalculée à chaque zoom)
+  # Les courbes sont tracées en m/s et ne sont recalculées que pour de nouvelles données : un changement d'unité ne
+  # modifie que la graduation de l'axe, ses bornes et le seuil
+  figure = figure_persistante(figures, 'vent')
+  fig, ax = figure.fig, figure.ax
+  ax2 = figure.axe_jumeau()
+  if figure.nouvelles_donnees(data, fuseau):
+    # Date
+    data_date = dates_locales(data, decalage[fuseau])
+    data_FF = data['FF']
+    data_FXI = data['FXI']
+    figure.ligne_detaillee(ax, 'FXI', data_date, data_FXI, linewidth=1, color='brown', label='rafales')
+    figure.ligne_detaillee(ax, 'FF', data_date, data_FF, linewidth=1, color='darkblue', label='vent moyen')
+    figure.ligne_detaillee(ax2, 'DD', data_date, data['DD'], color='forestgreen', label='direction', linestyle='dashed', linewidth=0.7)
+    ax.autoscale(axis='x', tight='true')
+    premiere_date, derniere_date = [date + datetime.timedelta(hours=decalage[fuseau]) for date in extremes(data, 'DATE')]
+    figure.texte(ax, 'sous_titre', f"Données minutes du {premiere_date.strftime('%d')} {premiere_date.strftime('%h')} {premiere_date.strftime('%Y')} à {premiere_date.strftime('%H:%M')} au {derniere_date.strftime('%d')} {derniere_date.strftime('%h')} {derniere_date.strftime('%Y')} à {derniere_date.strftime('%H:%M')}", x=0.5, y=1.05, fontsize=8, alpha=0.75, ha='center', va='bottom', transform=ax.transAxes)
+    FXI_min, FXI_max = extremes(data, 'FXI')
+    figure.statistiques = {'FXI_max':FXI_max, 'FXI_min':FXI_min}
+
+  # Calculs des bornes de l'axe des ordonnées, dans l'unité demandée
+  FXI_max = directe(figure.statistiques['FXI_max'])
+  FXI_min = directe(figure.statistiques['FXI_min'])
+  if FXI_max+abs(ratio*FXI_max) > ymax:
     bmax = ymax
   else:
-    bmax = max(data_FXI)+ratio*abs(max(data_FXI))
-  if min(data_FXI)-ratio*min(data_FXI) < ymin:
+    bmax = FXI_max+ratio*abs(FXI_max)
+  if FXI_min-ratio*FXI_min < ymin:
     bmin = ymin
   else:
-    bmin = min(data_FXI)-ratio*abs(min(data_FXI))
-
-  # Tracé du graphe
-  fig, ax = plt.subplots(1, 1, figsize=(16, 9))
-  ax.plot(np.array(data_date),np.array(data_FXI), linewidth=1, color='brown', label='rafales')
-  ax.plot(np.array(data_date),np.array(data_FF), linewidth=1, color='darkblue', label='vent moyen')
-  ax.axhline(seuil, color='red', linewidth=1, linestyle='--',label='seuil tempête')
-  ax.axhline(0, color='grey', linestyle='--')
+    bmin = FXI_min-ratio*abs(FXI_min)
+
+  figure.ligne_horizontale(ax, 'seuil', inverse(seuil), color='red', linewidth=1, linestyle='--',label='seuil tempête')
+  figure.ligne_horizontale(ax, 'zero', inverse(0), color='grey', linestyle='--')
 #  ax.grid(b=True, which='major', axis='both', color='lightgrey', zorder=1)
-  ax2=ax.twinx()
   ax2.set_ylabel('direction du vent [°]', color='black')
-  ax2.plot(np.array(data_date), np.array(data['DD']), color='forestgreen', label='direction', linestyle='dashed', linewidth=0.7)
   ax2.tick_params(axis='y', labelcolor='forestgreen')
   ax.set_xlabel(f"date et heure  {str(fuseau)}")
-  ax.set_ylabel(f"Vent moyen et rafales [{str(unite)}]")
-  ax.autoscale(axis='x', tight='true')
+  figure.axe_unite(ax, directe, inverse, f"Vent moyen et rafales [{str(unite)}]")
   fig.autofmt_xdate()
   #ax.set_title(f"Vent moyen et rafales - données minutes du {min(data_date).strftime('%d')} {min(data_date).strftime('%h')} {min(data_date).strftime('%Y')} à {min(data_date).strftime('%H:%M')} au {max(data_date).strftime('%d')} {max(data_date).strftime('%h')} {max(data_date).strftime('%Y')} à {max(data_date).strftime('%H:%M')}, heure {str(fuseau)}", fontsize=15)
-  ax.text(x=0.5, y=1.1 , s=f"Vent moyen et rafales", fontsize=16, weight='bold', ha='center', va='bottom', transform=ax.transAxes)
-  ax.text(x=0.5, y=1.05, s=f"Données minutes du {min(data_date).strftime('%d')} {min(data_date).strftime('%h')} {min(data_date).strftime('%Y')} à {min(data_date).strftime('%H:%M')} au {max(data_date).strftime('%d')} {max(data_date).strftime('%h')} {max(data_date).strftime('%Y')} à {max(data_date).strftime('%H:%M')}", fontsize=8, alpha=0.75, ha='center', va='bottom', transform=ax.transAxes)
-  _, ylim = ax.get_ylim()
-  ax.set_ylim(bottom=bmin, top=bmax)
-  l=4
-  axins = inset_axes(ax, width=0.984 * l, height=0.157 * l, borderpad=0, loc="upper right")
-  axins.imshow(logo, alpha=0.5)
-  axins.axis('off')
+  figure.texte(ax, 'titre', f"Vent moyen et rafales", x=0.5, y=1.1, fontsize=16, weight='bold', ha='center', va='bottom', transform=ax.transAxes)
+  ax.set_ylim(bottom=inverse(bmin), top=inverse(bmax))
+  figure.ajout_logo(logo)
 
   return fig, ax, chemin_figure
 
-def figure_pression(data, unite):
+def figure_pression(data, unite, figures=figures):
   # Trace la pression atmosphérique
   logging.info("Le fichier png est enregistré sous : " + emplacement_figure)
   existence_repertoire(emplacement_figure)
@@ -379,60 +297,63 @@ def figure_pression(data, unite):
   chemin_figure = os.path.join(emplacement_figure, fichier_figure)
   logging.info("Nom du fichier png: " + chemin_figure)
 
-  # Date
-  data_date = data['DATE'] + datetime.timedelta(hours=decalage[fuseau])
-
   # Paramètres du graphe
   ratio = 0.002
 
-
-  # Conversion à la demande
+  # Unité demandée : bornes de l'axe des ordonnées, conversion depuis les hPa de la série
   if unite == 'mmHg':
-    data_P = data['P']*0.75
     ymax = 765
     ymin = 675
   elif unite == 'hPa':
-    data_P = data['P']
     ymin = 930
     ymax = 1020
   else:
     logging.error("Unité de pression inconnue !")
     exit(1)
-
-
-  # Calculs des bornes de l'axe des ordonnées
-  if max(data_P)+abs(ratio*max(data_P)) > ymax:
+  directe, inverse = CONVERSIONS[unite]
+
+  # Tracé du graphe dans la figure persistante de la variable, les séries étant tracées par niveaux de détail (enveloppe
+  # min/max par colonne de pixels de la fenêtre visible, recalculée à chaque zoom)
+  # La courbe est tracée en hPa et n'est recalculée que pour de nouvelles données : un changement d'unité ne modifie
+  # que la graduation de l'axe et ses bornes
+  figure = figure_persistante(figures, 'pression')
+  fig, ax = figure.fig, figure.ax
+  if figure.nouvelles_donnees(data, fuseau):
+    # Date
+    data_date = dates_locales(data, decalage[fuseau])
+    data_P = data['P']
+    figure.ligne_detaillee(ax, 'P', data_date, data_P, linewidth=1, color='darkblue', label='P')
+    ax.autoscale(axis='x', tight='true')
+    premiere_date, derniere_date = [date + datetime.timedelta(hours=decalage[fuseau]) for date in extremes(data, 'DATE')]
+    figure.texte(ax, 'sous_titre', f"Données minutes du {premiere_date.strftime('%d')} {premiere_date.strftime('%h')} {premiere_date.strftime('%Y')} à {premiere_date.strftime('%H:%M')} au {derniere_date.strftime('%d')} {derniere_date.strftime('%h')} {derniere_date.strftime('%Y')} à {derniere_date.strftime('%H:%M')}", x=0.5, y=1.05, fontsize=8, alpha=0.75, ha='center', va='bottom', transform=ax.transAxes)
+    P_min, P_max = extremes(data, 'P')
+    figure.statistiques = {'P_max':P_max, 'P_min':P_min}
+
+  # Calculs des bornes de l'axe des ordonnées, dans l'unité demandée
+  P_max = directe(figure.statistiques['P_max'])
+  P_min = directe(figure.statistiques['P_min'])
+  if P_max+abs(ratio*P_max) > ymax:
     bmax = ymax
   else:
-    bmax = max(data_P)+ratio*abs(max(data_P))
-  if min(data_P)-ratio*min(data_P) < ymin:
+    bmax = P_max+ratio*abs(P_max)
+  if P_min-ratio*P_min < ymin:
     bmin = ymin
   else:
-    bmin = min(data_P)-ratio*abs(min(data_P))
-
+    bmin = P_min-ratio*abs(P_min)
 
-  # Tracé du graphe
-  fig, ax = plt.subplots(1, 1, figsize=(16, 9))
-  ax.plot(np.array(data_date),np.array(data_P), linewidth=1, color='darkblue', label='P')
-  ax.axhline(0, color='grey', linestyle='--')
+  figure.ligne_horizontale(ax, 'zero', inverse(0), color='grey', linestyle='--')
 #  ax.grid(b=True, which='both', axis='both', color='lightgrey', zorder=1)
   ax.set_xlabel(f"date et heure {str(fuseau)}")
-  ax.set_ylabel(f"Pression atmosphérique [{str(unite)}]")
-  ax.autoscale(axis='x', tight='true')
+  figure.axe_unite(ax, directe, inverse, f"Pression atmosphérique [{str(unite)}]")
   fig.autofmt_xdate()
   #ax.set_title(f"Pression atmosphérique - données minutes du {min(data_date).strftime('%d')} {min(data_date).strftime('%h')} {min(data_date).strftime('%Y')} à {min(data_date).strftime('%H:%M')} au {max(data_date).strftime('%d')} {max(data_date).strftime('%h')} {max(data_date).strftime('%Y')} à {max(data_date).strftime('%H:%M')}, heure {str(fuseau)}", fontsize=15)
-  ax.text(x=0.5, y=1.1 , s=f"Pression atmosphérique", fontsize=16, weight='bold', ha='center', va='bottom', transform=ax.transAxes)
-  ax.text(x=0.5, y=1.05, s=f"Données minutes du {min(data_date).strftime('%d')} {min(data_date).strftime('%h')} {min(data_date).strftime('%Y')} à {min(data_date).strftime('%H:%M')} au {max(data_date).strftime('%d')} {max(data_date).strftime('%h')} {max(data_date).strftime('%Y')} à {max(data_date).strftime('%H:%M')}", fontsize=8, alpha=0.75, ha='center', va='bottom', transform=ax.transAxes)
-  _, ylim = ax.get_ylim()
-  ax.set_ylim(bottom=bmin, top=bmax)
-  l=4
-  axins = inset_axes(ax, width=0.984*l, height=0.157*l, borderpad=0, loc="upper right")
-  axins.imshow(logo, alpha=0.5)
-  axins.axis('off')
+  figure.texte(ax, 'titre', f"Pression atmosphérique", x=0.5, y=1.1, fontsize=16, weight='bold', ha='center', va='bottom', transform=ax.transAxes)
+  ax.set_ylim(bottom=inverse(bmin), top=inverse(bmax))
+  figure.ajout_logo(logo)
 
   return fig, ax, chemin_figure
 
-def figure_temperature(data,unite):
+def figure_temperature(data, unite, figures=figures):
   # Trace la température sous abri et la température ressentie
   logging.info("Le fichier png est enregistré sous : " + emplacement_figure)
   existence_repertoire(emplacement_figure)
@@ -444,71 +365,72 @@ def figure_temperature(data,unite):
   chemin_figure = os.path.join(emplacement_figure, fichier_figure)
   logging.info("Nom du fichier png: " + chemin_figure)
 
-  # Date
-  data_date = data['DATE'] + datetime.timedelta(hours=decalage[fuseau])
-
-  # Calcul de la température ressentie
-  data_Tres = 13.12+0.6215*(data['T'])+(0.3965*data['T']-11.37)*(data['FF']*3.6)**0.16
-
-
-  # Conversion à la demande
+  # Unité demandée : bornes de l'axe des ordonnées, conversion depuis les °C des séries
   if unite == '°C':
-    data_T=data['T']
     ymin=-45
     ymax=10
     ratio=0.2
   elif unite == '°F':
-    data_T=data['T']*1.8+32
-    data_Tres=data_Tres*1.8+32
     ymax=10*1.8+32
     ymin=-45*1.8+32
     ratio=0.2
   elif unite == 'K' :
-    data_T=data['T']+273.15
-    data_Tres=data_Tres+273.15
     ymax=10+273.15
     ymin=-45+273.5
     ratio=0.002
   else:
     logging.error("Unité de température inconnue !")
     exit(1)
-
-  # Calculs des bornes de l'axe des ordonnées
-  if max(data_T)+abs(ratio*max(data_T)) > ymax:
+  directe, inverse = CONVERSIONS[unite]
+
+  # Tracé du graphe dans la figure persistante de la variable, les séries étant tracées par niveaux de détail (enveloppe
+  # min/max par colonne de pixels de la fenêtre visible, recalculée à chaque zoom)
+  # Les courbes sont tracées en °C et ne sont recalculées que pour de nouvelles données : un changement d'unité ne
+  # modifie que la graduation de l'axe et ses bornes
+  figure = figure_persistante(figures, 'temperature')
+  fig, ax = figure.fig, figure.ax
+  if figure.nouvelles_donnees(data, fuseau):
+    # Date
+    data_date = dates_locales(data, decalage[fuseau])
+
+    # Calcul de la température ressentie
+    data_T = data['T']
+    data_Tres = 13.12+0.6215*(data['T'])+(0.3965*data['T']-11.37)*(data['FF']*3.6)**0.16
+
+    figure.ligne_detaillee(ax, 'T', data_date, data_T, linewidth=1, color='blue', label='T sous abri')
+    figure.ligne_detaillee(ax, 'Tres', data_date, data_Tres, linewidth=1, color='black', label='T ressentie')
+    ax.autoscale(axis='x', tight='true')
+    premiere_date, derniere_date = [date + datetime.timedelta(hours=decalage[fuseau]) for date in extremes(data, 'DATE')]
+    figure.texte(ax, 'sous_titre', f"Données minutes du {premiere_date.strftime('%d')} {premiere_date.strftime('%h')} {premiere_date.strftime('%Y')} à {premiere_date.strftime('%H:%M')} au {derniere_date.strftime('%d')} {derniere_date.strftime('%h')} {derniere_date.strftime('%Y')} à {derniere_date.strftime('%H:%M')}", x=0.5, y=1.05, fontsize=8, alpha=0.75, ha='center', va='bottom', transform=ax.transAxes)
+    figure.statistiques = {'T_max':extremes(data, 'T')[1], 'Tres_min':extremes_valeurs(data_Tres)[0]}
+
+  # Calculs des bornes de l'axe des ordonnées, dans l'unité demandée
+  T_max = directe(figure.statistiques['T_max'])
+  Tres_min = directe(figure.statistiques['Tres_min'])
+  if T_max+abs(ratio*T_max) > ymax:
     bmax = ymax
   else:
-    bmax = max(data_T)+ratio*abs(max(data_T))
-  if min(data_Tres)-ratio*min(data_Tres) < ymin :
+    bmax = T_max+ratio*abs(T_max)
+  if Tres_min-ratio*Tres_min < ymin :
     bmin = ymin
   else :
-    bmin = min(data_Tres)-ratio*abs(min(data_Tres))
-
+    bmin = Tres_min-ratio*abs(Tres_min)
 
-  # Tracé du graphe
-  fig, ax = plt.subplots(1, 1, figsize=(16, 9))
-  ax.plot(np.array(data_date),np.array(data_T), linewidth=1, color='blue', label='T sous abri')
-  ax.plot(np.array(data_date),np.array(data_Tres), linewidth=1, color='black', label='T ressentie')
-  ax.axhline(0, color='grey', linestyle='--')
+  figure.ligne_horizontale(ax, 'zero', inverse(0), color='grey', linestyle='--')
 #  ax.grid(b=True, which='both', axis='both', color='lightgrey', zorder=1)
   ax.set_xlabel(f"date et heure {str(fuseau)}")
-  ax.set_ylabel(f"Températures [{str(unite)}]")
-  ax.autoscale(axis='x', tight='true')
+  figure.axe_unite(ax, directe, inverse, f"Températures [{str(unite)}]")
   fig.autofmt_xdate()
   #ax.set_title(f"Températures - données minutes du {min(data_date).strftime('%d')} {min(data_date).strftime('%h')} {min(data_date).strftime('%Y')} à {min(data_date).strftime('%H:%M')} au {max(data_date).strftime('%d')} {max(data_date).strftime('%h')} {max(data_date).strftime('%Y')} à {max(data_date).strftime('%H:%M')}, heure {str(fuseau)}", fontsize=15)
-  ax.text(x=0.5, y=1.1 , s=f"Températures", fontsize=16, weight='bold', ha='center', va='bottom', transform=ax.transAxes)
-  ax.text(x=0.5, y=1.05, s=f"Données minutes du {min(data_date).strftime('%d')} {min(data_date).strftime('%h')} {min(data_date).strftime('%Y')} à {min(data_date).strftime('%H:%M')} au {max(data_date).strftime('%d')} {max(data_date).strftime('%h')} {max(data_date).strftime('%Y')} à {max(data_date).strftime('%H:%M')}", fontsize=8, alpha=0.75, ha='center', va='bottom', transform=ax.transAxes)
-  _, ylim = ax.get_ylim()
-  ax.set_ylim(bottom=bmin, top=bmax)
+  figure.texte(ax, 'titre', f"Températures", x=0.5, y=1.1, fontsize=16, weight='bold', ha='center', va='bottom', transform=ax.transAxes)
+  ax.set_ylim(bottom=inverse(bmin), top=inverse(bmax))
   handles, labels = ax.get_legend_handles_labels()
   ax.legend([handles[x] for x in [0, 1]], [labels[x] for x in [0, 1]], loc="upper left", ncol=len(handles))
-  l=4
-  axins = inset_axes(ax, width=0.984 * l, height=0.157 * l, borderpad=0, loc="upper right")
-  axins.imshow(logo, alpha=0.5)
-  axins.axis('off')
+  figure.ajout_logo(logo)
 
   return fig, ax, chemin_figure
 
-def figure_humidite(data):
+def figure_humidite(data, figures=figures):
   # Trace l'humidité relative
   logging.info("Le fichier png est enregistré sous : " + emplacement_figure)
   existence_repertoire(emplacement_figure)
@@ -520,49 +442,53 @@ def figure_humidite(data):
   chemin_figure = os.path.join(emplacement_figure, fichier_figure)
   logging.info("Nom du fichier png: " + chemin_figure)
 
-  # Date
-  data_date = data['DATE'] + datetime.timedelta(hours=decalage[fuseau])
-
   # Paramètres du graphe
   ymax = 100
   ymin = 0
   unite = '%'
   ratio = 0.1
-  data_U = data['U']
 
+  # Tracé du graphe dans la figure persistante de la variable, les séries étant tracées par niveaux de détail (enveloppe
+  # min/max par colonne de pixels de la fenêtre visible, recalculée à chaque zoom)
+  # La courbe n'est recalculée que pour de nouvelles données : un nouvel affichage conserve le zoom
+  figure = figure_persistante(figures, 'humidite')
+  fig, ax = figure.fig, figure.ax
+  if figure.nouvelles_donnees(data, fuseau):
+    # Date
+    data_date = dates_locales(data, decalage[fuseau])
+    data_U = data['U']
+    figure.ligne_detaillee(ax, 'U', data_date, data_U, linewidth=1, color='darkblue', label='P')
+    ax.autoscale(axis='x', tight='true')
+    premiere_date, derniere_date = [date + datetime.timedelta(hours=decalage[fuseau]) for date in extremes(data, 'DATE')]
+    figure.texte(ax, 'sous_titre', f"Données minutes du {premiere_date.strftime('%d')} {premiere_date.strftime('%h')} {premiere_date.strftime('%Y')} à {premiere_date.strftime('%H:%M')} au {derniere_date.strftime('%d')} {derniere_date.strftime('%h')} {derniere_date.strftime('%Y')} à {derniere_date.strftime('%H:%M')}", x=0.5, y=1.05, fontsize=8, alpha=0.75, ha='center', va='bottom', transform=ax.transAxes)
+    U_min, U_max = extremes(data, 'U')
+    figure.statistiques = {'U_min':U_min, 'U_max':U_max}
 
   # Calculs des bornes de l'axe des ordonnées
-  if max(data['U'])+abs(ratio*max(data['U'])) > ymax:
+  U_min, U_max = figure.statistiques['U_min'], figure.statistiques['U_max']
+  if U_max+abs(ratio*U_max) > ymax:
     bmax = ymax
   else :
-    bmax = max(data['U'])+ratio*abs(max(data['U']))
-  if min(data['U'])-ratio*min(data['U']) < ymin:
+    bmax = U_max+ratio*abs(U_max)
+  if U_min-ratio*U_min < ymin:
     bmin = ymin
   else:
-    bmin = min(data['U'])-ratio*abs(min(data['U']))
+    bmin = U_min-ratio*abs(U_min)
 
-  # Tracé du graphe
-  fig, ax = plt.subplots(1, 1, figsize=(16, 9))
-  ax.plot(np.array(data_date),np.array(data_U), linewidth=1, color='darkblue', label='P')
-  ax.axhline(0, color='grey', linestyle='--')
+  figure.ligne_horizontale(ax, 'zero', 0, color='grey', linestyle='--')
 #  ax.grid(b=True, which='both', axis='both', color='lightgrey', zorder=1)
   ax.set_xlabel(f"date et heure {str(fuseau)}")
   ax.set_ylabel(f"Humidité relative [{str(unite)}]")
-  ax.autoscale(axis='x', tight='true')
   fig.autofmt_xdate()
   #ax.set_title(f"Humidité relative - données minutes du {min(data_date).strftime('%d')} {min(data_date).strftime('%h')} {min(data_date).strftime('%Y')} à {min(data_date).strftime('%H:%M')} au {max(data_date).strftime('%d')} {max(data_date).strftime('%h')} {max(data_date).strftime('%Y')} à {max(data_date).strftime('%H:%M')}, heure {str(fuseau)}", fontsize=15)
-  ax.text(x=0.5, y=1.1 , s=f"Humidité Relative", fontsize=16, weight='bold', ha='center', va='bottom', transform=ax.transAxes)
-  ax.text(x=0.5, y=1.05, s=f"Données minutes du {min(data_date).strftime('%d')} {min(data_date).strftime('%h')} {min(data_date).strftime('%Y')} à {min(data_date).strftime('%H:%M')} au {max(data_date).strftime('%d')} {max(data_date).strftime('%h')} {max(data_date).strftime('%Y')} à {max(data_date).strftime('%H:%M')}", fontsize=8, alpha=0.75, ha='center', va='bottom', transform=ax.transAxes)
+  figure.texte(ax, 'titre', f"Humidité Relative", x=0.5, y=1.1, fontsize=16, weight='bold', ha='center', va='bottom', transform=ax.transAxes)
   #_, ylim = ax.get_ylim()  _, ylim = ax.get_ylim()
   ax.set_ylim(bottom=bmin, top=bmax)
-  l=4
-  axins = inset_axes(ax, width=0.984 * l, height=0.157 * l, borderpad=0, loc="upper right")
-  axins.imshow(logo, alpha=0.5)
-  axins.axis('off')
+  figure.ajout_logo(logo)
 
   return fig, ax, chemin_figure
 
-def figure_rayonnement(data):
+def figure_rayonnement(data, figures=figures):
   # Trace le rayonnement global
   logging.info("Le fichier png est enregistré sous : " + emplacement_figure)
   existence_repertoire(emplacement_figure)
@@ -574,45 +500,48 @@ def figure_rayonnement(data):
   chemin_figure = os.path.join(emplacement_figure, fichier_figure)
   logging.info("Nom du fichier png: " + chemin_figure)
 
-  # Date
-  data_date = data['DATE'] + datetime.timedelta(hours=decalage[fuseau])
-
   # Paramètres du graphe
   ymax = 900
   ymin = 0
   unite = 'W/m2'
   ratio = 0.1
-  data_RG = data['RG']/60
 
+  # Tracé du graphe dans la figure persistante de la variable, les séries étant tracées par niveaux de détail (enveloppe
+  # min/max par colonne de pixels de la fenêtre visible, recalculée à chaque zoom)
+  # La courbe n'est recalculée que pour de nouvelles données : un nouvel affichage conserve le zoom
+  figure = figure_persistante(figures, 'rayonnement')
+  fig, ax = figure.fig, figure.ax
+  if figure.nouvelles_donnees(data, fuseau):
+    # Date
+    data_date = dates_locales(data, decalage[fuseau])
+    data_RG = data['RG']/60
+    figure.ligne_detaillee(ax, 'RG', data_date, data_RG, linewidth=1, color='darkblue', label='P')
+    ax.autoscale(axis='x', tight='true')
+    premiere_date, derniere_date = [date + datetime.timedelta(hours=decalage[fuseau]) for date in extremes(data, 'DATE')]
+    figure.texte(ax, 'sous_titre', f"Données minutes du {premiere_date.strftime('%d')} {premiere_date.strftime('%h')} {premiere_date.strftime('%Y')} à {premiere_date.strftime('%H:%M')} au {derniere_date.strftime('%d')} {derniere_date.strftime('%h')} {derniere_date.strftime('%Y')} à {derniere_date.strftime('%H:%M')}", x=0.5, y=1.05, fontsize=8, alpha=0.75, ha='center', va='bottom', transform=ax.transAxes)
+    RG_min, RG_max = [valeur/60 for valeur in extremes(data, 'RG')]
+    figure.statistiques = {'RG_min':RG_min, 'RG_max':RG_max}
 
   # Calculs des bornes de l'axe des ordonnées
-  if max(data_RG)+abs(ratio*max(data_RG)) > ymax:
+  RG_min, RG_max = figure.statistiques['RG_min'], figure.statistiques['RG_max']
+  if RG_max+abs(ratio*RG_max) > ymax:
     bmax = ymax
   else :
-    bmax = max(data_RG)+ratio*abs(max(data_RG))
-  if min(data_RG)-ratio*min(data_RG) < ymin:
+    bmax = RG_max+ratio*abs(RG_max)
+  if RG_min-ratio*RG_min < ymin:
     bmin = ymin
   else:
-    bmin = min(data_RG)-ratio*abs(min(data_RG))
+    bmin = RG_min-ratio*abs(RG_min)
 
-  # Tracé du graphe
-  fig, ax = plt.subplots(1, 1, figsize=(16, 9))
-  ax.plot(np.array(data_date),np.array(data_RG), linewidth=1, color='darkblue', label='P')
-  ax.axhline(0, color='grey', linestyle='--')
+  figure.ligne_horizontale(ax, 'zero', 0, color='grey', linestyle='--')
 #  ax.grid(b=True, which='both', axis='both', color='lightgrey', zorder=1)
   ax.set_xlabel(f"date et heure {str(fuseau)}")
   ax.set_ylabel(f"Rayonnement Global [{str(unite)}]")
-  ax.autoscale(axis='x', tight='true')
   fig.autofmt_xdate()
   #ax.set_title(f"Rayonnement Global - données minutes du {min(data_date).strftime('%d')} {min(data_date).strftime('%h')} {min(data_date).strftime('%Y')} à {min(data_date).strftime('%H:%M')} au {max(data_date).strftime('%d')} {max(data_date).strftime('%h')} {max(data_date).strftime('%Y')} à {max(data_date).strftime('%H:%M')}, heure {str(fuseau)}", fontsize=15)
-  ax.text(x=0.5, y=1.1 , s=f"Rayonnement global", fontsize=16, weight='bold', ha='center', va='bottom', transform=ax.transAxes)
-  ax.text(x=0.5, y=1.05, s=f"Données minutes du {min(data_date).strftime('%d')} {min(data_date).strftime('%h')} {min(data_date).strftime('%Y')} à {min(data_date).strftime('%H:%M')} au {max(data_date).strftime('%d')} {max(data_date).strftime('%h')} {max(data_date).strftime('%Y')} à {max(data_date).strftime('%H:%M')}", fontsize=8, alpha=0.75, ha='center', va='bottom', transform=ax.transAxes)
-  _, ylim = ax.get_ylim()
+  figure.texte(ax, 'titre', f"Rayonnement global", x=0.5, y=1.1, fontsize=16, weight='bold', ha='center', va='bottom', transform=ax.transAxes)
   ax.set_ylim(bottom=bmin, top=bmax)
-  l=4
-  axins = inset_axes(ax, width=0.984 * l, height=0.157 * l, borderpad=0, loc="upper right")
-  axins.imshow(logo, alpha=0.5)
-  axins.axis('off')
+  figure.ajout_logo(logo)
 
   return fig, ax, chemin_figure
 
@@ -625,9 +554,19 @@ def get_dpi():
   return current_dpi
 
 def affichage_figure(canvas, figure):
-  # Affichage de la figure
-  tkcanvas = FigureCanvasTkAgg(figure, canvas)
+  # Affichage de la figure : le widget Tk de chaque figure persistante et sa barre d'outils (zoom, déplacement) sont
+  # créés une seule fois, puis redessinés ; les widgets des autres figures sont masqués
+  # L'historique des vues de la barre d'outils est réinitialisé : le bouton "Home" revient à la vue du dernier tracé
+  for tkcanvas, toolbar in widgets_figures.values():
+    toolbar.pack_forget()
+    tkcanvas.get_tk_widget().pack_forget()
+  if figure not in widgets_figures:
+    tkcanvas = FigureCanvasTkAgg(figure, canvas)
+    widgets_figures[figure] = (tkcanvas, NavigationToolbar2Tk(tkcanvas, canvas, pack_toolbar=False))
+  tkcanvas, toolbar = widgets_figures[figure]
   tkcanvas.draw()
+  toolbar.update()
+  toolbar.pack(side='bottom', fill='x')
   tkcanvas.get_tk_widget().pack(side='top', fill='both', expand=1)
   return tkcanvas
 
@@ -643,6 +582,9 @@ def modification_date(window):
 #############  PROGRAMME PRINCIPAL #############
 
 if (__name__ == "__main__"):
+  # Fichier de log, ouvert uniquement par le programme principal (les processus de lecture des fichiers réimportent ce module)
+  logging.basicConfig(level=logging.DEBUG, filename="py_log.log",filemode="w")
+
   # Paramètres fixes
   jours = ["{:02d}".format(x) for x in range(1,32)]
   mois = ["{:02d}".format(x) for x in range(1,13)]
@@ -678,6 +620,7 @@ if (__name__ == "__main__"):
 
   ## Emplacements
   emplacement_minute = sg.user_settings_get_entry('-emplacement_minute-', os.path.join("N:/partageMto_DON_SA/Minute/", annee_debut))
+  archive_minute = sg.user_settings_get_entry('-archive_minute-', '')
   emplacement_figure = sg.user_settings_get_entry('-emplacement_figure-', os.path.join(os.path.dirname(__file__), 'figures'))
   emplacement_csv = sg.user_settings_get_entry('-emplacement_csv-', os.path.join(os.path.dirname(__file__), 'csv'))
 
@@ -687,11 +630,20 @@ if (__name__ == "__main__"):
   ## Données en mémoire
   donnees_en_memoire = vide
 
+  ## Récupération en cours : période demandée et signal d'annulation du thread de lecture
+  donnees_demandees = vide
+  annulation = threading.Event()
+
   ## Unités des figures
   unite_vent = sg.user_settings_get_entry('-unite_vent-', 'kt')
   unite_pression = sg.user_settings_get_entry('-unite_pression-', 'hPa')
   unite_temperature = sg.user_settings_get_entry('-unite_temperature-', '°C')
   chemin_figure = None
+  figure_courante = None
+
+  ## Exports png en cours et figures exportées
+  exports_en_cours = 0
+  figures_exportees = []
 
   ## Export CSV
   csv_p = sg.user_settings_get_entry('-csv_p-', True)
@@ -709,6 +661,10 @@ if (__name__ == "__main__"):
                               sg.In(size=(80,1), enable_events=True ,key='-emplacement_minute-', default_text=emplacement_minute),
                               sg.FolderBrowse("Répertoires") ] ]
 
+  sg_archive_minute = [ [ sg.Text('Archive minute', size=13),
+                          sg.In(size=(80,1), enable_events=True ,key='-archive_minute-', default_text=archive_minute),
+                          sg.FileBrowse("Fichiers", file_types=(("Archive", "*.npy"),)) ] ]
+
   sg_emplacement_csv = [ [sg.Text('Fichiers csv', size=13),
                           sg.In(size=(80,1), enable_events=True ,key='-emplacement_csv-', default_text=emplacement_csv),
                           sg.FolderBrowse("Répertoires") ] ]
@@ -718,6 +674,7 @@ if (__name__ == "__main__"):
                               sg.FolderBrowse("Répertoires") ] ]
 
   frame_layout_emplacement = [ [ sg.Column(sg_emplacement_minute, element_justification='c') ],
+                               [ sg.Column(sg_archive_minute, element_justification='c') ],
                                [ sg.Column(sg_emplacement_csv, element_justification='c') ],
                                [ sg.Column(sg_emplacement_figure, element_justification='c') ] ]
 
@@ -754,6 +711,8 @@ if (__name__ == "__main__"):
 
   ## Frame 3 : récupération des données
   sg_donnees = [ [ sg.Button('Récupérer', enable_events=True ,key='-recuperation_donnees-'),
+                   sg.ProgressBar(1, orientation='h', size=(15, 20), key='-barre_donnees-'),
+                   sg.Button('Annuler', enable_events=True, disabled=True, key='-annulation_donnees-'),
                    sg.Text('Données actuellement chargées:', justification='right'),
                    sg.Text(donnees_en_memoire, background_color="darkred", text_color='white', key='-donnees_en_memoire-', justification='left') ] ]
 
@@ -775,7 +734,8 @@ if (__name__ == "__main__"):
                 [ sg.Button('Humidité', size=(12,1), enable_events=True ,key='-figure_humidite-') ],
                 [ sg.Button('Rayonnement', size=(12,1), enable_events=True ,key='-figure_rayonnement-') ],
                 [ sg.Button('Autres', size=(12,1), enable_events=True ,key='-figure_autres-') ],
-                [ sg.Button('Exporter la figure en PNG', enable_events=True ,key='-export_figure-', expand_x=True) ] ]
+                [ sg.Button('Exporter la figure en PNG', enable_events=True ,key='-export_figure-', expand_x=True) ],
+                [ sg.Button('Exporter toutes les figures en PNG', enable_events=True ,key='-export_figures-', expand_x=True) ] ]
 
   sg_export_csv = [ [ sg.Checkbox('P', default=csv_p, enable_events=True, key='-csv_p-'),
                       sg.Checkbox('T', default=csv_t, enable_events=True, key='-csv_t-'),
@@ -806,6 +766,10 @@ if (__name__ == "__main__"):
   ## Création de la fenêtre
   window = sg.Window('Visualisation simple des fichiers "minutes" - DDU', layout, resizable=True)
 
+  ## File d'attente des exports png : les figures sont tracées et enregistrées par un thread de travail, qui signale
+  ## chaque export à la fenêtre
+  file_export = FileExport(lambda nom, chemin, erreur: window.write_event_value('-figure_exportee-', (nom, chemin, erreur)))
+
   # Gestion des événements
   while True:
     ## Récupération de l'événement et des valeurs
@@ -815,6 +779,7 @@ if (__name__ == "__main__"):
 
     ## Quitter normalement
     if event in (sg.WIN_CLOSED, 'Exit'):
+      annulation.set()
       break
 
     ## Emplacements
@@ -822,6 +787,10 @@ if (__name__ == "__main__"):
       logging.info("Value: " + values[event])
       emplacement_minute = values[event]
       sg.user_settings_set_entry(event, values[event])
+    if event == '-archive_minute-':
+      logging.info("Value: " + values[event])
+      archive_minute = values[event]
+      sg.user_settings_set_entry(event, values[event])
     if event == '-emplacement_figure-':
       logging.info("Value: " + values[event])
       emplacement_figure = values[event]
@@ -943,9 +912,29 @@ if (__name__ == "__main__"):
 
     ## Récupération des données
     if event == '-recuperation_donnees-':
-      data, success = recuperation_donnees()
-      if success:
-        donnees_en_memoire = jour_debut + "/" + mois_debut + "/" + annee_debut + " - " + heure_debut + ":" + minute_debut + "  >>>  " + jour_fin + "/" + mois_fin + "/" + annee_fin + " - " + heure_fin + ":" + minute_fin
+      if recuperation_donnees(window, annulation):
+        donnees_demandees = jour_debut + "/" + mois_debut + "/" + annee_debut + " - " + heure_debut + ":" + minute_debut + "  >>>  " + jour_fin + "/" + mois_fin + "/" + annee_fin + " - " + heure_fin + ":" + minute_fin
+        window['-recuperation_donnees-'].update(disabled=True)
+        window['-annulation_donnees-'].update(disabled=False)
+    if event == '-annulation_donnees-':
+      logging.info("Annulation de la récupération des données")
+      annulation.set()
+      window['-annulation_donnees-'].update(disabled=True)
+    if event == '-progression_donnees-':
+      window['-barre_donnees-'].update(current_count=values[event][0], max=values[event][1])
+    if event == '-donnees_recuperees-':
+      window['-recuperation_donnees-'].update(disabled=False)
+      window['-annulation_donnees-'].update(disabled=True)
+      window['-barre_donnees-'].update(current_count=0)
+      if values[event] is None:
+        if not annulation.is_set():
+          sg.popup_ok("Erreur lors de la lecture des données", title="Erreur", keep_on_top=True)
+      elif values[event].empty:
+        logging.critical("Pas de donnée pour la période demandée")
+        sg.popup_ok("Pas de donnée pour la période demandée", title="Erreur", keep_on_top=True)
+      else:
+        data = values[event]
+        donnees_en_memoire = donnees_demandees
         window['-donnees_en_memoire-'].update(donnees_en_memoire, "green", "white" )
 
     ## Figure vent
@@ -971,12 +960,11 @@ if (__name__ == "__main__"):
       if donnees_en_memoire == vide:
         sg.popup_ok("Mémoire vide... Récupérez des données et recommencez !", title="Erreur", keep_on_top=True)
       else:
-        if 'tkcanvas' in globals():
-          tkcanvas.get_tk_widget().destroy()
         if event == '-unite_vent_bf-':
           sg.popup_ok("Pas encore de figure pour les indices beaufort", title="Erreur", keep_on_top=True)
         else:
           fig, ax, chemin_figure = figure_vent(data, unite_vent)
+          figure_courante = ('vent', instantane(figure_vent), (data, unite_vent))
           tkcanvas = affichage_figure(window['-CANVAS-'].TKCanvas, fig)
 
     ## Figure pression
@@ -993,9 +981,8 @@ if (__name__ == "__main__"):
       if donnees_en_memoire == vide:
         sg.popup_ok("Mémoire vide... Récupérez des données et recommencez !", title="Erreur", keep_on_top=True)
       else:
-        if 'tkcanvas' in globals():
-          tkcanvas.get_tk_widget().destroy()
         fig, ax, chemin_figure = figure_pression(data,unite_pression)   # unité possibles : 'hPa' ou 'mmHg'
+        figure_courante = ('pression', instantane(figure_pression), (data, unite_pression))
         tkcanvas = affichage_figure(window['-CANVAS-'].TKCanvas, fig)
 
     ## Figure température
@@ -1016,9 +1003,8 @@ if (__name__ == "__main__"):
       if donnees_en_memoire == vide:
         sg.popup_ok("Mémoire vide... Récupérez des données et recommencez !", title="Erreur", keep_on_top=True)
       else:
-        if 'tkcanvas' in globals():
-          tkcanvas.get_tk_widget().destroy()
         fig, ax, chemin_figure = figure_temperature(data,unite_temperature)   # unité possibles : 'hPa' ou 'mmHg'
+        figure_courante = ('temperature', instantane(figure_temperature), (data, unite_temperature))
         tkcanvas = affichage_figure(window['-CANVAS-'].TKCanvas, fig)
 
     ## Figure humidité
@@ -1027,9 +1013,8 @@ if (__name__ == "__main__"):
       if donnees_en_memoire == vide:
         sg.popup_ok("Mémoire vide... Récupérez des données et recommencez !", title="Erreur", keep_on_top=True)
       else:
-        if 'tkcanvas' in globals():
-          tkcanvas.get_tk_widget().destroy()
         fig, ax, chemin_figure = figure_humidite(data)
+        figure_courante = ('humidite', instantane(figure_humidite), (data,))
         tkcanvas = affichage_figure(window['-CANVAS-'].TKCanvas, fig)
 
     ## Figure rayonnement
@@ -1038,9 +1023,8 @@ if (__name__ == "__main__"):
       if donnees_en_memoire == vide:
         sg.popup_ok("Mémoire vide... Récupérez des données et recommencez !", title="Erreur", keep_on_top=True)
       else:
-        if 'tkcanvas' in globals():
-          tkcanvas.get_tk_widget().destroy()
         fig, ax, chemin_figure = figure_rayonnement(data)
+        figure_courante = ('rayonnement', instantane(figure_rayonnement), (data,))
         tkcanvas = affichage_figure(window['-CANVAS-'].TKCanvas, fig)
                                                                                                                     
 
@@ -1062,9 +1046,33 @@ if (__name__ == "__main__"):
       if chemin_figure == None:
         sg.popup_ok("Impossible d'exporter une figure qui n'existe pas !", title="Erreur", keep_on_top=True)
       else:
-        plt.savefig(chemin_figure, bbox_inches="tight")
-        plt.close(fig)
-        sg.popup_ok("Fichier " + chemin_figure + " exporté", title="Confirmation", keep_on_top=True)
+        # Export de la figure affichée, avec son zoom et les paramètres (fuseau, dates, emplacement) de son tracé
+        nom, fonction, arguments = figure_courante
+        file_export.ajout(nom, fonction, *arguments, limites=limites_axes(fig))
+        exports_en_cours += 1
+    if event == '-export_figures-':
+      if donnees_en_memoire == vide:
+        sg.popup_ok("Mémoire vide... Récupérez des données et recommencez !", title="Erreur", keep_on_top=True)
+      else:
+        # Données compactes partagées par les cinq figures, comme pour l'affichage : chaque figure ne décode que ses
+        # colonnes et réutilise les extrêmes et l'axe des temps locaux déjà calculés
+        for nom, fonction, arguments in (('vent', figure_vent, (data, unite_vent)),
+                                         ('pression', figure_pression, (data, unite_pression)),
+                                         ('temperature', figure_temperature, (data, unite_temperature)),
+                                         ('humidite', figure_humidite, (data,)),
+                                         ('rayonnement', figure_rayonnement, (data,))):
+          file_export.ajout(nom, fonction, *arguments)
+          exports_en_cours += 1
+    if event == '-figure_exportee-':
+      nom, chemin, erreur = values[event]
+      exports_en_cours -= 1
+      if erreur is None:
+        figures_exportees.append(chemin)
+      else:
+        sg.popup_ok("Echec de l'export de la figure " + nom + " : " + erreur, title="Erreur", keep_on_top=True)
+      if exports_en_cours == 0 and len(figures_exportees) > 0:
+        sg.popup_ok("Fichier(s) " + ", ".join(figures_exportees) + " exporté(s)", title="Confirmation", keep_on_top=True)
+        figures_exportees = []
 
     ## Paramètres csv
     if event == '-csv_p-':
@@ -1106,3 +1114,7 @@ if (__name__ == "__main__"):
 
   # Fermeture de la fenêtre
   window.close()
+
+  # Arrêt du pool de processus de lecture de la session : les lectures de fichiers en attente sont annulées, sans
+  # attendre la fin d'un chargement interrompu
+  fermeture_pool_processus()
@@ -19,6 +19,7 @@ Il fonctionne en python3.12 et a besoin des librairies :
     - locale
     - matplotlib
     - sys
+    - threading
     - tkinter
     -.FreeSimpleGUI ou à défaut PySimpleGUI
     - logging
@@ -31,7 +32,6 @@ Modifications :
 """
 
 # Chargement des librairies
-import calendar
 import datetime
 import importlib
 import numpy as np
@@ -44,12 +44,14 @@ import matplotlib.dates as mdates
 import matplotlib.ticker as mticker
 import matplotlib.patches as mpatches
 import matplotlib.lines as mlines
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-from mpl_toolkits.axes_grid1.inset_locator import inset_axes
+from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
 import os
 from pandas.plotting import register_matplotlib_converters
 import sys
+import threading
 from tkinter import *
+from lecture_cobalt import SCHEMA_HORAIRE, chargement_mois, fermeture_pool_processus, taches_periode
+from outils_figures import CONVERSIONS, FileExport, dates_locales, extremes, extremes_valeurs, figure_persistante, instantane, limites_axes
 
 # Chargement de FreeSimpleGui, ou de PySimpleGui à défaut
 try:
@@ -63,7 +65,10 @@ pd.set_option('mode.chained_assignment',None)
 register_matplotlib_converters()
 #
 #logging.basicConfig( filename="py_log.log",filemode="w")
-logging.basicConfig(level=logging.DEBUG, filename="py_horaire_log.log",filemode="w")
+# Figures persistantes, une par variable, et widgets Tk associés, canevas et barre d'outils
+# (voir outils_figures.FigurePersistante)
+figures = {}
+widgets_figures = {}
 ############# DEFINITION DES FONCTIONS #############
 
 ### Environnement de travail :
@@ -87,76 +92,11 @@ def existence_repertoire(repertoire) :
     logging.error("Le réperoire " + repertoire + " n'existe pas, création du répertoire")
     os.mkdir(repertoire)
 
-def recuperation_donnees_mois_horaire(chemin_horaire, date_debut_fichier, date_fin_fichier):
-  # Récupération des données pour un seul mois, entre les dates date_debut_fichier et date_fin_fichier
-  # Renvoie la dataframe et un booléen indiquant si tout s'est bien passé
-  # ddmmyyyyhhmm;PSTASYN;TSYN;USYN;TDSYN;DINSH;RGH;DXY;FXY;DXI;FXI;DXY;FXY;DXI;FXI;
-  
-  # Test de l'existence du fichier
-  if not existence_fichier(chemin_horaire, False):
-    return None, False
-
-  # Lecture du fichier
-  data_horaire = pd.read_csv(chemin_horaire, sep=';', decimal=",", engine='python')
-
-  # Correction du zero manquant devant certaines dates
-  TMP = []
-  for x in range (0,len(data_horaire['ddmmyyyyhhmm'])):
-    if len(str(data_horaire['ddmmyyyyhhmm'][x])) == 11:
-      TMP.append('0'+str(data_horaire['ddmmyyyyhhmm'][x]))
-    else:
-      TMP.append(str(data_horaire['ddmmyyyyhhmm'][x]))
-  data_horaire['ddmmyyyyhhmm'] = TMP
-
-  # Index de début, index de fin 
-  index_debut = (data_horaire.ddmmyyyyhhmm == date_debut_fichier).idxmax()
-  index_fin = (data_horaire.ddmmyyyyhhmm == date_fin_fichier).idxmax()
-  if data_horaire['ddmmyyyyhhmm'][index_debut] != date_debut_fichier:
-    # Pas de date pertinente dans ce fichier (index_debut)
-    logging.critical("Pas de date pertinente dans ce fichier (index_debut)")
-    sg.popup_ok("Pas de date pertinente dans ce fichier (index_debut)", title="Erreur", keep_on_top=True)
-    return None, False
-  if data_horaire['ddmmyyyyhhmm'][index_fin] != date_fin_fichier:
-    # Pas de date pertinente dans ce fichier (index_fin)
-    logging.critical("Pas de date pertinente dans ce fichier (index_fin)")
-    sg.popup_ok("Pas de date pertinente dans ce fichier (index_debut)", title="Erreur", keep_on_top=True)
-    return None, False
-
-
-  # Restrictions des données entre index_debut et index_fin
-  data_horaire = data_horaire.iloc[index_debut:index_fin+1,:]
-
-  # Formatage des dates et heures
-  data_horaire['ddmmyyyyhhmm'] = pd.to_datetime(data_horaire['ddmmyyyyhhmm'][:],format='%d%m%Y%H%M',errors='coerce')
-  data_horaire['date'] = data_horaire['ddmmyyyyhhmm']
-
-  # Formatage des données numériques
-  for param in data_horaire.columns[2:14]:
-    data_horaire[param] = pd.to_numeric(data_horaire[param])
-    
-  # Création d'un index, tri des données
-  data_horaire.set_index(['date'], inplace=True)
-  data_horaire.sort_index(ascending=True, inplace=True)
- 
-  # Enregistrement de la dataframe
-  index = np.where(data_horaire['ddmmyyyyhhmm'].notnull())[0]
-  data_horaire_final = pd.DataFrame({
-    'DATE':data_horaire['ddmmyyyyhhmm'].iloc[index], # date
-    'T':data_horaire['TSYN'].iloc[index],            # température
-    'TD':data_horaire['TDSYN'].iloc[index],          # température de rosée
-    'DI':data_horaire['DINSH'].iloc[index],          # durée d'insolation
-    'RG':data_horaire['RGH'].iloc[index],            # rayonnement global
-    'FXI':data_horaire['FXI'].iloc[index],           # vitesse maximale sur 10min          
-    'FF':data_horaire['FXY'].iloc[index],            # vitesse moyenne sur 10min
-    'DD':data_horaire['DXY'].iloc[index],            # direction moyenne sur 10min
-    'U':data_horaire['USYN'].iloc[index],            # humidité relative
-    'P':data_horaire['PSTASYN'].iloc[index],         # pression au niveau de la station 
-    }, columns=['DATE','T','TD','DI','RG','FXI','FF','DD','U','P'])
-
-  # Renvoie la dataframe
-  return data_horaire_final, True
-  
-def recuperation_donnees_horaire():
+def recuperation_donnees_horaire(window, annulation):
+  # Lance la récupération des données de la période choisie : les vérifications (dates, existence des fichiers) sont
+  # faites dans la boucle des événements, la lecture des fichiers dans un thread (lecture_donnees_horaire), qui envoie à la
+  # fenêtre les événements '-progression_donnees_horaire-' et '-donnees_recuperees_horaire-'
+  # Renvoie False si la récupération n'est pas lancée
   # Date locale de début, date locale de fin
   date_locale_debut_horaire = datetime.datetime(int(annee_debut_horaire),int(mois_debut_horaire),int(jour_debut_horaire),int(heure_debut_horaire),00)
   date_locale_fin_horaire = datetime.datetime(int(annee_fin_horaire),int(mois_fin_horaire),int(jour_fin_horaire),int(heure_fin_horaire),00)
@@ -164,89 +104,56 @@ def recuperation_donnees_horaire():
   print(date_locale_fin_horaire)
   if date_locale_debut_horaire >= date_locale_fin_horaire:
     sg.popup_ok("La date de début est postérieure ou égale à la date de fin !", title="Erreur", keep_on_top=True)
-    return None, False
+    return False
   if date_locale_fin_horaire >= datetime.datetime.today():
     sg.popup_ok("La date de fin est dans le futur !", title="Erreur", keep_on_top=True)
-    return None, False
+    return False
   if date_locale_debut_horaire >= datetime.datetime.today():
     sg.popup_ok("La date de début est dans le futur !", title="Erreur", keep_on_top=True)
-    return None, False
+    return False
 
   # Dates au format UTC
   date_debut_horaire = date_locale_debut_horaire - datetime.timedelta(hours=decalage[fuseau])
   date_fin_horaire = date_locale_fin_horaire - datetime.timedelta(hours=decalage[fuseau])
 
-  # Formatage des dates 
-  ddmmyyhhmm_debut_horaire = date_debut_horaire.strftime("%d%m%Y%H%M")
-  ddmmyyhhmm_fin_horaire = date_fin_horaire.strftime("%d%m%Y%H%M")
-  yymm_debut_horaire = date_debut_horaire.strftime("%Y%m")
-  yymm_fin_horaire = date_fin_horaire.strftime("%Y%m")
-
-  # Date du jour
-  aujourdhui = datetime.datetime.today()
-
-  # Boucle sur les mois demandés
-  for yymm in range(int(yymm_debut_horaire), int(yymm_fin_horaire)+1):
-    # Choix du fichier
-    if str(yymm)==aujourdhui.strftime("%Y%m"):
-      fichier_horaire = "DON_Horaire_UTC_moisencours.csv"
-    else :
-      fichier_horaire = "DON_Horaire_UTC_" + str(yymm) + ".txt"
-    # Chemin complet
-    chemin_horaire = os.path.join(emplacement_horaire, fichier_horaire)
-
-    # Date de début et date de fin du mois de ce fichier
-    date_debut_fichier_horaire = "01" + str(yymm)[4:6] + str(yymm)[0:4] + "0000"
-    res = calendar.monthrange(int(str(yymm)[0:4]), int(str(yymm)[4:6]))
-    date_fin_fichier_horaire = str(res[1]) + str(yymm)[4:6] + str(yymm)[0:4] + "2300"
-    # Cas spécial pour le premier ou le dernier fichier
-    if str(yymm) == yymm_debut_horaire:
-      # Premier fichier
-      date_debut_fichier_horaire = ddmmyyhhmm_debut_horaire
-    if str(yymm) == yymm_fin_horaire:
-      # Dernier fichier
-      date_fin_fichier_horaire = ddmmyyhhmm_fin_horaire
-    
+  # Fichiers mensuels à lire, avec la période à extraire de chacun
+  taches = taches_periode(emplacement_horaire, "DON_Horaire_UTC_", date_debut_horaire, date_fin_horaire)
+  for chemin_horaire, date_debut_fichier_horaire, date_fin_fichier_horaire in taches:
     logging.info("Lecture et nettoyage des données de : " + chemin_horaire)
-    logging.info("Date de début : " + date_debut_fichier_horaire)
-    logging.info("Date de fin :   " + date_fin_fichier_horaire)
-    
-    # Barre de progression
-    if not sg.one_line_progress_meter('Récupération des données',
-                                      int(yymm)-int(yymm_debut_horaire)+1,
-                                      int(yymm_fin_horaire)-int(yymm_debut_horaire)+1,
-                                      key='-barre-',
-                                      orientation='h',
-                                      no_titlebar=True,
-                                      grab_anywhere=True,
-                                      no_button=True):
-      logging.info('Hit the break')
-      break
-
-    if str(yymm) == yymm_debut_horaire:
-      # Premier fichier
-      data, success = recuperation_donnees_mois_horaire(chemin_horaire, date_debut_fichier_horaire, date_fin_fichier_horaire)
-      if not success:
-        sg.one_line_progress_meter_cancel(key='-barre-')
-        return None, False
-      logging.info("Nombre de ligne pour ce fichier : " + str(data.shape[0]))
-    else:
-      # Fichiers suivants
-      dataTmp, success = recuperation_donnees_mois_horaire(chemin_horaire, date_debut_fichier_horaire, date_fin_fichier_horaire)
-      if not success:
-        sg.one_line_progress_meter_cancel(key='-barre-')
-        return None, False
-      logging.info("Nombre de ligne pour ce fichier : " + str(dataTmp.shape[0]))
+    logging.info("Date de début : " + str(date_debut_fichier_horaire))
+    logging.info("Date de fin :   " + str(date_fin_fichier_horaire))
 
-      # Concaténation avec la dataframe
-      data = pd.concat([data, dataTmp], ignore_index=True)
+    # Test de l'existence du fichier
+    if not existence_fichier(chemin_horaire, False):
+      return False
 
-  # Taille totale de la dataframe
-  logging.info("Taille totale de la dataframe: " + str(data.shape[0]))
+  # Lecture des fichiers dans un thread de travail
+  annulation.clear()
+  threading.Thread(target=lecture_donnees_horaire, args=(window, taches, annulation), daemon=True).start()
+  return True
+
+def lecture_donnees_horaire(window, taches, annulation):
+  # Lecture des fichiers mensuels, exécutée dans un thread de travail : la progression est envoyée à la fenêtre après
+  # la lecture de chaque mois, la lecture s'arrête au mois suivant dès que annulation est positionné, et les données
+  # (None en cas d'annulation ou d'erreur) sont envoyées avec l'événement '-donnees_recuperees_horaire-'
+  # Aucune fenêtre n'est ouverte ici : les messages d'erreur sont affichés par la boucle des événements
+  def progression(i, n):
+    window.write_event_value('-progression_donnees_horaire-', (i, n))
+    return not annulation.is_set()
+
+  # Lecture des fichiers en parallèle et concaténation en une seule fois
+  try:
+    data = chargement_mois(taches, SCHEMA_HORAIRE, progression)
+  except Exception:
+    logging.exception("Erreur lors de la lecture des données")
+    data = None
+  if data is None:
+    logging.info('Hit the break')
+  else:
+    # Taille totale de la dataframe
+    logging.info("Taille totale de la dataframe: " + str(data.shape[0]))
+  window.write_event_value('-donnees_recuperees_horaire-', data)
 
-  # Renvoie la dataframe
-  return data, True
-  
 def write_data_horaire(data, P=False, T=False, Tres=False, FMOY=False, DMOY=False, FINS=False, DINS=False, HU=False, DI=False, RG=False) :
   # Ecriture d'un fichier csv
   logging.info("Le fichier 'csv' est enregistré sous : " + emplacement_csv)
@@ -286,7 +193,7 @@ def write_data_horaire(data, P=False, T=False, Tres=False, FMOY=False, DMOY=Fals
   sg.popup_ok("Fichier " + chemin_csv + " exporté", title="Confirmation", keep_on_top=True)
 
 
-def figure_vent_horaire(data,unite):
+def figure_vent_horaire(data, unite, figures=figures):
   # Trace le vent moyen
   logging.info("Le fichier png est enregistré sous : " + emplacement_figure)
   existence_repertoire(emplacement_figure)
@@ -298,72 +205,74 @@ def figure_vent_horaire(data,unite):
   chemin_figure_horaire = os.path.join(emplacement_figure, fichier_figure)
   logging.info("Nom du fichier png: " + chemin_figure_horaire)
 
-  # Date
-  data_date = data['DATE'] + datetime.timedelta(hours=decalage[fuseau])
-
   # Paramètres du graphe
   ratio = 0.2
 
-  # Conversion à la demande
+  # Unité demandée : bornes et seuil de l'axe des ordonnées, conversion depuis les m/s des séries
   if unite == 'km/h' :
-    data_FF = data['FF']*3.6
-    data_FXI = data['FXI']*3.6
     ymin = 0
     ymax = 250
     seuil = 90
   elif unite =='kt' :
-    data_FF = data['FF']*3.6/1.8
-    data_FXI = data['FXI']*3.6/1.8
     ymin = 0
     ymax = 140
     seuil = 50
   elif unite == 'm/s':
-    data_FF = data['FF']
-    data_FXI = data['FXI']
     ymin = 0
     ymax = 70
     seuil = 25
   else:
     logging.info("Unité de vent inconnue !")
     exit(1)
-   
-  # Calculs des bornes de l'axe des ordonnées
-  if max(data_FXI)+abs(ratio*max(data_FXI)) > ymax:
+  directe, inverse = CONVERSIONS[unite]
+
+  # Tracé du graphe dans la figure persistante de la variable
+  # Les courbes sont tracées en m/s et ne sont recalculées que pour de nouvelles données : un changement d'unité ne
+  # modifie que la graduation de l'axe, ses bornes et le seuil
+  figure = figure_persistante(figures, 'vent')
+  fig, ax = figure.fig, figure.ax
+  ax2 = figure.axe_jumeau()
+  if figure.nouvelles_donnees(data, fuseau):
+    # Date
+    data_date = dates_locales(data, decalage[fuseau])
+    data_FF = data['FF']
+    data_FXI = data['FXI']
+    figure.ligne(ax, 'FXI', np.array(data_date), np.array(data_FXI), linewidth=1, color='brown', label='rafales')
+    figure.ligne(ax, 'FF', np.array(data_date), np.array(data_FF), linewidth=1, color='darkblue', label='vent moyen')
+    figure.ligne(ax2, 'DD', np.array(data_date), np.array(data['DD']), color='forestgreen', label='direction', linestyle='dashed', linewidth=0.7)
+    ax.autoscale(axis='x', tight='true')
+    premiere_date, derniere_date = [date + datetime.timedelta(hours=decalage[fuseau]) for date in extremes(data, 'DATE')]
+    figure.texte(ax, 'sous_titre', f"Données horaires du {premiere_date.strftime('%d')} {premiere_date.strftime('%h')} {premiere_date.strftime('%Y')} à {premiere_date.strftime('%H:%M')} au {derniere_date.strftime('%d')} {derniere_date.strftime('%h')} {derniere_date.strftime('%Y')} à {derniere_date.strftime('%H:%M')}", x=0.5, y=1.05, fontsize=8, alpha=0.75, ha='center', va='bottom', transform=ax.transAxes)
+    FXI_min, FXI_max = extremes(data, 'FXI')
+    figure.statistiques = {'FXI_max':FXI_max, 'FXI_min':FXI_min}
+
+  # Calculs des bornes de l'axe des ordonnées, dans l'unité demandée
+  FXI_max = directe(figure.statistiques['FXI_max'])
+  FXI_min = directe(figure.statistiques['FXI_min'])
+  if FXI_max+abs(ratio*FXI_max) > ymax:
     bmax = ymax
   else:
-    bmax = max(data_FXI)+ratio*abs(max(data_FXI))
-  if min(data_FXI)-ratio*min(data_FXI) < ymin:
+    bmax = FXI_max+ratio*abs(FXI_max)
+  if FXI_min-ratio*FXI_min < ymin:
     bmin = ymin
   else:
-    bmin = min(data_FXI)-ratio*abs(min(data_FXI))
-
-  # Tracé du graphe
-  fig, ax = plt.subplots(1, 1, figsize=(16, 9))
-  ax.plot(np.array(data_date),np.array(data_FXI), linewidth=1, color='brown', label='rafales')
-  ax.plot(np.array(data_date),np.array(data_FF), linewidth=1, color='darkblue', label='vent moyen')
-  ax.axhline(seuil, color='red', linewidth=1, linestyle='--',label='seuil tempête')
-  ax.axhline(0, color='grey', linestyle='--')
+    bmin = FXI_min-ratio*abs(FXI_min)
+
+  figure.ligne_horizontale(ax, 'seuil', inverse(seuil), color='red', linewidth=1, linestyle='--',label='seuil tempête')
+  figure.ligne_horizontale(ax, 'zero', inverse(0), color='grey', linestyle='--')
 #  ax.grid(b=True, which='major', axis='both', color='lightgrey', zorder=1)
-  ax2=ax.twinx()
   ax2.set_ylabel('direction du vent [°]', color='black')
-  ax2.plot(np.array(data_date), np.array(data['DD']), color='forestgreen', label='direction', linestyle='dashed', linewidth=0.7)
   ax2.tick_params(axis='y', labelcolor='forestgreen')
   ax.set_xlabel(f"date et heure  {str(fuseau)}")
-  ax.set_ylabel(f"Vent moyen et rafales [{str(unite)}]")
-  ax.autoscale(axis='x', tight='true')
+  figure.axe_unite(ax, directe, inverse, f"Vent moyen et rafales [{str(unite)}]")
   fig.autofmt_xdate()
-  ax.text(x=0.5, y=1.1 , s=f"Vent moyen et rafales", fontsize=16, weight='bold', ha='center', va='bottom', transform=ax.transAxes)
-  ax.text(x=0.5, y=1.05, s=f"Données horaires du {min(data_date).strftime('%d')} {min(data_date).strftime('%h')} {min(data_date).strftime('%Y')} à {min(data_date).strftime('%H:%M')} au {max(data_date).strftime('%d')} {max(data_date).strftime('%h')} {max(data_date).strftime('%Y')} à {max(data_date).strftime('%H:%M')}", fontsize=8, alpha=0.75, ha='center', va='bottom', transform=ax.transAxes)
-  _, ylim = ax.get_ylim()
-  ax.set_ylim(bottom=bmin, top=bmax)
-  l=4
-  axins = inset_axes(ax, width=0.984 * l, height=0.157 * l, borderpad=0, loc="upper right")
-  axins.imshow(logo, alpha=0.5)
-  axins.axis('off')
- 
+  figure.texte(ax, 'titre', f"Vent moyen et rafales", x=0.5, y=1.1, fontsize=16, weight='bold', ha='center', va='bottom', transform=ax.transAxes)
+  ax.set_ylim(bottom=inverse(bmin), top=inverse(bmax))
+  figure.ajout_logo(logo)
+
   return fig, ax, chemin_figure_horaire
 
-def figure_pression_horaire(data, unite):
+def figure_pression_horaire(data, unite, figures=figures):
   # Trace la pression atmosphérique
   logging.info("Le fichier png est enregistré sous : " + emplacement_figure)
   existence_repertoire(emplacement_figure)
@@ -375,56 +284,61 @@ def figure_pression_horaire(data, unite):
   chemin_figure_horaire = os.path.join(emplacement_figure, fichier_figure)
   logging.info("Nom du fichier png: " + chemin_figure_horaire)
 
-  # Date
-  data_date = data['DATE'] + datetime.timedelta(hours=decalage[fuseau])
-
   # Paramètres du graphe
   ratio = 0.002
-              
-  # Conversion à la demande
+
+  # Unité demandée : bornes de l'axe des ordonnées, conversion depuis les hPa de la série
   if unite == 'mmHg':
-    data_P = data['P']*0.75
     ymax = 765
     ymin = 675
   elif unite == 'hPa':
-    data_P = data['P']
     ymin = 930
     ymax = 1020
   else:
     logging.error("Unité de pression inconnue !")
     exit(1)
-        
-  # Calculs des bornes de l'axe des ordonnées
-  if max(data_P)+abs(ratio*max(data_P)) > ymax:
+  directe, inverse = CONVERSIONS[unite]
+
+  # Tracé du graphe dans la figure persistante de la variable
+  # La courbe est tracée en hPa et n'est recalculée que pour de nouvelles données : un changement d'unité ne modifie
+  # que la graduation de l'axe et ses bornes
+  figure = figure_persistante(figures, 'pression')
+  fig, ax = figure.fig, figure.ax
+  if figure.nouvelles_donnees(data, fuseau):
+    # Date
+    data_date = dates_locales(data, decalage[fuseau])
+    data_P = data['P']
+    figure.ligne(ax, 'P', np.array(data_date), np.array(data_P), linewidth=1, color='darkblue', label='P')
+    ax.autoscale(axis='x', tight='true')
+    premiere_date, derniere_date = [date + datetime.timedelta(hours=decalage[fuseau]) for date in extremes(data, 'DATE')]
+    figure.texte(ax, 'sous_titre', f"Données horaires du {premiere_date.strftime('%d')} {premiere_date.strftime('%h')} {premiere_date.strftime('%Y')} à {premiere_date.strftime('%H:%M')} au {derniere_date.strftime('%d')} {derniere_date.strftime('%h')} {derniere_date.strftime('%Y')} à {derniere_date.strftime('%H:%M')}", x=0.5, y=1.05, fontsize=8, alpha=0.75, ha='center', va='bottom', transform=ax.transAxes)
+    P_min, P_max = extremes(data, 'P')
+    figure.statistiques = {'P_max':P_max, 'P_min':P_min}
+
+  # Calculs des bornes de l'axe des ordonnées, dans l'unité demandée
+  P_max = directe(figure.statistiques['P_max'])
+  P_min = directe(figure.statistiques['P_min'])
+  if P_max+abs(ratio*P_max) > ymax:
     bmax = ymax
   else:
-    bmax = max(data_P)+ratio*abs(max(data_P))
-  if min(data_P)-ratio*min(data_P) < ymin:
+    bmax = P_max+ratio*abs(P_max)
+  if P_min-ratio*P_min < ymin:
     bmin = ymin
   else:
-    bmin = min(data_P)-ratio*abs(min(data_P))
-        
-  # Tracé du graphe
-  fig, ax = plt.subplots(1, 1, figsize=(16, 9))
-  ax.plot(np.array(data_date),np.array(data_P), linewidth=1, color='darkblue', label='P')
-  ax.axhline(0, color='grey', linestyle='--')
+    bmin = P_min-ratio*abs(P_min)
+
+  figure.ligne_horizontale(ax, 'zero', inverse(0), color='grey', linestyle='--')
 #  ax.grid(b=True, which='both', axis='both', color='lightgrey', zorder=1)
   ax.set_xlabel(f"date et heure {str(fuseau)}")
-  ax.set_ylabel(f"Pression atmosphérique [{str(unite)}]")
-  ax.autoscale(axis='x', tight='true')
+  figure.axe_unite(ax, directe, inverse, f"Pression atmosphérique [{str(unite)}]")
   fig.autofmt_xdate()
-  ax.text(x=0.5, y=1.1 , s=f"Pression atmosphérique", fontsize=16, weight='bold', ha='center', va='bottom', transform=ax.transAxes)
-  ax.text(x=0.5, y=1.05, s=f"Données horaires du {min(data_date).strftime('%d')} {min(data_date).strftime('%h')} {min(data_date).strftime('%Y')} à {min(data_date).strftime('%H:%M')} au {max(data_date).strftime('%d')} {max(data_date).strftime('%h')} {max(data_date).strftime('%Y')} à {max(data_date).strftime('%H:%M')}", fontsize=8, alpha=0.75, ha='center', va='bottom', transform=ax.transAxes)
-  _, ylim = ax.get_ylim()
-  ax.set_ylim(bottom=bmin, top=bmax)
-  l=4
-  axins = inset_axes(ax, width=0.984*l, height=0.157*l, borderpad=0, loc="upper right")
-  axins.imshow(logo, alpha=0.5)
-  axins.axis('off')
+  figure.texte(ax, 'titre', f"Pression atmosphérique", x=0.5, y=1.1, fontsize=16, weight='bold', ha='center', va='bottom', transform=ax.transAxes)
+  ax.set_ylim(bottom=inverse(bmin), top=inverse(bmax))
+  figure.ajout_logo(logo)
 
   return fig, ax, chemin_figure_horaire
 
-def figure_temperature_horaire(data,unite):
+def figure_temperature_horaire(data, unite, figures=figures):
   # Trace la température sous abri et la température ressentie 
   logging.info("Le fichier png est enregistré sous : " + emplacement_figure)
   existence_repertoire(emplacement_figure)
@@ -436,65 +350,67 @@ def figure_temperature_horaire(data,unite):
   chemin_figure_horaire = os.path.join(emplacement_figure, fichier_figure_horaire)
   logging.info("Nom du fichier png: " + chemin_figure_horaire)
 
-  # Date
-  data_date = data['DATE'] + datetime.timedelta(hours=decalage[fuseau])
-
-  # Calcul de la température ressentie
-  data_Tres = 13.12+0.6215*(data['T'])+(0.3965*data['T']-11.37)*(data['FF']*3.6)**0.16
-    
-  # Conversion à la demande
+  # Unité demandée : bornes de l'axe des ordonnées, conversion depuis les °C des séries
   if unite == '°C':
-    data_T=data['T']
     ymin=-45
     ymax=10
     ratio=0.2
   elif unite == '°F':
-    data_T=data['T']*1.8+32
-    data_Tres=data_Tres*1.8+32
     ymax=10*1.8+32
     ymin=-45*1.8+32
     ratio=0.2
   elif unite == 'K' :
-    data_T=data['T']+273.15
-    data_Tres=data_Tres+273.15
     ymax=10+273.15
     ymin=-45+273.5
     ratio=0.002
   else:
     logging.error("Unité de température inconnue !")
     exit(1)
-
-  # Calculs des bornes de l'axe des ordonnées
-  if max(data_T)+abs(ratio*max(data_T)) > ymax:
+  directe, inverse = CONVERSIONS[unite]
+
+  # Tracé du graphe dans la figure persistante de la variable
+  # Les courbes sont tracées en °C et ne sont recalculées que pour de nouvelles données : un changement d'unité ne
+  # modifie que la graduation de l'axe et ses bornes
+  figure = figure_persistante(figures, 'temperature')
+  fig, ax = figure.fig, figure.ax
+  if figure.nouvelles_donnees(data, fuseau):
+    # Date
+    data_date = dates_locales(data, decalage[fuseau])
+
+    # Calcul de la température ressentie
+    data_T = data['T']
+    data_Tres = 13.12+0.6215*(data['T'])+(0.3965*data['T']-11.37)*(data['FF']*3.6)**0.16
+
+    figure.ligne(ax, 'T', np.array(data_date), np.array(data_T), linewidth=1, color='blue', label='T sous abri')
+    figure.ligne(ax, 'Tres', np.array(data_date), np.array(data_Tres), linewidth=1, color='black', label='T ressentie')
+    ax.autoscale(axis='x', tight='true')
+    premiere_date, derniere_date = [date + datetime.timedelta(hours=decalage[fuseau]) for date in extremes(data, 'DATE')]
+    figure.texte(ax, 'sous_titre', f"Données horaires du {premiere_date.strftime('%d')} {premiere_date.strftime('%h')} {premiere_date.strftime('%Y')} à {premiere_date.strftime('%H:%M')} au {derniere_date.strftime('%d')} {derniere_date.strftime('%h')} {derniere_date.strftime('%Y')} à {derniere_date.strftime('%H:%M')}", x=0.5, y=1.05, fontsize=8, alpha=0.75, ha='center', va='bottom', transform=ax.transAxes)
+    figure.statistiques = {'T_max':extremes(data, 'T')[1], 'Tres_min':extremes_valeurs(data_Tres)[0]}
+
+  # Calculs des bornes de l'axe des ordonnées, dans l'unité demandée
+  T_max = directe(figure.statistiques['T_max'])
+  Tres_min = directe(figure.statistiques['Tres_min'])
+  if T_max+abs(ratio*T_max) > ymax:
     bmax = ymax
   else:
-    bmax = max(data_T)+ratio*abs(max(data_T))
-  if min(data_Tres)-ratio*min(data_Tres) < ymin :
+    bmax = T_max+ratio*abs(T_max)
+  if Tres_min-ratio*Tres_min < ymin :
     bmin = ymin
   else :
-    bmin = min(data_Tres)-ratio*abs(min(data_Tres))
-        
-  # Tracé du graphe
-  fig, ax = plt.subplots(1, 1, figsize=(16, 9))
-  ax.plot(np.array(data_date),np.array(data_T), linewidth=1, color='blue', label='T sous abri')
-  ax.plot(np.array(data_date),np.array(data_Tres), linewidth=1, color='black', label='T ressentie')
-  ax.axhline(0, color='grey', linestyle='--')
+    bmin = Tres_min-ratio*abs(Tres_min)
+
+  figure.ligne_horizontale(ax, 'zero', inverse(0), color='grey', linestyle='--')
 #  ax.grid(b=True, which='both', axis='both', color='lightgrey', zorder=1)
   ax.set_xlabel(f"date et heure {str(fuseau)}")
-  ax.set_ylabel(f"Températures [{str(unite)}]")
-  ax.autoscale(axis='x', tight='true')
+  figure.axe_unite(ax, directe, inverse, f"Températures [{str(unite)}]")
   fig.autofmt_xdate()
   #ax.set_title(f"Températures - données horaires du {min(data_date).strftime('%d')} {min(data_date).strftime('%h')} {min(data_date).strftime('%Y')} à {min(data_date).strftime('%H:%M')} au {max(data_date).strftime('%d')} {max(data_date).strftime('%h')} {max(data_date).strftime('%Y')} à {max(data_date).strftime('%H:%M')}, heure {str(fuseau)}", fontsize=15)
-  ax.text(x=0.5, y=1.1 , s=f"Températures", fontsize=16, weight='bold', ha='center', va='bottom', transform=ax.transAxes)
-  ax.text(x=0.5, y=1.05, s=f"Données horaires du {min(data_date).strftime('%d')} {min(data_date).strftime('%h')} {min(data_date).strftime('%Y')} à {min(data_date).strftime('%H:%M')} au {max(data_date).strftime('%d')} {max(data_date).strftime('%h')} {max(data_date).strftime('%Y')} à {max(data_date).strftime('%H:%M')}", fontsize=8, alpha=0.75, ha='center', va='bottom', transform=ax.transAxes)
-  _, ylim = ax.get_ylim()
-  ax.set_ylim(bottom=bmin, top=bmax)
+  figure.texte(ax, 'titre', f"Températures", x=0.5, y=1.1, fontsize=16, weight='bold', ha='center', va='bottom', transform=ax.transAxes)
+  ax.set_ylim(bottom=inverse(bmin), top=inverse(bmax))
   handles, labels = ax.get_legend_handles_labels()
   ax.legend([handles[x] for x in [0, 1]], [labels[x] for x in [0, 1]], loc="upper left", ncol=len(handles))
-  l=4
-  axins = inset_axes(ax, width=0.984 * l, height=0.157 * l, borderpad=0, loc="upper right")
-  axins.imshow(logo, alpha=0.5)
-  axins.axis('off')
+  figure.ajout_logo(logo)
 
   return fig, ax, chemin_figure_horaire
 
@@ -506,9 +422,19 @@ def get_dpi():
   return current_dpi
 
 def affichage_figure(canvas, figure):
-  # Affichage de la figure
-  tkcanvas = FigureCanvasTkAgg(figure, canvas)
+  # Affichage de la figure : le widget Tk de chaque figure persistante et sa barre d'outils (zoom, déplacement) sont
+  # créés une seule fois, puis redessinés ; les widgets des autres figures sont masqués
+  # L'historique des vues de la barre d'outils est réinitialisé : le bouton "Home" revient à la vue du dernier tracé
+  for tkcanvas, toolbar in widgets_figures.values():
+    toolbar.pack_forget()
+    tkcanvas.get_tk_widget().pack_forget()
+  if figure not in widgets_figures:
+    tkcanvas = FigureCanvasTkAgg(figure, canvas)
+    widgets_figures[figure] = (tkcanvas, NavigationToolbar2Tk(tkcanvas, canvas, pack_toolbar=False))
+  tkcanvas, toolbar = widgets_figures[figure]
   tkcanvas.draw()
+  toolbar.update()
+  toolbar.pack(side='bottom', fill='x')
   tkcanvas.get_tk_widget().pack(side='top', fill='both', expand=1)
   return tkcanvas
 
@@ -524,6 +450,9 @@ def modification_date_horaire(window):
 #############  PROGRAMME PRINCIPAL #############
 
 if (__name__ == "__main__"):
+  # Fichier de log, ouvert uniquement par le programme principal (les processus de lecture des fichiers réimportent ce module)
+  logging.basicConfig(level=logging.DEBUG, filename="py_horaire_log.log",filemode="w")
+
   # Paramètres fixes
   jours = ["{:02d}".format(x) for x in range(1,32)]
   mois = ["{:02d}".format(x) for x in range(1,13)]
@@ -583,12 +512,21 @@ if (__name__ == "__main__"):
 
   ## Données en mémoire
   donnees_en_memoire_horaire = vide
+
+  ## Récupération en cours : période demandée et signal d'annulation du thread de lecture
+  donnees_demandees_horaire = vide
+  annulation_horaire = threading.Event()
   
   ## Unités des figures horaire
   unite_horaire_vent = sg.user_settings_get_entry('-unite_horaire_vent-', 'kt')
   unite_horaire_pression = sg.user_settings_get_entry('-unite_horaire_pression-', 'hPa')
   unite_horaire_temperature = sg.user_settings_get_entry('-unite_horaire_temperature-', '°C')
   chemin_figure_horaire = None
+  figure_courante_horaire = None
+
+  ## Exports png en cours et figures exportées
+  exports_en_cours = 0
+  figures_exportees = []
 
   ## Export CSV
   csv_p = sg.user_settings_get_entry('-csv_p-', True)
@@ -647,6 +585,8 @@ if (__name__ == "__main__"):
 
   # Frame 3 : récupération des données horaire
   sg_donnees_horaire = [ [ sg.Button('Récupérer', enable_events=True ,key='-recuperation_donnees_horaire-'),
+                           sg.ProgressBar(1, orientation='h', size=(15, 20), key='-barre_donnees_horaire-'),
+                           sg.Button('Annuler', enable_events=True, disabled=True, key='-annulation_donnees_horaire-'),
                            sg.Text('Données actuellement chargées:', justification='right'),
                            sg.Text(donnees_en_memoire_horaire, background_color="darkred", text_color='white', key='-donnees_en_memoire_horaire-', justification='left') ] ]
   
@@ -696,6 +636,10 @@ if (__name__ == "__main__"):
   ## Création de la fenêtre
   window = sg.Window('Visualisation des fichiers "Minute" et "Horaire"- DDU', layout, resizable=True)
 
+  ## File d'attente des exports png : les figures sont tracées et enregistrées par un thread de travail, qui signale
+  ## chaque export à la fenêtre
+  file_export = FileExport(lambda nom, chemin, erreur: window.write_event_value('-figure_exportee-', (nom, chemin, erreur)))
+
   # Gestion des événements
   while True:
     ## Récupération de l'événement et des valeurs
@@ -705,6 +649,7 @@ if (__name__ == "__main__"):
 
     ## Quitter normalement
     if event in (sg.WIN_CLOSED, 'Exit'):
+      annulation_horaire.set()
       break
 
     ## Emplacements
@@ -726,9 +671,10 @@ if (__name__ == "__main__"):
       if chemin_figure_horaire == None:
         sg.popup_ok("Impossible d'exporter une figure qui n'existe pas !", title="Erreur", keep_on_top=True)
       else:
-        plt.savefig(chemin_figure_horaire, bbox_inches="tight")
-        plt.close(fig)
-        sg.popup_ok("Fichier " + chemin_figure_horaire + " exporté", title="Confirmation", keep_on_top=True)
+        # Export de la figure affichée, avec son zoom et les paramètres (fuseau, dates, emplacement) de son tracé
+        nom, fonction, arguments = figure_courante_horaire
+        file_export.ajout(nom, fonction, *arguments, limites=limites_axes(fig))
+        exports_en_cours += 1
 
     ## Date / heure de début des fichiers horaires 
     if event == '-jour_debut_horaire-':
@@ -796,9 +742,29 @@ if (__name__ == "__main__"):
 
     ## Récupération des données des fichiers horaires
     if event == '-recuperation_donnees_horaire-':
-      data, success = recuperation_donnees_horaire()
-      if success:
-        donnees_en_memoire_horaire = jour_debut_horaire + "/" + mois_debut_horaire + "/" + annee_debut_horaire + " - " + heure_debut_horaire + ":" + "00" + "  >>>  " + jour_fin_horaire + "/" + mois_fin_horaire + "/" + annee_fin_horaire + " - " + heure_fin_horaire + ":" + "00"
+      if recuperation_donnees_horaire(window, annulation_horaire):
+        donnees_demandees_horaire = jour_debut_horaire + "/" + mois_debut_horaire + "/" + annee_debut_horaire + " - " + heure_debut_horaire + ":" + "00" + "  >>>  " + jour_fin_horaire + "/" + mois_fin_horaire + "/" + annee_fin_horaire + " - " + heure_fin_horaire + ":" + "00"
+        window['-recuperation_donnees_horaire-'].update(disabled=True)
+        window['-annulation_donnees_horaire-'].update(disabled=False)
+    if event == '-annulation_donnees_horaire-':
+      logging.info("Annulation de la récupération des données")
+      annulation_horaire.set()
+      window['-annulation_donnees_horaire-'].update(disabled=True)
+    if event == '-progression_donnees_horaire-':
+      window['-barre_donnees_horaire-'].update(current_count=values[event][0], max=values[event][1])
+    if event == '-donnees_recuperees_horaire-':
+      window['-recuperation_donnees_horaire-'].update(disabled=False)
+      window['-annulation_donnees_horaire-'].update(disabled=True)
+      window['-barre_donnees_horaire-'].update(current_count=0)
+      if values[event] is None:
+        if not annulation_horaire.is_set():
+          sg.popup_ok("Erreur lors de la lecture des données", title="Erreur", keep_on_top=True)
+      elif values[event].empty:
+        logging.critical("Pas de donnée pour la période demandée")
+        sg.popup_ok("Pas de donnée pour la période demandée", title="Erreur", keep_on_top=True)
+      else:
+        data = values[event]
+        donnees_en_memoire_horaire = donnees_demandees_horaire
         window['-donnees_en_memoire_horaire-'].update(donnees_en_memoire_horaire, "green", "white" )
  
     ## Figure Horaire vent
@@ -819,9 +785,8 @@ if (__name__ == "__main__"):
       if donnees_en_memoire_horaire == vide:
         sg.popup_ok("Mémoire vide... Récupérez des données et recommencez !", title="Erreur", keep_on_top=True)
       else:
-        if 'tkcanvas' in globals():
-          tkcanvas.get_tk_widget().destroy()
         fig, ax, chemin_figure_horaire = figure_vent_horaire(data, unite_horaire_vent)
+        figure_courante_horaire = ('vent', instantane(figure_vent_horaire), (data, unite_horaire_vent))
         tkcanvas = affichage_figure(window['-CANVAS-'].TKCanvas, fig)
 
     ## Figure Horaire pression
@@ -838,9 +803,8 @@ if (__name__ == "__main__"):
       if donnees_en_memoire_horaire == vide:
         sg.popup_ok("Mémoire vide... Récupérez des données et recommencez !", title="Erreur", keep_on_top=True)
       else:
-        if 'tkcanvas' in globals():
-          tkcanvas.get_tk_widget().destroy()
         fig, ax, chemin_figure_horaire = figure_pression_horaire(data,unite_horaire_pression)   # unité possibles : 'hPa' ou 'mmHg'
+        figure_courante_horaire = ('pression', instantane(figure_pression_horaire), (data, unite_horaire_pression))
         tkcanvas = affichage_figure(window['-CANVAS-'].TKCanvas, fig)
 
     ## Figure Horaire température
@@ -861,9 +825,8 @@ if (__name__ == "__main__"):
       if donnees_en_memoire_horaire == vide:
         sg.popup_ok("Mémoire vide... Récupérez des données et recommencez !", title="Erreur", keep_on_top=True)
       else:
-        if 'tkcanvas' in globals():
-          tkcanvas.get_tk_widget().destroy()
         fig, ax, chemin_figure_horaire = figure_temperature_horaire(data,unite_horaire_temperature)   # unité possibles : '°C', 'K'ou 'F'
+        figure_courante_horaire = ('temperature', instantane(figure_temperature_horaire), (data, unite_horaire_temperature))
         tkcanvas = affichage_figure(window['-CANVAS-'].TKCanvas, fig)
 
     ## Export figure des fichiers horaires
@@ -871,9 +834,20 @@ if (__name__ == "__main__"):
       if chemin_figure_horaire == None:
         sg.popup_ok("Impossible d'exporter une figure qui n'existe pas !", title="Erreur", keep_on_top=True)
       else:
-        plt.savefig(chemin_figure_horaire, bbox_inches="tight")
-        plt.close(fig)
-        sg.popup_ok("Fichier " + chemin_figure_horaire + " exporté", title="Confirmation", keep_on_top=True)
+        # Export de la figure affichée, avec son zoom et les paramètres (fuseau, dates, emplacement) de son tracé
+        nom, fonction, arguments = figure_courante_horaire
+        file_export.ajout(nom, fonction, *arguments, limites=limites_axes(fig))
+        exports_en_cours += 1
+    if event == '-figure_exportee-':
+      nom, chemin, erreur = values[event]
+      exports_en_cours -= 1
+      if erreur is None:
+        figures_exportees.append(chemin)
+      else:
+        sg.popup_ok("Echec de l'export de la figure " + nom + " : " + erreur, title="Erreur", keep_on_top=True)
+      if exports_en_cours == 0 and len(figures_exportees) > 0:
+        sg.popup_ok("Fichier(s) " + ", ".join(figures_exportees) + " exporté(s)", title="Confirmation", keep_on_top=True)
+        figures_exportees = []
 
     ## Paramètres csv fichier horaire
     if event == '-csv_p-':
@@ -911,3 +885,7 @@ if (__name__ == "__main__"):
         
   # Fermeture de la fenêtre
   window.close()
+
+  # Arrêt du pool de processus de lecture de la session : les lectures de fichiers en attente sont annulées, sans
+  # attendre la fin d'un chargement interrompu
+  fermeture_pool_processus()
@@ -46,7 +46,6 @@ Il fonctionne en python3.12 et a besoin des librairies :
     -.FreeSimpleGUI ou à défaut PySimpleGUI
     - logging
     - subprocess 
-    - codecs
 """
 
 # Chargement des librairies
@@ -70,7 +69,8 @@ from pandas.plotting import register_matplotlib_converters
 import sys
 import subprocess
 from tkinter import *
-import codecs
+from radiosondes import Sondage, catalogue_radiosondes, sondage, sondage_vide
+from thermodynamique import humidite_glace
 
 # Chargement de FreeSimpleGui, ou de PySimpleGui à défaut
 try:
@@ -189,89 +189,41 @@ def recuperation_fichiers_camera():
 
 def lecture_rs(date):
   # Florent Tence : date sous forme DD-MM-AAAA
+  # Le radiosondage est lu à travers le cache radiosondes.SONDAGES : les figures de température, de vent et de vitesse
+  # d'un même lancer ne relisent pas le fichier
   jour = date[:2]
   mois = date[3:5]
   annee = date[6:10]
   #print(emplacement_rs)
-  dossier = sorted([f for f in os.listdir(emplacement_rs) if '.cor' in f]) # list tous les .cor du fichier
-  radical_fichier_mf = 'DD' + annee + mois + jour # je recherche le fichier du jour en question 
-  #print(dossier)
-  #print(radical_fichier_mf)
-  alt,P,T,U,FF,DD,As = [], [], [], [], [], [], [] # je recupère l'altitude, la pression, la température, l'humidité, vent ff et direction, vitesse ascendente
-  if [f for f in dossier if radical_fichier_mf in f] == []: # Si le dossier est vide, on affiche un message signalant qu'il n'y a pas de mesure pour cette date
+  lancers = catalogue_radiosondes(emplacement_rs).lancers(annee + mois + jour) # lancers du jour en question, triés (voir radiosondes.CatalogueRadiosondes)
+  if lancers == []: # Si le dossier est vide, on affiche un message signalant qu'il n'y a pas de mesure pour cette date
     sg.popup_ok("Il n'y a pas de mesure météo france pour cette date", title="Erreur", keep_on_top=True)
+    return Sondage(sondage_vide())
   else:
-    # Ouverture et lecture du fichier de RS
-    nom_fichier_meteofrance = [f for f in dossier if radical_fichier_mf in f][-1] # on prend le dernier lancer de la journée
+    nom_fichier_meteofrance = lancers[-1] # on prend le dernier lancer de la journée
     print(nom_fichier_meteofrance)
-    fichier_mf = codecs.open(emplacement_rs+'/'+nom_fichier_meteofrance,encoding = 'latin1')
-    print(fichier_mf)
-    lines = fichier_mf.readlines()
-     
-    for i in range(1, len(lines)):
-      tmp = lines[i].replace('\n', '').replace('\r','').replace(';', '\t').split('\t')
-      if len(tmp) > 1:
-        alt.append(float(tmp[1])/1000)
-        P.append(float(tmp[12]))          # Pression atmosphérique hPa
-        #T.append(float(tmp[10])+273.15)   # Température en K 
-        T.append(float(tmp[10]))   # Température en °C 
-        U.append(float(tmp[11]))          # humidité relative en %
-        FF.append(float(tmp[7]))          # force du vent
-        DD.append(float(tmp[8]))          # direction du vent
-        As.append(float(tmp[6]))          # vitesse ascentionnelle en m/s ? 
-  return [alt,P,T,U,FF,DD,As] # il me retourne une liste de valeurs
+    return sondage(emplacement_rs, nom_fichier_meteofrance) # montée et descente, séparées au maximum d'altitude
 
 def extract_data_rs_T(date):
-  alt_tot,P_tot,T_tot,U_tot,FF_tot,DD_tot,As_tot = [], [], [], [], [], [], [] 
-  alt_tot,P_tot,T_tot,U_tot,FF_tot,DD_tot,As_tot=lecture_rs(date)
-  alt,alt_d,T,U,U_d,T_d,U2,U2_d = [], [], [], [], [], [], [], [] # altitude, température, humidité
-  if not not(alt_tot) :
-    imax=alt_tot.index(max(alt_tot))
-    alt=alt_tot[0:imax]
-    alt_d=alt_tot[(imax+1):len(alt_tot)]
-    P=P_tot[0:imax]
-    T=T_tot[0:imax]
-    U=U_tot[0:imax]
-    P_d=P_tot[(imax+1):len(alt_tot)]
-    T_d=T_tot[(imax+1):len(alt_tot)]
-    U_d=U_tot[(imax+1):len(alt_tot)]
-    # Humidité / saturation par rapport à la glace
-    To = 273.15 # température de condensation
-    Lv = 2257 # chaleur latente de vaporisation (kJ/kg)
-    Ls = 2800 # chaleur latente de sublimation (kJ/kg)
-    R  = 8.314 # constante des gaz parfaits
-    Me =0.018 # masse molaire de l'eau (kg/mol)
-    Ma =0.029 # masse molaire de l'air sec (kg/mol)
-    e  =[0.61*np.exp(21.87*(x-To)/(x-To+265.5)) for x in T] 
-    e_d=[0.61*np.exp(21.87*(x-To)/(x-To+265.5)) for x in T_d]
-    U2 = [U[i]*np.exp((Lv-Ls)/R*(1/To-1/T[i])*(e[i]*Me*Me+(P[i]-e[i])*Ma*Ma)/((P[i]-e[i])*Ma+e[i]*Me)) for i in range(len(P))]
-    U2_d = [U_d[i]*np.exp((Lv-Ls)/R*(1/To-1/T_d[i])*(e_d[i]*Me*Me+(P_d[i]-e_d[i])*Ma*Ma)/((P_d[i]-e_d[i])*Ma+e_d[i]*Me)) for i in range(len(P_d))]
+  rs = lecture_rs(date)
+  alt, alt_d = rs.montee['alt']/1000, rs.descente['alt']/1000 # altitude en km
+  T, U = rs.montee['T'], rs.montee['U'] # température en °C, humidité relative en %
+  T_d, U_d = rs.descente['T'], rs.descente['U']
+  # Humidité / saturation par rapport à la glace, calculée en une fois sur la montée et la descente
+  U2, U2_d = rs.separation(humidite_glace(rs.data['P'].to_numpy(), rs.data['T'].to_numpy(), rs.data['U'].to_numpy()))
   return T, U, U2, T_d, U_d, U2_d, alt,alt_d 
 
 def extract_data_rs_FF(date):
-  alt_tot,P_tot,T_tot,U_tot,FF_tot,DD_tot,As_tot = [], [], [], [], [], [], [] 
-  alt_tot,P_tot,T_tot,U_tot,FF_tot,DD_tot,As_tot=lecture_rs(date)
-  FF,DD,FF_d,DD_d, alt,alt_d = [], [], [], [], [], [] # l'altitude, vent ff et direction 
-  if not not(alt_tot) :
-    imax=alt_tot.index(max(alt_tot))
-    alt=alt_tot[0:imax]
-    alt_d=alt_tot[(imax+1):len(alt_tot)]
-    FF=FF_tot[0:imax]
-    DD=DD_tot[0:imax]
-    FF_d=FF_tot[(imax+1):len(alt_tot)]
-    DD_d=DD_tot[(imax+1):len(alt_tot)]
+  rs = lecture_rs(date)
+  alt, alt_d = rs.montee['alt']/1000, rs.descente['alt']/1000 # altitude en km
+  FF, DD = rs.montee['FF'], rs.montee['DD'] # vent ff et direction
+  FF_d, DD_d = rs.descente['FF'], rs.descente['DD']
   return FF,DD,FF_d,DD_d, alt,alt_d 
   
 def extract_data_rs_Vi(date):
-  alt_tot,P_tot,T_tot,U_tot,FF_tot,DD_tot,As_tot = [], [], [], [], [], [], [] # l'altitude, la pression, la température, l'humidité, vent ff et direction, vitesse ascendente 
-  alt_tot,P_tot,T_tot,U_tot,FF_tot,DD_tot,As_tot=lecture_rs(date)
-  As,As_d, alt,alt_d = [], [], [], []
-  if not not(alt_tot) :
-    imax=alt_tot.index(max(alt_tot))
-    alt=alt_tot[0:imax]
-    alt_d=alt_tot[(imax+1):len(alt_tot)]
-    As=As_tot[0:imax]
-    As_d=As_tot[(imax+1):len(alt_tot)]
+  rs = lecture_rs(date)
+  alt, alt_d = rs.montee['alt']/1000, rs.descente['alt']/1000 # altitude en km
+  As, As_d = rs.montee['As'], rs.descente['As'] # vitesse ascendante
   return As, As_d, alt,alt_d 
   
 def figure_tempe_rs(date,unite):
@@ -301,7 +253,7 @@ def figure_tempe_rs(date,unite):
   fontsize=10
   fig, ax1 = plt.subplots(1, 1, figsize=(16, 9))
   fig.suptitle("RS du "+date+" \n", fontsize=10)
-  if not not(T) :
+  if len(T) > 0 :
     l1=ax1.plot(T, alt, color='red', label='T montée')
     l2=ax1.plot(T_d, alt_d, "--",color='red', label='T descente')
     twinax1 = ax1.twiny()
@@ -357,7 +309,7 @@ def figure_vent_rs(date,unite):
   fontsize=10
   fig, ax2 = plt.subplots(1, 1, figsize=(16, 9))
   fig.suptitle("RS du "+date+" \n", fontsize=10)
-  if not not(FF) :
+  if len(FF) > 0 :
     l1=ax2.plot(FF, alt, color='green', label='DD montée')
     l2=ax2.plot(FF_d, alt_d, "--",color='green', label='DD descente')
     twinax2 = ax2.twiny()
@@ -410,7 +362,7 @@ def figure_vitesse_rs(date,unite):
   fontsize=10
   fig, ax3 = plt.subplots(1, 1, figsize=(16, 9))
   fig.suptitle("RS du "+date+" \n", fontsize=10)
-  if not not(As) :
+  if len(As) > 0 :
     l1=ax3.plot(alt,As, color='black', label='Montée')
     l2=ax3.plot(alt_d,As_d, color='gray', label='Descente')
     # axis title